@@ -0,0 +1,52 @@
+"""
+Cancellation - Request-scoped cancellation on client disconnect
+
+This module ties a unit of work to the HTTP request that asked for it. The
+work runs as a task while the client's connection is polled; when the client
+goes away the task is cancelled, and the cancellation reaches every awaited
+provider request below it, which aborts the request instead of paying for a
+response nobody will read.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable
+
+
+# Polls FastAPI/Starlette's Request.is_disconnected() or an equivalent
+DisconnectCheck = Callable[[], Awaitable[bool]]
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away before the work finished"""
+
+
+async def run_until_disconnected(
+    work: Awaitable[Any],
+    is_disconnected: DisconnectCheck,
+    poll_interval: float = 0.5
+) -> Any:
+    """
+    Await work, cancelling it if the client disconnects first.
+
+    Args:
+        work: Coroutine or future to run
+        is_disconnected: Async check for whether the client has gone away
+        poll_interval: Seconds between disconnect checks
+
+    Raises:
+        ClientDisconnected: The client went away; work was cancelled and has
+            finished unwinding
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await is_disconnected():
+                raise ClientDisconnected("Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+            # Let provider requests abort and stages clean up before returning
+            await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,182 @@
+"""
+Circuit Breaker - Per-model failure isolation
+
+This module tracks rolling error rates and latency percentiles per model and
+stops sending traffic to a model that is failing or badly degraded, probing
+it again after a cool-down.
+"""
+
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Tuple
+from enum import Enum
+
+
+class CircuitState(Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"          # Normal operation
+    OPEN = "open"              # Skipping the model
+    HALF_OPEN = "half_open"    # Letting probe requests through
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * fraction))
+    return ordered[index]
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker driven by error rate and p95 latency"""
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 120.0,
+        min_requests: int = 10,
+        error_rate_threshold: float = 0.5,
+        latency_threshold: float = 25.0,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+        max_samples: int = 500,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.error_rate_threshold = error_rate_threshold
+        self.latency_threshold = latency_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+
+        self.state = CircuitState.CLOSED
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.samples: Deque[Tuple[float, float, bool]] = deque(maxlen=max_samples)
+
+        # Breaker statistics
+        self.times_opened = 0
+        self.rejected_requests = 0
+        self.last_open_reason = ""
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent to this model now"""
+        if self.state == CircuitState.OPEN:
+            if self.clock() - self.opened_at < self.open_seconds:
+                self.rejected_requests += 1
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self.probes_in_flight = 0
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                self.rejected_requests += 1
+                return False
+            self.probes_in_flight += 1
+
+        return True
+
+    def record_success(self, latency: float):
+        """Record a successful request"""
+        if self.state == CircuitState.HALF_OPEN:
+            # Probe succeeded: start a fresh window
+            self.state = CircuitState.CLOSED
+            self.probes_in_flight = 0
+            self.samples.clear()
+
+        self._add_sample(latency, True)
+        self._evaluate()
+
+    def record_failure(self, latency: float):
+        """Record a failed request"""
+        if self.state == CircuitState.HALF_OPEN:
+            self._open("probe request failed")
+            return
+
+        self._add_sample(latency, False)
+        self._evaluate()
+
+    def record_abandoned(self, latency: float):
+        """Record a request cancelled after latency seconds because a faster one answered"""
+        if self.state == CircuitState.HALF_OPEN:
+            if latency >= self.latency_threshold:
+                self._open(f"probe abandoned after {latency:.1f}s")
+            else:
+                self.release()
+            return
+
+        # Lower bound on the real latency; the request never failed
+        self._add_sample(latency, True)
+        self._evaluate()
+
+    def release(self):
+        """Release a probe slot for a request that was cancelled before finishing"""
+        if self.state == CircuitState.HALF_OPEN and self.probes_in_flight > 0:
+            self.probes_in_flight -= 1
+
+    def latency_percentiles(self) -> Dict[str, float]:
+        """p50/p95/p99 latency over the rolling window"""
+        latencies = [latency for _, latency, _ in self._window()]
+        return {
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3)
+        }
+
+    def error_rate(self) -> float:
+        """Fraction of failed requests over the rolling window"""
+        window = self._window()
+        if not window:
+            return 0.0
+        return sum(1 for _, _, success in window if not success) / len(window)
+
+    def get_stats(self) -> Dict:
+        """Get breaker state and rolling metrics"""
+        window = self._window()
+        return {
+            "state": self.state.value,
+            "requests_in_window": len(window),
+            "error_rate": round(self.error_rate(), 4),
+            "latency": self.latency_percentiles(),
+            "times_opened": self.times_opened,
+            "rejected_requests": self.rejected_requests,
+            "last_open_reason": self.last_open_reason
+        }
+
+    def _add_sample(self, latency: float, success: bool):
+        self.samples.append((self.clock(), latency, success))
+
+    def _window(self) -> List[Tuple[float, float, bool]]:
+        cutoff = self.clock() - self.window_seconds
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+        return list(self.samples)
+
+    def _evaluate(self):
+        """Open the circuit if the rolling window is unhealthy"""
+        if self.state != CircuitState.CLOSED:
+            return
+
+        window = self._window()
+        if len(window) < self.min_requests:
+            return
+
+        error_rate = self.error_rate()
+        if error_rate >= self.error_rate_threshold:
+            self._open(f"error rate {error_rate:.0%}")
+            return
+
+        p95 = self.latency_percentiles()["p95"]
+        if p95 >= self.latency_threshold:
+            self._open(f"p95 latency {p95:.1f}s")
+
+    def _open(self, reason: str):
+        print(f"Circuit breaker opened for {self.name}: {reason}")
+        self.state = CircuitState.OPEN
+        self.opened_at = self.clock()
+        self.probes_in_flight = 0
+        self.times_opened += 1
+        self.last_open_reason = reason
@@ -8,12 +8,14 @@ with budget management and model selection based on complexity.
 import time
 import json
 import os
+import tempfile
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 from enum import Enum
 
 from .openrouter_client import OpenRouterModel
+from .model_selector import ModelSelector
 
 
 class TaskComplexity(Enum):
@@ -33,6 +35,9 @@ class CostEntry:
     cost: float
     task_type: str
     success: bool
+    generation_id: Optional[str] = None
+    reconciled: bool = False
+    latency: Optional[float] = None
 
 
 @dataclass
@@ -58,12 +63,18 @@ class CostOptimizer:
         self.model_costs = {
             "google/gemini-flash-1.5": {"input": 0.075, "output": 0.30},
             "anthropic/claude-3-haiku": {"input": 0.25, "output": 1.25},
-            "anthropic/claude-3-sonnet": {"input": 3.0, "output": 15.0}
+            "anthropic/claude-3-sonnet": {"input": 3.0, "output": 15.0},
+            "meta-llama/llama-3.1-8b-instruct": {"input": 0.05, "output": 0.05}
         }
         
         # Load existing cost data
         self._load_cost_history()
         
+        # Observed latency, acceptance and cost per model, seeded from the ledger
+        self.model_selector = ModelSelector(self)
+        for entry in self.cost_history:
+            self.model_selector.record_entry(entry)
+        
     def estimate_request_cost(
         self, 
         model: str, 
@@ -102,6 +113,22 @@ class CostOptimizer:
     def choose_optimal_model(self, complexity: TaskComplexity, budget_conscious: bool = True) -> str:
         """Select most cost-effective model for task complexity"""
         
+        static_choice = self.static_model_choice(complexity, budget_conscious)
+        if static_choice is None:
+            return None  # Budget exhausted
+        
+        # Prefer what the ledger and quality checks say, once there is enough of it
+        observed_choice = self.model_selector.choose(complexity)
+        if observed_choice is not None:
+            self.model_selector.observed_choices += 1
+            return observed_choice
+        
+        self.model_selector.static_choices += 1
+        return static_choice
+    
+    def static_model_choice(self, complexity: TaskComplexity, budget_conscious: bool = True) -> Optional[str]:
+        """Model picked from fixed budget thresholds alone"""
+        
         # Check current budget status
         today = datetime.now().strftime("%Y-%m-%d")
         daily_spend = self._get_daily_spend(today)
@@ -138,7 +165,8 @@ class CostOptimizer:
         input_tokens: int,
         output_tokens: int,
         task_type: str = "story_generation",
-        success: bool = True
+        success: bool = True,
+        latency: Optional[float] = None
     ) -> float:
         """Record actual API request cost"""
         
@@ -151,15 +179,93 @@ class CostOptimizer:
             output_tokens=output_tokens,
             cost=cost,
             task_type=task_type,
-            success=success
+            success=success,
+            latency=latency
         )
         
         self.cost_history.append(entry)
+        self.model_selector.record_entry(entry)
         self._update_daily_budget(cost, success)
         self._save_cost_history()
         
         return cost
     
+    def record_batch(self, entries: List[CostEntry], save: bool = True) -> float:
+        """Record already-priced entries, saving the ledger once for the batch"""
+        
+        for entry in entries:
+            self.cost_history.append(entry)
+            self.model_selector.record_entry(entry)
+            self._update_daily_budget(entry.cost, entry.success, entry.timestamp)
+        
+        if save:
+            self._save_cost_history()
+        
+        return sum(entry.cost for entry in entries)
+    
+    def apply_cost_corrections(self, corrections: Dict[str, float], save: bool = True) -> Tuple[int, float]:
+        """
+        Replace estimated costs with billed costs, keyed by generation id.
+        
+        Returns:
+            Tuple of (entries corrected, total cost adjustment)
+        """
+        
+        corrected = 0
+        adjustment = 0.0
+        
+        for entry in self.cost_history:
+            if entry.generation_id not in corrections or entry.reconciled:
+                continue
+            
+            delta = corrections[entry.generation_id] - entry.cost
+            entry.cost = corrections[entry.generation_id]
+            entry.reconciled = True
+            self.model_selector.adjust_cost(entry.model, delta)
+            
+            date = datetime.fromtimestamp(entry.timestamp).strftime("%Y-%m-%d")
+            if date in self.daily_budgets:
+                self.daily_budgets[date].current_spend += delta
+            
+            corrected += 1
+            adjustment += delta
+        
+        if corrected and save:
+            self._save_cost_history()
+        
+        return corrected, adjustment
+    
+    def cost_history_snapshot(self) -> Dict:
+        """
+        Plain-data copy of the ledger. Take it on the event loop; the copy
+        can then be written from a worker thread while the ledger changes.
+        """
+        return {
+            "cost_history": [asdict(entry) for entry in self.cost_history[-1000:]],  # Keep last 1000 entries
+            "daily_budgets": {
+                date: asdict(budget) for date, budget in self.daily_budgets.items()
+            },
+            "last_updated": time.time()
+        }
+    
+    def write_cost_history(self, data: Dict):
+        """
+        Write a ledger snapshot to disk, raising on failure.
+        
+        The file is replaced atomically, so concurrent writers never leave
+        it half-written.
+        """
+        directory = os.path.dirname(os.path.abspath(self.cost_file))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(temp_path, self.cost_file)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+    
     def get_daily_stats(self, date: Optional[str] = None) -> Dict:
         """Get statistics for a specific day"""
         
@@ -218,10 +324,11 @@ class CostOptimizer:
             "success_rate": successful / max(total, 1)
         }
     
-    def _update_daily_budget(self, cost: float, success: bool):
+    def _update_daily_budget(self, cost: float, success: bool, timestamp: Optional[float] = None):
         """Update daily budget tracking"""
         
-        today = datetime.now().strftime("%Y-%m-%d")
+        moment = datetime.fromtimestamp(timestamp) if timestamp is not None else datetime.now()
+        today = moment.strftime("%Y-%m-%d")
         
         if today not in self.daily_budgets:
             self.daily_budgets[today] = DailyBudget(
@@ -267,16 +374,7 @@ class CostOptimizer:
         """Save cost history to file"""
         
         try:
-            data = {
-                "cost_history": [asdict(entry) for entry in self.cost_history[-1000:]],  # Keep last 1000 entries
-                "daily_budgets": {
-                    date: asdict(budget) for date, budget in self.daily_budgets.items()
-                },
-                "last_updated": time.time()
-            }
-            
-            with open(self.cost_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            self.write_cost_history(self.cost_history_snapshot())
                 
         except Exception as e:
             print(f"Warning: Could not save cost history: {e}")
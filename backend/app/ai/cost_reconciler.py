@@ -0,0 +1,296 @@
+"""
+Cost Reconciler - Background cost accounting
+
+This module takes cost accounting off the request path: requests enqueue a
+small event carrying the provider's real usage block and generation id, and
+a background worker batch-writes the ledger and later replaces estimates with
+the provider's authoritative per-generation cost.
+"""
+
+import time
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from .cost_optimizer import CostEntry, CostOptimizer
+
+
+@dataclass
+class CostEvent:
+    """One completed provider request awaiting accounting"""
+    model: str
+    usage: Dict = field(default_factory=dict)
+    generation_id: Optional[str] = None
+    task_type: str = "story_generation"
+    success: bool = True
+    latency: Optional[float] = None
+    timestamp: float = field(default_factory=time.time)
+
+
+class CostReconciler:
+    """Queue cost events and write them to the ledger in batches"""
+
+    def __init__(
+        self,
+        cost_optimizer: CostOptimizer,
+        batch_size: int = 50,
+        flush_interval: float = 2.0,
+        max_queue: int = 10000,
+        cost_lookup: Optional[Callable[[str], Awaitable[Optional[float]]]] = None,
+        lookup_delay: float = 10.0,
+        max_lookup_attempts: int = 3,
+        lookup_concurrency: int = 4
+    ):
+        """
+        Args:
+            cost_optimizer: Ledger the events are written to
+            batch_size: Most events written per ledger save
+            flush_interval: Seconds to wait for a batch to fill before writing it
+            max_queue: Events held before new ones are dropped
+            cost_lookup: Coroutine returning the provider's billed cost for a generation id
+            lookup_delay: Seconds between writing an entry and looking up its cost
+            max_lookup_attempts: Lookups per generation before keeping the estimate
+            lookup_concurrency: Lookups in flight at once
+        """
+        self.cost_optimizer = cost_optimizer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.cost_lookup = cost_lookup
+        self.lookup_delay = lookup_delay
+        self.max_lookup_attempts = max_lookup_attempts
+        self.lookup_concurrency = lookup_concurrency
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lookups: Deque[Tuple[float, str, int]] = deque()
+
+        # Reconciler statistics
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.lookups = 0
+        self.lookup_failures = 0
+        self.corrections = 0
+        self.cost_adjustment = 0.0
+
+    def record(self, event: CostEvent) -> bool:
+        """
+        Queue an event without blocking the caller.
+
+        Returns:
+            False if the queue is full and the event was dropped
+        """
+        try:
+            queue = self._ensure_worker()
+        except RuntimeError:
+            # No event loop to hand off to: write it directly
+            self.enqueued += 1
+            self._write_entries([self._to_entry(event)], save=True)
+            return True
+
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(f"Warning: Cost event queue full, dropping event for {event.model}")
+            return False
+
+        self.enqueued += 1
+        return True
+
+    async def flush(self):
+        """Wait until every queued event has been written"""
+        if self._queue is not None and self._worker is not None and not self._worker.done():
+            await self._queue.join()
+
+    async def reconcile_now(self):
+        """Look up every pending generation cost immediately"""
+        self._lookups = deque((0.0, generation_id, attempts) for _, generation_id, attempts in self._lookups)
+        await self._reconcile_due()
+
+    async def close(self):
+        """Flush queued events and stop the worker"""
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def get_stats(self) -> Dict:
+        """Get queue, write and reconciliation statistics"""
+        return {
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "batches": self.batches,
+            "average_batch_size": round(self.written / max(self.batches, 1), 2),
+            "write_errors": self.write_errors,
+            "pending_lookups": len(self._lookups),
+            "lookups": self.lookups,
+            "lookup_failures": self.lookup_failures,
+            "corrections": self.corrections,
+            "cost_adjustment": round(self.cost_adjustment, 6)
+        }
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        """Start the worker on the running loop, carrying over any queued events"""
+        loop = asyncio.get_running_loop()
+
+        if self._queue is None or self._loop is not loop:
+            queue = asyncio.Queue(maxsize=self.max_queue)
+            while self._queue is not None and not self._queue.empty():
+                queue.put_nowait(self._queue.get_nowait())
+            self._queue = queue
+            self._loop = loop
+            self._worker = None
+
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+
+        return self._queue
+
+    async def _run(self):
+        """Write batches as they fill and reconcile costs as lookups come due"""
+        while True:
+            batch = await self._next_batch()
+
+            if batch:
+                try:
+                    await self._write_batch(batch)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+
+            await self._reconcile_due()
+
+    async def _next_batch(self) -> List[CostEvent]:
+        """Collect up to batch_size events, waiting at most flush_interval once one arrives"""
+        loop = asyncio.get_running_loop()
+        batch = []
+
+        try:
+            batch.append(await asyncio.wait_for(self._queue.get(), self._idle_timeout()))
+        except asyncio.TimeoutError:
+            return batch
+
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    def _idle_timeout(self) -> Optional[float]:
+        """How long the worker may sleep before a lookup comes due"""
+        if not self._lookups:
+            return None
+        return max(0.0, min(due for due, _, _ in self._lookups) - time.monotonic())
+
+    async def _write_batch(self, batch: List[CostEvent]):
+        """Apply a batch to the ledger and save it off the event loop"""
+        entries = [self._to_entry(event) for event in batch]
+        self._write_entries(entries, save=False)
+
+        await self._save("batch")
+
+        if self.cost_lookup is not None:
+            due = time.monotonic() + self.lookup_delay
+            for entry in entries:
+                if entry.generation_id:
+                    self._lookups.append((due, entry.generation_id, 0))
+
+    def _write_entries(self, entries: List[CostEntry], save: bool):
+        self.cost_optimizer.record_batch(entries, save=save)
+        self.written += len(entries)
+        self.batches += 1
+
+    async def _reconcile_due(self):
+        """Replace estimated costs with the provider's billed cost for due lookups"""
+        if self.cost_lookup is None or not self._lookups:
+            return
+
+        now = time.monotonic()
+        due = [lookup for lookup in self._lookups if lookup[0] <= now]
+        if not due:
+            return
+        self._lookups = deque(lookup for lookup in self._lookups if lookup[0] > now)
+
+        semaphore = asyncio.Semaphore(self.lookup_concurrency)
+
+        async def lookup(generation_id: str) -> Optional[float]:
+            async with semaphore:
+                try:
+                    return await self.cost_lookup(generation_id)
+                except Exception as e:
+                    print(f"Warning: Cost lookup failed for {generation_id}: {e}")
+                    return None
+
+        costs = await asyncio.gather(*(lookup(generation_id) for _, generation_id, _ in due))
+        self.lookups += len(due)
+
+        corrections = {}
+        for (_, generation_id, attempts), cost in zip(due, costs):
+            if cost is not None:
+                corrections[generation_id] = cost
+                continue
+
+            self.lookup_failures += 1
+            if attempts + 1 < self.max_lookup_attempts:
+                self._lookups.append((time.monotonic() + self.lookup_delay, generation_id, attempts + 1))
+
+        if not corrections:
+            return
+
+        corrected, adjustment = self.cost_optimizer.apply_cost_corrections(corrections, save=False)
+        self.corrections += corrected
+        self.cost_adjustment += adjustment
+
+        await self._save("corrections")
+
+    async def _save(self, what: str):
+        """Snapshot the ledger on the loop, then write the snapshot off it"""
+        data = self.cost_optimizer.cost_history_snapshot()
+        try:
+            await asyncio.to_thread(self.cost_optimizer.write_cost_history, data)
+        except Exception as e:
+            self.write_errors += 1
+            print(f"Warning: Could not write cost {what}: {e}")
+
+    def _to_entry(self, event: CostEvent) -> CostEntry:
+        """Price an event from its usage block (or the provider-reported cost)"""
+        input_tokens = event.usage.get("prompt_tokens") or 0
+        output_tokens = event.usage.get("completion_tokens") or 0
+
+        cost = event.usage.get("cost")
+        if cost is None:
+            cost = self.cost_optimizer.estimate_request_cost(event.model, input_tokens, output_tokens)
+
+        return CostEntry(
+            timestamp=event.timestamp,
+            model=event.model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost=float(cost),
+            task_type=event.task_type,
+            success=event.success,
+            generation_id=event.generation_id,
+            latency=event.latency
+        )
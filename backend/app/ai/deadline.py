@@ -0,0 +1,108 @@
+"""
+Deadline - Request-scoped time budget
+
+This module replaces per-stage hard-coded timeouts with one deadline created
+when a request starts and passed down to every provider call. Each call
+derives its timeout from the time actually remaining, and stages consult the
+observed p90 of their own past durations to decide whether they still fit.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+from .circuit_breaker import percentile
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when a call is made with no time left on its deadline"""
+
+
+class Deadline:
+    """Absolute point in time by which a request must finish"""
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            seconds: Budget from now
+            clock: Monotonic clock the deadline is measured on
+        """
+        self.clock = clock
+        self.budget = seconds
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - self.clock())
+
+    def elapsed(self) -> float:
+        return self.budget - (self.expires_at - self.clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def fits(self, expected: float, reserve: float = 0.0) -> bool:
+        """Whether something expected to take `expected` seconds can finish with `reserve` to spare"""
+        return self.remaining() - reserve >= expected
+
+    def timeout(self, cap: Optional[float] = None, reserve: float = 0.0) -> float:
+        """
+        Timeout for a call made now.
+
+        Args:
+            cap: Longest the call should take even with more time available
+            reserve: Seconds kept back for work after the call
+
+        Raises:
+            DeadlineExceeded: No time is left after the reserve
+        """
+        available = self.remaining() - reserve
+        if available <= 0:
+            raise DeadlineExceeded(f"Deadline exceeded ({self.budget:.1f}s budget)")
+        return min(available, cap) if cap is not None else available
+
+    def child(self, cap: float) -> "Deadline":
+        """A deadline no later than this one and at most `cap` seconds away"""
+        return Deadline(min(self.remaining(), cap), clock=self.clock)
+
+
+def call_timeout(deadline: Optional[Deadline], default: float) -> float:
+    """Timeout for a provider call: the remaining budget capped at the client default"""
+    if deadline is None:
+        return default
+    return deadline.timeout(cap=default)
+
+
+class LatencyHistory:
+    """Recent durations per stage, for deciding whether a stage still fits"""
+
+    def __init__(self, window: int = 200, min_samples: int = 5, defaults: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            window: Durations kept per stage
+            min_samples: Samples needed before the observed p90 replaces the default
+            defaults: Expected duration per stage until enough samples exist
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.defaults = dict(defaults or {})
+        self.samples: Dict[str, Deque[float]] = {}
+
+    def record(self, stage: str, seconds: float):
+        if stage not in self.samples:
+            self.samples[stage] = deque(maxlen=self.window)
+        self.samples[stage].append(seconds)
+
+    def p90(self, stage: str) -> float:
+        """Observed p90 duration of a stage, or its default while samples are few"""
+        samples = self.samples.get(stage)
+        if samples is None or len(samples) < self.min_samples:
+            return self.defaults.get(stage, 0.0)
+        return percentile(list(samples), 0.90)
+
+    def get_stats(self) -> Dict:
+        return {
+            stage: {"samples": len(samples), "p90": round(self.p90(stage), 3)}
+            for stage, samples in self.samples.items()
+        }
@@ -17,6 +17,9 @@ from enum import Enum
 import json
 import hashlib
 
+from .key_pool import KeyPool
+from .deadline import Deadline, call_timeout
+
 
 class ImageProvider(Enum):
     """Available image generation providers"""
@@ -81,6 +84,16 @@ class StableDiffusionClient:
         self.stability_key = os.getenv("STABILITY_API_KEY")
         self.segmind_key = os.getenv("SEGMIND_API_KEY")
         
+        # Per-provider key pools (e.g. RUNWARE_API_KEYS=k1,k2,...)
+        self.key_pools = {
+            ImageProvider.RUNWARE: KeyPool.from_env("RUNWARE_API_KEY", "RUNWARE_API_KEYS"),
+            ImageProvider.STABILITY_AI: KeyPool.from_env("STABILITY_API_KEY", "STABILITY_API_KEYS"),
+            ImageProvider.SEGMIND: KeyPool.from_env("SEGMIND_API_KEY", "SEGMIND_API_KEYS")
+        }
+        self.runware_key = self.runware_key or next(iter(self.key_pools[ImageProvider.RUNWARE].keys), None)
+        self.stability_key = self.stability_key or next(iter(self.key_pools[ImageProvider.STABILITY_AI].keys), None)
+        self.segmind_key = self.segmind_key or next(iter(self.key_pools[ImageProvider.SEGMIND].keys), None)
+        
         # Provider base URLs
         self.provider_urls = {
             ImageProvider.RUNWARE: "https://api.runware.ai/v1",
@@ -108,7 +121,8 @@ class StableDiffusionClient:
         model: ImageModel = ImageModel.SD_XL,
         settings: Optional[ImageSettings] = None,
         save_path: Optional[str] = None,
-        provider: Optional[ImageProvider] = None
+        provider: Optional[ImageProvider] = None,
+        deadline: Optional[Deadline] = None
     ) -> Dict:
         """
         Generate image from text prompt using Stable Diffusion
@@ -120,6 +134,7 @@ class StableDiffusionClient:
             settings: Generation settings
             save_path: Optional path to save image
             provider: Specific provider to use (auto-select if None)
+            deadline: Request deadline; the provider call gets the time left on it
             
         Returns:
             Dictionary with image data and metadata
@@ -144,11 +159,12 @@ class StableDiffusionClient:
         try:
             # Generate image based on provider
             result = await self._generate_with_provider(
-provider=provider,
-prompt=prompt,
-size=size,
-model=model,
-settings=settings
+                provider=provider,
+                prompt=prompt,
+                size=size,
+                model=model,
+                settings=settings,
+                timeout=call_timeout(deadline, 60)
             )
             
             generation_time = time.time() - start_time
@@ -235,30 +251,52 @@ settings=settings
         prompt: str,
         size: ImageSize,
         model: ImageModel,
-        settings: ImageSettings
+        settings: ImageSettings,
+        timeout: float = 60
     ) -> Dict:
         """Generate image with specific provider"""
         
-        if provider == ImageProvider.RUNWARE:
-            return await self._generate_runware(prompt, size, model, settings)
-        elif provider == ImageProvider.STABILITY_AI:
-            return await self._generate_stability(prompt, size, model, settings)
-        elif provider == ImageProvider.SEGMIND:
-            return await self._generate_segmind(prompt, size, model, settings)
-        else:
+        generators = {
+            ImageProvider.RUNWARE: self._generate_runware,
+            ImageProvider.STABILITY_AI: self._generate_stability,
+            ImageProvider.SEGMIND: self._generate_segmind
+        }
+        if provider not in generators:
             return {"success": False, "error": "Unknown provider"}
+        
+        pool = self.key_pools[provider]
+        api_key = pool.acquire()
+        
+        try:
+            result = await generators[provider](prompt, size, model, settings, api_key=api_key, timeout=timeout)
+        except Exception as e:
+            pool.release(api_key, error=str(e))
+            raise
+        except BaseException:
+            pool.release(api_key)
+            raise
+        
+        # 401/429 eject the key for a while so later requests use the others
+        pool.release(
+            api_key,
+            status=result.get("status"),
+            error=None if result.get("success") else result.get("error")
+        )
+        return result
     
     async def _generate_runware(
         self,
         prompt: str,
         size: ImageSize,
         model: ImageModel,
-        settings: ImageSettings
+        settings: ImageSettings,
+        api_key: Optional[str] = None,
+        timeout: float = 60
     ) -> Dict:
         """Generate image using Runware API"""
         
         headers = {
-            "Authorization": f"Bearer {self.runware_key}",
+            "Authorization": f"Bearer {api_key or self.runware_key}",
             "Content-Type": "application/json"
         }
         
@@ -279,7 +317,7 @@ settings=settings
         url = f"{self.provider_urls[ImageProvider.RUNWARE]}/image/inference"
         
         connector = aiohttp.TCPConnector(ssl=False)  # Disable SSL verification for corporate environments
-        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
             response = await session.post(url, headers=headers, json=payload)
             if response.status == 200:
                 data = await response.json()
@@ -300,19 +338,21 @@ settings=settings
                     return {"success": False, "error": "No image data in response"}
             else:
                 error_text = await response.text()
-                return {"success": False, "error": f"Runware API error: {response.status} - {error_text}"}
+                return {"success": False, "error": f"Runware API error: {response.status} - {error_text}", "status": response.status}
     
     async def _generate_stability(
         self,
         prompt: str,
         size: ImageSize,
         model: ImageModel,
-        settings: ImageSettings
+        settings: ImageSettings,
+        api_key: Optional[str] = None,
+        timeout: float = 60
     ) -> Dict:
         """Generate image using Stability AI API"""
         
         headers = {
-            "Authorization": f"Bearer {self.stability_key}",
+            "Authorization": f"Bearer {api_key or self.stability_key}",
             "Content-Type": "application/json"
         }
         
@@ -331,7 +371,7 @@ settings=settings
         url = f"{self.provider_urls[ImageProvider.STABILITY_AI]}/stable-image/generate/core"
         
         connector = aiohttp.TCPConnector(ssl=False)  # Disable SSL verification for corporate environments
-        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
             response = await session.post(url, headers=headers, json=payload)
             if response.status == 200:
                 data = await response.json()
@@ -350,19 +390,21 @@ settings=settings
                     return {"success": False, "error": "No image data in response"}
             else:
                 error_text = await response.text()  
-                return {"success": False, "error": f"Stability AI error: {response.status} - {error_text}"}
+                return {"success": False, "error": f"Stability AI error: {response.status} - {error_text}", "status": response.status}
     
     async def _generate_segmind(
         self,
         prompt: str,
         size: ImageSize,
         model: ImageModel,
-        settings: ImageSettings
+        settings: ImageSettings,
+        api_key: Optional[str] = None,
+        timeout: float = 60
     ) -> Dict:
         """Generate image using Segmind API"""
         
         headers = {
-            "x-api-key": self.segmind_key,
+            "x-api-key": api_key or self.segmind_key,
             "Content-Type": "application/json"
         }
         
@@ -383,7 +425,7 @@ settings=settings
         url = f"{self.provider_urls[ImageProvider.SEGMIND]}/sdxl1.0-txt2img"
         
         connector = aiohttp.TCPConnector(ssl=False)  # Disable SSL verification for corporate environments
-        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
             response = await session.post(url, headers=headers, json=payload)
             if response.status == 200:
                 data = await response.json()
@@ -402,7 +444,7 @@ settings=settings
                     return {"success": False, "error": "No image data in response"}
             else:
                 error_text = await response.text()
-                return {"success": False, "error": f"Segmind API error: {response.status} - {error_text}"}
+                return {"success": False, "error": f"Segmind API error: {response.status} - {error_text}", "status": response.status}
     
     async def _download_image(self, image_url: str) -> bytes:
         """Download image from URL"""
@@ -441,6 +483,7 @@ settings=settings
             "average_cost_per_image": round(avg_cost_per_request, 4),
             "provider_usage": provider_stats,
             "cheapest_provider": "runware",
+            "key_pools": {provider.value: pool.get_stats() for provider, pool in self.key_pools.items()},
             "estimated_capacity": int(10.0 / avg_cost_per_request) if avg_cost_per_request > 0 else 0
         }
     
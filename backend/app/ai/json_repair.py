@@ -0,0 +1,214 @@
+"""
+JSON Repair - Tolerant parsing of LLM story output
+
+This module recovers story JSON from the malformed output models actually
+produce (markdown fences, smart quotes, trailing commas, a truncated final
+chapter) so a bad response does not cost another API round trip.
+"""
+
+import re
+import json
+from typing import Dict, List, Optional, Tuple
+
+from .story_stream import StoryStreamParser
+
+
+FENCE_PATTERN = re.compile(r"```[a-zA-Z]*[ \t]*\n?(.*?)(?:```|$)", re.DOTALL)
+OPENING_QUOTES = "“„"
+CLOSING_QUOTES = "”"
+
+
+def extract_json_object(text: str) -> Optional[str]:
+    """Slice from the first '{' to the last '}'"""
+    json_start = text.find("{")
+    json_end = text.rfind("}") + 1
+    if json_start == -1 or json_end == 0:
+        return None
+    return text[json_start:json_end]
+
+
+def strip_code_fences(text: str) -> str:
+    """Return the body of the first markdown code fence, if any"""
+    match = FENCE_PATTERN.search(text)
+    return match.group(1) if match else text
+
+
+def normalize_smart_quotes(text: str) -> str:
+    """
+    Turn curly double quotes used as JSON delimiters into straight quotes.
+
+    Curly quotes inside a properly delimited string are prose and are left
+    alone; straight quotes inside a curly-delimited string are escaped.
+    """
+    output = []
+    delimiter = None
+    escape = False
+
+    for char in text:
+        if delimiter is None:
+            if char == '"' or char in OPENING_QUOTES or char in CLOSING_QUOTES:
+                delimiter = '"' if char == '"' else "curly"
+                output.append('"')
+            else:
+                output.append(char)
+            continue
+
+        if escape:
+            escape = False
+            output.append(char)
+        elif char == "\\":
+            escape = True
+            output.append(char)
+        elif delimiter == '"' and char == '"':
+            delimiter = None
+            output.append(char)
+        elif delimiter == "curly" and (char in CLOSING_QUOTES or char in OPENING_QUOTES):
+            delimiter = None
+            output.append('"')
+        elif delimiter == "curly" and char == '"':
+            output.append('\\"')
+        else:
+            output.append(char)
+
+    return "".join(output)
+
+
+def remove_trailing_commas(text: str) -> str:
+    """Drop commas directly before a closing bracket, outside strings"""
+    output = []
+    in_string = False
+    escape = False
+    pending_comma = None
+
+    for char in text:
+        if in_string:
+            output.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if pending_comma is not None:
+            if char.isspace():
+                pending_comma.append(char)
+                continue
+            if char not in "]}":
+                output.append(",")
+            output.extend(pending_comma[1:])
+            pending_comma = None
+
+        if char == ",":
+            pending_comma = [","]
+            continue
+
+        if char == '"':
+            in_string = True
+        output.append(char)
+
+    if pending_comma is not None:
+        output.extend(pending_comma)
+
+    return "".join(output)
+
+
+def recover_truncated_story(text: str) -> Optional[Dict]:
+    """Keep the title and every complete chapter of a cut-off story"""
+    parser = StoryStreamParser()
+    parser.feed(text)
+
+    if parser.complete or not parser.chapters:
+        return None
+
+    return {"title": parser.title or "Untitled Story", "chapters": list(parser.chapters)}
+
+
+class StoryJSONRepairer:
+    """Parse story JSON, applying cheap repairs only when strict parsing fails"""
+
+    REPAIRS = ("code_fence", "smart_quotes", "trailing_commas", "truncated")
+
+    def __init__(self):
+        # Repair statistics
+        self.attempts = 0
+        self.clean = 0
+        self.repaired = 0
+        self.failed = 0
+        self.repair_counts: Dict[str, int] = {name: 0 for name in self.REPAIRS}
+
+    def parse(self, content: str) -> Tuple[Optional[Dict], List[str]]:
+        """
+        Parse a story object from model output.
+
+        Args:
+            content: Raw message content from the model
+
+        Returns:
+            Tuple of (story dict or None, names of repairs applied)
+        """
+        self.attempts += 1
+
+        story = self._loads(content)
+        if story is not None:
+            self.clean += 1
+            return story, []
+
+        repairs = []
+        text = content
+
+        for name, repair in (
+            ("code_fence", strip_code_fences),
+            ("smart_quotes", normalize_smart_quotes),
+            ("trailing_commas", remove_trailing_commas)
+        ):
+            repaired_text = repair(text)
+            if repaired_text == text:
+                continue
+
+            text = repaired_text
+            repairs.append(name)
+
+            story = self._loads(text)
+            if story is not None:
+                return self._record_repaired(story, repairs)
+
+        story = recover_truncated_story(text)
+        if story is not None:
+            repairs.append("truncated")
+            return self._record_repaired(story, repairs)
+
+        self.failed += 1
+        return None, repairs
+
+    def get_stats(self) -> Dict:
+        """Get repair statistics"""
+        return {
+            "attempts": self.attempts,
+            "clean": self.clean,
+            "repaired": self.repaired,
+            "failed": self.failed,
+            "repair_rate": round(self.repaired / max(self.attempts, 1), 4),
+            "failure_rate": round(self.failed / max(self.attempts, 1), 4),
+            "repairs": dict(self.repair_counts)
+        }
+
+    def _record_repaired(self, story: Dict, repairs: List[str]) -> Tuple[Dict, List[str]]:
+        self.repaired += 1
+        for name in repairs:
+            self.repair_counts[name] += 1
+        return story, repairs
+
+    def _loads(self, text: str) -> Optional[Dict]:
+        """Strictly decode a story object, or None"""
+        json_str = extract_json_object(text)
+        if json_str is None:
+            return None
+
+        try:
+            story = json.loads(json_str)
+        except json.JSONDecodeError:
+            return None
+
+        return story if isinstance(story, dict) else None
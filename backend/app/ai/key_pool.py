@@ -0,0 +1,196 @@
+"""
+Key Pool - Multiple API keys per provider
+
+This module spreads requests over every key provisioned for a provider,
+tracks per-key load, errors and rate limits, and temporarily ejects keys the
+provider rejects (401/403) or throttles (429).
+"""
+
+import os
+import time
+import hashlib
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+
+
+class KeyStrategy(Enum):
+    """How the next key is chosen"""
+    ROUND_ROBIN = "round_robin"
+    LEAST_LOADED = "least_loaded"
+
+
+class KeyRejectedError(Exception):
+    """Raised when the provider rejects the API key (401/403)"""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """Identify a key in stats without exposing it"""
+    if not api_key:
+        return "anonymous"
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass
+class KeyState:
+    """Load and health of one key"""
+    key: str
+    in_flight: int = 0
+    requests: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    rejected: int = 0
+    ejected_until: float = 0.0
+    last_error: str = ""
+
+
+class KeyPool:
+    """Select among a provider's API keys, ejecting unhealthy ones for a while"""
+
+    def __init__(
+        self,
+        keys: List[str],
+        strategy: KeyStrategy = KeyStrategy.LEAST_LOADED,
+        rate_limit_ejection: float = 30.0,
+        rejection_ejection: float = 600.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            keys: API keys for one provider (duplicates and blanks are dropped)
+            strategy: Round-robin or least in-flight requests
+            rate_limit_ejection: Seconds a 429'd key sits out when no Retry-After is given
+            rejection_ejection: Seconds a 401/403'd key sits out
+            clock: Monotonic time source
+        """
+        unique = list(dict.fromkeys(key.strip() for key in keys if key and key.strip()))
+        self.states = [KeyState(key) for key in unique]
+        self.strategy = strategy
+        self.rate_limit_ejection = rate_limit_ejection
+        self.rejection_ejection = rejection_ejection
+        self.clock = clock
+        self._next = 0
+        self._by_key = {state.key: state for state in self.states}
+
+        # Pool statistics
+        self.ejections = 0
+        self.exhausted = 0
+
+    @classmethod
+    def from_env(cls, single_var: str, multi_var: Optional[str] = None, **kwargs) -> "KeyPool":
+        """
+        Build a pool from environment variables.
+
+        Args:
+            single_var: Variable holding one key, e.g. OPENROUTER_API_KEY
+            multi_var: Variable holding comma-separated keys, e.g. OPENROUTER_API_KEYS
+        """
+        keys = []
+        if multi_var:
+            keys.extend(os.getenv(multi_var, "").split(","))
+        keys.append(os.getenv(single_var, ""))
+        return cls(keys, **kwargs)
+
+    @property
+    def keys(self) -> List[str]:
+        """All keys in the pool, in provisioning order"""
+        return [state.key for state in self.states]
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def available(self) -> List[KeyState]:
+        """Keys not currently ejected"""
+        now = self.clock()
+        return [state for state in self.states if state.ejected_until <= now]
+
+    def acquire(self) -> Optional[str]:
+        """
+        Lease a key for one request; pair every call with release().
+
+        Returns:
+            A key, or None if the pool is empty. When every key is ejected,
+            the one that comes back soonest is returned rather than failing.
+        """
+        if not self.states:
+            return None
+
+        candidates = self.available()
+        if not candidates:
+            self.exhausted += 1
+            candidates = [min(self.states, key=lambda state: state.ejected_until)]
+
+        if self.strategy == KeyStrategy.ROUND_ROBIN:
+            state = candidates[self._next % len(candidates)]
+            self._next += 1
+        else:
+            state = min(candidates, key=lambda s: (s.in_flight, s.requests))
+
+        state.in_flight += 1
+        state.requests += 1
+        return state.key
+
+    def release(
+        self,
+        key: Optional[str],
+        status: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        error: Optional[str] = None
+    ):
+        """
+        Return a leased key and report how the request went.
+
+        Args:
+            key: Key returned by acquire()
+            status: HTTP status of the response, if one was received
+            retry_after: Retry-After seconds from a 429
+            error: Error description for failed requests
+        """
+        state = self._by_key.get(key)
+        if state is None:
+            return
+
+        state.in_flight = max(0, state.in_flight - 1)
+
+        if status in (401, 403):
+            state.rejected += 1
+            self._eject(state, self.rejection_ejection)
+        elif status == 429:
+            state.rate_limited += 1
+            self._eject(state, retry_after if retry_after is not None else self.rate_limit_ejection)
+
+        if error is not None:
+            state.errors += 1
+            state.last_error = error[:200]
+
+    def get_stats(self) -> Dict:
+        """Get per-key load and health"""
+        now = self.clock()
+        return {
+            "strategy": self.strategy.value,
+            "keys": len(self.states),
+            "available": len(self.available()),
+            "ejections": self.ejections,
+            "exhausted": self.exhausted,
+            "per_key": {
+                key_fingerprint(state.key): {
+                    "in_flight": state.in_flight,
+                    "requests": state.requests,
+                    "errors": state.errors,
+                    "rate_limited": state.rate_limited,
+                    "rejected": state.rejected,
+                    "ejected_for": round(max(0.0, state.ejected_until - now), 2),
+                    "last_error": state.last_error
+                }
+                for state in self.states
+            }
+        }
+
+    def _eject(self, state: KeyState, seconds: float):
+        """Keep a key out of rotation for the given number of seconds"""
+        state.ejected_until = max(state.ejected_until, self.clock() + seconds)
+        self.ejections += 1
@@ -0,0 +1,234 @@
+"""
+Model Selector - Observed-performance model choice
+
+This module keeps running per-model statistics from the cost ledger and from
+quality-check outcomes (EWMA latency, p95 latency, acceptance rate and cost
+per accepted story) and picks, for each task complexity, the model with the
+lowest expected cost that meets the latency SLO.
+"""
+
+import json
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Deque, Dict, Optional
+
+from .circuit_breaker import percentile
+
+if TYPE_CHECKING:
+    from .cost_optimizer import CostEntry, CostOptimizer, TaskComplexity
+
+
+@dataclass
+class ModelPerformance:
+    """Running statistics for one model"""
+    model: str
+    requests: int = 0
+    failures: int = 0
+    total_cost: float = 0.0
+    ewma_latency: Optional[float] = None
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
+    accepted: Dict[str, int] = field(default_factory=dict)   # By complexity
+    rejected: Dict[str, int] = field(default_factory=dict)
+
+    def p95_latency(self) -> float:
+        return percentile(list(self.latencies), 0.95)
+
+    def mean_cost(self) -> float:
+        return self.total_cost / max(self.requests, 1)
+
+    def checks(self, complexity: str) -> int:
+        return self.accepted.get(complexity, 0) + self.rejected.get(complexity, 0)
+
+    def acceptance_rate(self, complexity: str) -> float:
+        """Share of stories passing the quality check; success rate until any are checked"""
+        checks = self.checks(complexity)
+        if checks:
+            return self.accepted.get(complexity, 0) / checks
+        return (self.requests - self.failures) / max(self.requests, 1)
+
+
+class ModelSelector:
+    """Choose the cheapest model per accepted story that meets a latency SLO"""
+
+    def __init__(
+        self,
+        cost_optimizer: "CostOptimizer",
+        latency_slo: float = 25.0,
+        smoothing: float = 0.2,
+        min_samples: int = 10,
+        window: int = 200
+    ):
+        """
+        Args:
+            cost_optimizer: Supplies the candidate models and the static fallback choice
+            latency_slo: Highest acceptable p95 latency in seconds
+            smoothing: EWMA weight given to each new latency
+            min_samples: Requests with a latency needed before a model's numbers are trusted
+            window: Latencies kept per model for the p95
+        """
+        self.cost_optimizer = cost_optimizer
+        self.latency_slo = latency_slo
+        self.smoothing = smoothing
+        self.min_samples = min_samples
+        self.window = window
+        self.models: Dict[str, ModelPerformance] = {}
+
+        # Selection statistics
+        self.observed_choices = 0
+        self.static_choices = 0
+
+    def record_entry(self, entry: "CostEntry"):
+        """Update a model's statistics from a ledger entry"""
+        stats = self._stats(entry.model)
+        stats.requests += 1
+        stats.total_cost += entry.cost
+        if not entry.success:
+            stats.failures += 1
+
+        latency = getattr(entry, "latency", None)
+        if latency is not None:
+            stats.latencies.append(latency)
+            if stats.ewma_latency is None:
+                stats.ewma_latency = latency
+            else:
+                stats.ewma_latency = (1 - self.smoothing) * stats.ewma_latency + self.smoothing * latency
+
+    def adjust_cost(self, model: str, delta: float):
+        """Apply a billed-cost correction to a model's spend"""
+        if model in self.models:
+            self.models[model].total_cost += delta
+
+    def record_quality(self, model: str, complexity: "TaskComplexity", accepted: bool):
+        """Record whether a model's story passed the quality check"""
+        stats = self._stats(model)
+        counts = stats.accepted if accepted else stats.rejected
+        counts[complexity.value] = counts.get(complexity.value, 0) + 1
+
+    def expected_cost(self, model: str, complexity: "TaskComplexity") -> float:
+        """Expected spend per accepted story, counting rejected attempts"""
+        stats = self.models.get(model)
+        if stats is None:
+            return float("inf")
+        acceptance = stats.acceptance_rate(complexity.value)
+        if acceptance <= 0:
+            return float("inf")
+        return stats.mean_cost() / acceptance
+
+    def choose(self, complexity: "TaskComplexity") -> Optional[str]:
+        """
+        Model for a task, or None when there is not enough data to beat the
+        static choice (callers fall back to it)
+        """
+        return self.explain(complexity)["observed_choice"]
+
+    def explain(self, complexity: "TaskComplexity") -> Dict:
+        """Per-model evaluation behind a choice"""
+        candidates = []
+        evaluations = {}
+
+        for model in self.cost_optimizer.model_costs:
+            stats = self.models.get(model)
+            evaluation = self._evaluate(model, stats, complexity)
+            evaluations[model] = evaluation
+            if evaluation["eligible"]:
+                candidates.append((self.expected_cost(model, complexity), model))
+
+        observed_choice = min(candidates)[1] if candidates else None
+        return {
+            "complexity": complexity.value,
+            "latency_slo": self.latency_slo,
+            "observed_choice": observed_choice,
+            "models": evaluations
+        }
+
+    def dry_run_report(self) -> Dict:
+        """What would be picked for every complexity, and why, without changing anything"""
+        from .cost_optimizer import TaskComplexity
+
+        report = {}
+        for complexity in TaskComplexity:
+            explanation = self.explain(complexity)
+            static_choice = self.cost_optimizer.static_model_choice(complexity)
+
+            if static_choice is None:
+                explanation.update(choice=None, source="budget", reason="daily budget exhausted")
+            elif explanation["observed_choice"] is not None:
+                chosen = explanation["models"][explanation["observed_choice"]]
+                explanation.update(
+                    choice=explanation["observed_choice"],
+                    source="observed",
+                    reason=(
+                        f"lowest expected cost per accepted story "
+                        f"(${chosen['expected_cost_per_accepted']:.6f}) within the {self.latency_slo:.0f}s p95 SLO"
+                    )
+                )
+            else:
+                explanation.update(
+                    choice=static_choice,
+                    source="static",
+                    reason="no model has enough observations within the SLO"
+                )
+
+            explanation["static_choice"] = static_choice
+            report[complexity.value] = explanation
+
+        return report
+
+    def get_stats(self) -> Dict:
+        """Get per-model statistics and how choices were made"""
+        return {
+            "latency_slo": self.latency_slo,
+            "observed_choices": self.observed_choices,
+            "static_choices": self.static_choices,
+            "models": {
+                model: {
+                    "requests": stats.requests,
+                    "failures": stats.failures,
+                    "ewma_latency": round(stats.ewma_latency, 3) if stats.ewma_latency is not None else None,
+                    "p95_latency": round(stats.p95_latency(), 3),
+                    "mean_cost": round(stats.mean_cost(), 6),
+                    "accepted": dict(stats.accepted),
+                    "rejected": dict(stats.rejected)
+                }
+                for model, stats in self.models.items()
+            }
+        }
+
+    def _evaluate(self, model: str, stats: Optional[ModelPerformance], complexity: "TaskComplexity") -> Dict:
+        if stats is None or len(stats.latencies) < self.min_samples:
+            return {
+                "eligible": False,
+                "reason": f"{len(stats.latencies) if stats else 0}/{self.min_samples} latency samples"
+            }
+
+        p95 = stats.p95_latency()
+        expected = self.expected_cost(model, complexity)
+        evaluation = {
+            "ewma_latency": round(stats.ewma_latency, 3),
+            "p95_latency": round(p95, 3),
+            "acceptance_rate": round(stats.acceptance_rate(complexity.value), 4),
+            "quality_checks": stats.checks(complexity.value),
+            "expected_cost_per_accepted": round(expected, 6) if expected != float("inf") else None
+        }
+
+        if p95 > self.latency_slo:
+            evaluation.update(eligible=False, reason=f"p95 {p95:.1f}s exceeds the SLO")
+        elif expected == float("inf"):
+            evaluation.update(eligible=False, reason="no accepted stories")
+        else:
+            evaluation.update(eligible=True, reason="within SLO")
+
+        return evaluation
+
+    def _stats(self, model: str) -> ModelPerformance:
+        if model not in self.models:
+            self.models[model] = ModelPerformance(model, latencies=deque(maxlen=self.window))
+        return self.models[model]
+
+
+# Usage example
+if __name__ == "__main__":
+    from .cost_optimizer import CostOptimizer
+
+    optimizer = CostOptimizer()
+    print(json.dumps(optimizer.model_selector.dry_run_report(), indent=2))
@@ -0,0 +1,354 @@
+"""
+Ollama Client - Local model provider
+
+This module serves story generation from a local Ollama server with the same
+interface as OpenRouterClient.generate_story, streaming /api/chat, keeping the
+model resident between requests and capping concurrency at what the local
+server can actually run in parallel.
+"""
+
+import time
+import asyncio
+import aiohttp
+import json
+from typing import AsyncIterator, Dict, List, Optional
+
+from .json_repair import StoryJSONRepairer
+from .story_stream import StoryStreamParser
+from .token_budget import TokenBudgeter
+from .deadline import Deadline, call_timeout
+from .openrouter_client import build_story_prompt, count_story_words, create_fallback_story
+from ..ai_config import AI_MODELS, OLLAMA_CONFIG
+
+
+class OllamaClient:
+    """Local Ollama client with the OpenRouterClient story interface"""
+
+    STORY_TARGET_WORDS = 1000
+    STORY_MAX_CHAPTERS = 5
+    STORY_TEMPERATURE = 0.7
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        keep_alive: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[int] = None
+    ):
+        """
+        Args:
+            base_url: Ollama server URL (OLLAMA_BASE_URL)
+            model: Local model tag, e.g. llama3.1:8b
+            keep_alive: How long Ollama keeps the model loaded after a request (OLLAMA_KEEP_ALIVE)
+            max_concurrency: Requests sent at once; match the server's OLLAMA_NUM_PARALLEL
+            timeout: Seconds allowed per request, including a cold model load
+        """
+        config = AI_MODELS["ollama/llama3.1"]
+        self.base_url = (base_url or OLLAMA_CONFIG["base_url"]).rstrip("/")
+        self.model = model or config["model"]
+        self.keep_alive = keep_alive or OLLAMA_CONFIG["keep_alive"]
+        self.max_concurrency = max_concurrency or OLLAMA_CONFIG["max_concurrency"]
+        self.timeout = timeout or OLLAMA_CONFIG["timeout"]
+
+        # Created on first use: a semaphore binds to the loop it is made on
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.json_repairer = StoryJSONRepairer()
+        self.token_budget = TokenBudgeter(max_tokens=config["max_tokens"])
+
+        # Request tracking
+        self.total_requests = 0
+        self.failed_requests = 0
+        self.queued_requests = 0
+        self.in_flight = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cold_loads = 0
+        self.load_time = 0.0
+
+    def _request_slots(self) -> asyncio.Semaphore:
+        """Concurrency slots for the running loop (clients may outlive a loop)"""
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._slots_loop = loop
+        return self._slots
+
+    @property
+    def model_name(self) -> str:
+        return f"ollama/{self.model}"
+
+    async def generate_story(
+        self,
+        premise: str,
+        mood: str = "neutral",
+        characters: str = "3 characters",
+        max_retries: int = 2,
+        deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """
+        Generate a complete story on the local model.
+
+        Args:
+            premise: Story premise/setting
+            mood: Story mood/tone
+            characters: Character description
+            max_retries: Number of retry attempts
+            deadline: Request deadline; no retry is started once it has passed
+
+        Returns:
+            Generated story structure, same shape as OpenRouterClient.generate_story
+        """
+        prompt = build_story_prompt(premise, mood, characters)
+        errors = []
+
+        for attempt in range(max_retries + 1):
+            if deadline is not None and deadline.expired():
+                errors.append("Deadline exceeded")
+                break
+
+            content = []
+            usage = {}
+
+            try:
+                async for chunk in self._stream_chat(
+                    [{"role": "user", "content": prompt}], self._story_max_tokens(), deadline=deadline
+                ):
+                    if chunk.get("usage"):
+                        usage = chunk["usage"]
+                    content.append(chunk.get("content", ""))
+
+                return self._build_story("".join(content), prompt, premise, mood, usage)
+
+            except Exception as e:
+                print(f"Ollama generation attempt {attempt + 1} failed: {e}")
+                self.failed_requests += 1
+                errors.append(str(e))
+
+        return {
+            "error": "Local model failed",
+            "errors": errors,
+            "fallback_available": True
+        }
+
+    async def generate_story_stream(
+        self,
+        premise: str,
+        mood: str = "neutral",
+        characters: str = "3 characters",
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Generate a story as a stream of title, chapter, complete and error
+        events, like OpenRouterClient.generate_story_stream.
+        """
+        prompt = build_story_prompt(premise, mood, characters)
+        parser = StoryStreamParser()
+        content = []
+        usage = {}
+        emitted = 0
+        title_sent = False
+        start_time = time.time()
+
+        try:
+            async for chunk in self._stream_chat(
+                [{"role": "user", "content": prompt}], self._story_max_tokens(), deadline=deadline
+            ):
+                if chunk.get("usage"):
+                    usage = chunk["usage"]
+
+                text = chunk.get("content", "")
+                content.append(text)
+
+                for chapter in parser.feed(text):
+                    emitted += 1
+                    yield {
+                        "type": "chapter",
+                        "chapter": chapter,
+                        "index": emitted - 1,
+                        "elapsed": time.time() - start_time
+                    }
+
+                if not title_sent and parser.title is not None:
+                    title_sent = True
+                    yield {"type": "title", "title": parser.title}
+
+            story_data = self._build_story("".join(content), prompt, premise, mood, usage)
+            story_data["streamed"] = True
+            yield {"type": "complete", "story": story_data}
+
+        except Exception as e:
+            print(f"Ollama streaming failed: {e}")
+            self.failed_requests += 1
+            yield {
+                "type": "error",
+                "error": "Streaming story generation failed",
+                "errors": [str(e)],
+                "fallback_available": emitted == 0
+            }
+
+    async def preload(self) -> bool:
+        """Load the model into memory now so the first story skips the cold start"""
+        return await self._set_residency(self.keep_alive)
+
+    async def unload(self) -> bool:
+        """Release the model's memory on the Ollama server"""
+        return await self._set_residency(0)
+
+    async def is_available(self) -> bool:
+        """Whether the Ollama server is reachable and has the model pulled"""
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+                async with session.get(f"{self.base_url}/api/tags") as response:
+                    if response.status != 200:
+                        return False
+                    data = await response.json()
+        except Exception:
+            return False
+
+        return any(model.get("name") == self.model for model in data.get("models", []))
+
+    def get_stats(self) -> Dict:
+        """Get usage statistics"""
+        return {
+            "provider": "ollama",
+            "model": self.model,
+            "base_url": self.base_url,
+            "total_requests": self.total_requests,
+            "failed_requests": self.failed_requests,
+            "success_rate": (self.total_requests - self.failed_requests) / max(self.total_requests, 1),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued_requests": self.queued_requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cold_loads": self.cold_loads,
+            "load_time": round(self.load_time, 3),
+            "total_cost": 0.0,
+            "json_repair": self.json_repairer.get_stats(),
+            "token_budget": self.token_budget.get_stats()
+        }
+
+    async def _stream_chat(
+        self,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float = STORY_TEMPERATURE,
+        json_format: bool = True,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream /api/chat, yielding content chunks and a final usage chunk.
+
+        Requests beyond max_concurrency wait here instead of piling onto the
+        server, where they would queue anyway and count against its timeout.
+        The request timeout is whatever the deadline leaves after that wait.
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            "options": {"temperature": temperature, "num_predict": max_tokens}
+        }
+        if json_format:
+            payload["format"] = "json"
+
+        slots = self._request_slots()
+        if slots.locked():
+            self.queued_requests += 1
+
+        async with slots:
+            self.in_flight += 1
+            self.total_requests += 1
+
+            try:
+                timeout = call_timeout(deadline, self.timeout)
+                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+                    async with session.post(f"{self.base_url}/api/chat", json=payload) as response:
+                        if response.status != 200:
+                            error_text = await response.text()
+                            raise Exception(f"Ollama request failed: {response.status} - {error_text}")
+
+                        async for raw_line in response.content:
+                            chunk = self._parse_ndjson_line(raw_line.decode("utf-8", errors="replace"))
+                            if chunk is not None:
+                                yield chunk
+            finally:
+                self.in_flight -= 1
+
+    def _parse_ndjson_line(self, line: str) -> Optional[Dict]:
+        """Parse one /api/chat stream line into a content/usage chunk"""
+        line = line.strip()
+        if not line:
+            return None
+
+        data = json.loads(line)
+        if data.get("error"):
+            raise Exception(f"Ollama error: {data['error']}")
+
+        if not data.get("done"):
+            return {"content": data.get("message", {}).get("content", "")}
+
+        # Durations are reported in nanoseconds
+        load_seconds = data.get("load_duration", 0) / 1e9
+        if load_seconds > 1.0:
+            self.cold_loads += 1
+        self.load_time += load_seconds
+
+        usage = {
+            "prompt_tokens": data.get("prompt_eval_count", 0),
+            "completion_tokens": data.get("eval_count", 0),
+            "cost": 0.0
+        }
+        self.prompt_tokens += usage["prompt_tokens"]
+        self.completion_tokens += usage["completion_tokens"]
+
+        return {"content": data.get("message", {}).get("content", ""), "usage": usage}
+
+    def _build_story(self, content: str, prompt: str, premise: str, mood: str, usage: Dict) -> Dict:
+        """Parse streamed content into a story with the usual metadata"""
+        story_data, repairs = self.json_repairer.parse(content)
+
+        if story_data is None:
+            story_data = create_fallback_story(content, premise, mood)
+        elif repairs:
+            story_data["json_repairs"] = repairs
+
+        story_data.update({
+            "premise": premise,
+            "mood": mood,
+            "generated_at": time.time(),
+            "word_count": count_story_words(story_data),
+            "model_used": self.model_name,
+            "generation_cost": 0.0,
+            "provider": "ollama",
+            "model_response": {"model": self.model_name, "usage": usage}
+        })
+
+        if not story_data.get("fallback_generated") and "truncated" not in story_data.get("json_repairs", []):
+            self.token_budget.record_usage(
+                self.model,
+                usage,
+                story_data["word_count"],
+                chapters=len(story_data.get("chapters", [])),
+                prompt=prompt
+            )
+
+        return story_data
+
+    def _story_max_tokens(self) -> int:
+        return self.token_budget.max_tokens_for(self.model, self.STORY_TARGET_WORDS, self.STORY_MAX_CHAPTERS)
+
+    async def _set_residency(self, keep_alive) -> bool:
+        """An empty chat request loads (or with keep_alive=0 unloads) the model"""
+        payload = {"model": self.model, "messages": [], "keep_alive": keep_alive}
+
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+                async with session.post(f"{self.base_url}/api/chat", json=payload) as response:
+                    return response.status == 200
+        except Exception as e:
+            print(f"Ollama keep-alive request failed: {e}")
+            return False
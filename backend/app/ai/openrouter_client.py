@@ -9,207 +9,1600 @@ import os
 import time
 import asyncio
 import aiohttp
+import httpx
 import json
-from typing import Dict, List, Optional, Union
-from dataclasses import dataclass
+import copy
+import uuid
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Union
+from dataclasses import dataclass, field
 from enum import Enum
 
+from .story_stream import StoryStreamParser
+from .story_cache import StoryCache, make_cache_key
+from .single_flight import SingleFlight
+from .circuit_breaker import CircuitBreaker
+from .deadline import Deadline, DeadlineExceeded, call_timeout
+from .json_repair import StoryJSONRepairer
+from .token_budget import TokenBudgeter
+from .key_pool import KeyPool, KeyRejectedError
+from .rate_limiter import (
+    RateLimiter,
+    RateLimitedError,
+    parse_rate_limit_headers,
+    parse_retry_after,
+    rate_limiter as shared_rate_limiter
+)
+
+if TYPE_CHECKING:
+    from .similarity_cache import SimilarityCache
+
 
 class OpenRouterModel(Enum):
     """Available OpenRouter models"""
     GEMINI_FLASH = "google/gemini-flash-1.5"
     CLAUDE_HAIKU = "anthropic/claude-3-haiku"
     CLAUDE_SONNET = "anthropic/claude-3-sonnet"
+    LLAMA_3_1_8B = "meta-llama/llama-3.1-8b-instruct"
+
+
+class OpenRouterTransport(Enum):
+    """HTTP stack used for OpenRouter calls"""
+    AIOHTTP = "aiohttp"    # HTTP/1.1, a session per request outside batches
+    HTTP2 = "http2"        # One long-lived multiplexed httpx connection
+
+
+MODEL_NAMES = {
+    OpenRouterModel.GEMINI_FLASH: "gemini-flash",
+    OpenRouterModel.CLAUDE_HAIKU: "claude-haiku",
+    OpenRouterModel.CLAUDE_SONNET: "claude-sonnet",
+    OpenRouterModel.LLAMA_3_1_8B: "llama-3.1-8b"
+}
+
+MODEL_LABELS = {
+    OpenRouterModel.GEMINI_FLASH: "Primary model (Gemini Flash)",
+    OpenRouterModel.CLAUDE_HAIKU: "Fallback model (Claude Haiku)",
+    OpenRouterModel.CLAUDE_SONNET: "Claude Sonnet",
+    OpenRouterModel.LLAMA_3_1_8B: "Llama 3.1 8B"
+}
+
+# Models that honour OpenRouter's json_schema response_format
+STRUCTURED_OUTPUT_MODELS = frozenset({OpenRouterModel.GEMINI_FLASH})
+
+STORY_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "interactive_story",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "title": {"type": "string"},
+                "chapters": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "integer"},
+                            "text": {"type": "string"},
+                            "choices": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "id": {"type": "string"},
+                                        "text": {"type": "string"},
+                                        "leads_to": {"type": "integer"}
+                                    },
+                                    "required": ["id", "text", "leads_to"],
+                                    "additionalProperties": False
+                                }
+                            }
+                        },
+                        "required": ["id", "text", "choices"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["title", "chapters"],
+            "additionalProperties": False
+        }
+    }
+}
+
+
+def build_story_prompt(premise: str, mood: str, characters: str) -> str:
+    """Build optimized prompt for story generation"""
+    
+    return f"""You are a master storyteller creating an immersive, interactive story.
+
+REQUIREMENTS:
+- Create a branching narrative with exactly 3-5 choice points
+- Total length: 500-1000 words across all chapters
+- Tone: {mood}
+- Characters: {characters}
+- Setting/Premise: {premise}
+
+STRUCTURE:
+Chapter 1: [200-300 words] - Setup and first choice
+Chapter 2-4: [100-200 words each] - Based on choices
+Each chapter ends with 2-3 meaningful choices
+
+QUALITY STANDARDS:
+- Write like a human author, not an AI
+- Create genuine emotional engagement
+- Avoid clichés and generic responses
+- Make choices meaningful and impactful
+- Ensure narrative consistency
+
+Generate the story in this JSON format:
+{{
+    "title": "Story Title",
+    "chapters": [
+        {{
+            "id": 1,
+            "text": "Chapter content...",
+            "choices": [
+                {{"id": "a", "text": "Choice 1", "leads_to": 2}},
+                {{"id": "b", "text": "Choice 2", "leads_to": 3}}
+            ]
+        }}
+    ]
+}}"""
+
+
+def create_fallback_story(content: str, premise: str, mood: str) -> Dict:
+    """Create fallback story structure from raw text"""
+    
+    # Split content into chapters if possible
+    paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
+    
+    chapters = []
+    for i, paragraph in enumerate(paragraphs[:3]):  # Max 3 chapters
+        chapter = {
+            "id": i + 1,
+            "text": paragraph,
+            "choices": [
+                {"id": "a", "text": "Continue the story", "leads_to": i + 2},
+                {"id": "b", "text": "Take a different path", "leads_to": i + 2}
+            ]
+        }
+        chapters.append(chapter)
+    
+    return {
+        "title": f"A {mood} story",
+        "chapters": chapters,
+        "premise": premise,
+        "mood": mood,
+        "fallback_generated": True
+    }
+
+
+def count_story_words(story_data: Dict) -> int:
+    """Count total words in story"""
+    total_words = 0
+    for chapter in story_data.get("chapters", []):
+        total_words += len(chapter.get("text", "").split())
+    return total_words
+
+
+@dataclass
+class ModelCosts:
+    """Cost per 1M tokens for input/output"""
+    input: float
+    output: float
+
+
+@dataclass
+class HedgingPolicy:
+    """When to fire the fallback model alongside a slow primary"""
+    enabled: bool = True
+    initial_delay: float = 8.0   # Used until enough latency samples exist
+    percentile: float = 0.95     # Primary latency percentile to hedge at
+    min_delay: float = 2.0
+    max_delay: float = 20.0
+    min_samples: int = 20
+    window_size: int = 200
+
+
+@dataclass
+class BatchScope:
+    """HTTP session and per-model caps shared by the requests of one batch"""
+    client: "OpenRouterClient"
+    session: Optional[aiohttp.ClientSession] = None
+    model_limits: Dict[str, asyncio.Semaphore] = field(default_factory=dict)
+
+
+# Set inside each batch task only, so concurrent batches and unrelated calls
+# never see another batch's session or caps
+_batch_scope: ContextVar[Optional[BatchScope]] = ContextVar("openrouter_batch_scope", default=None)
+
+
+class FallbackExhaustedError(Exception):
+    """Raised when both the primary and fallback models failed"""
+    
+    def __init__(self, primary_error: str, fallback_error: str):
+        super().__init__(f"Primary: {primary_error}; fallback: {fallback_error}")
+        self.primary_error = primary_error
+        self.fallback_error = fallback_error
+
+
+class OpenRouterClient:
+    """OpenRouter API client with fallback support"""
+    
+    # Bump whenever story prompts change so cached stories are not reused
+    PROMPT_VERSION = "story-v2"
+    STORY_TEMPERATURE = 0.7
+    
+    # Upper ends of the length the story prompt asks for; sizes max_tokens
+    STORY_TARGET_WORDS = 1000
+    STORY_MAX_CHAPTERS = 5
+    
+    # Continuation context limits: keeps per-chapter prompts constant-size
+    CONTINUATION_TARGET_WORDS = 250
+    CONTINUATION_VERBATIM_CHAPTERS = 2
+    SUMMARY_MAX_WORDS = 150
+    MAX_STORY_FACTS = 12
+    MAX_TRACKED_SUMMARIES = 1000
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        cache: Optional[StoryCache] = None,
+        similarity_cache: Optional["SimilarityCache"] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_rate_limit_retries: int = 3,
+        structured_output: bool = True,
+        key_pool: Optional[KeyPool] = None,
+        transport: Optional[Union[OpenRouterTransport, str]] = None,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
+        self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
+        
+        # Every provisioned key shares the load (OPENROUTER_API_KEYS=k1,k2,...)
+        if key_pool is not None:
+            self.key_pool = key_pool
+        elif api_key:
+            self.key_pool = KeyPool([api_key])
+        else:
+            self.key_pool = KeyPool.from_env("OPENROUTER_API_KEY", "OPENROUTER_API_KEYS")
+        if not self.api_key and len(self.key_pool):
+            self.api_key = self.key_pool.keys[0]
+        self.base_url = "https://openrouter.ai/api/v1"
+        self.site_url = "https://party-storyteller.app"
+        self.app_name = "AI Storytelling Engine"
+        
+        # Model cost tracking (per 1M tokens)
+        self.costs = {
+            OpenRouterModel.GEMINI_FLASH: ModelCosts(input=0.075, output=0.30),
+            OpenRouterModel.CLAUDE_HAIKU: ModelCosts(input=0.25, output=1.25),
+            OpenRouterModel.CLAUDE_SONNET: ModelCosts(input=3.0, output=15.0),
+            OpenRouterModel.LLAMA_3_1_8B: ModelCosts(input=0.05, output=0.05)
+        }
+        
+        # Request tracking
+        self.total_requests = 0
+        self.total_cost = 0.0
+        self.failed_requests = 0
+        
+        # Hedged fallback tracking
+        self.hedging = hedging or HedgingPolicy()
+        self.primary_latencies = deque(maxlen=self.hedging.window_size)
+        self.story_requests = 0
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self.hedge_wasted_cost = 0.0
+        
+        # Optional completion caches: exact match, then near-duplicate premise
+        self.cache = cache
+        self.similarity_cache = similarity_cache
+        
+        # Coalesces identical concurrent story requests
+        self.single_flight = SingleFlight()
+        
+        # Batches share a session and per-model caps through their BatchScope
+        self.last_batch_report: Optional[Dict] = None
+        
+        # Optional HTTP/2 transport (OPENROUTER_TRANSPORT=http2): every call
+        # is multiplexed over one long-lived connection
+        self.transport = OpenRouterTransport(
+            transport or (OpenRouterTransport.HTTP2 if http_client is not None else os.getenv("OPENROUTER_TRANSPORT", "aiohttp"))
+        )
+        self._http_client = http_client
+        
+        # Per-model circuit breakers; open breakers are skipped, not waited on
+        self.breakers = {model: CircuitBreaker(model.value) for model in OpenRouterModel}
+        self.breaker_skips = 0
+        
+        # Process-wide token buckets; 429s queue and retry instead of failing
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.max_rate_limit_retries = max_rate_limit_retries
+        
+        # Schema-constrained output where supported, repair parsing everywhere
+        self.structured_output = structured_output
+        self.json_repairer = StoryJSONRepairer()
+        
+        # max_tokens sized from target length and observed tokens per word
+        self.token_budget = TokenBudgeter()
+        
+        # Continuation: background rolling-summary refreshes keyed by story id
+        self._pending_summaries: Dict[str, asyncio.Future] = {}
+        self._story_summaries: "OrderedDict[str, Dict]" = OrderedDict()
+        self.continuations = 0
+        self.continuation_prompt_tokens = 0
+        self.summary_refreshes = 0
+        self.summary_failures = 0
+        
+    async def generate_story(
+        self,
+        premise: str,
+        mood: str = "neutral",
+        characters: str = "3 characters",
+        max_retries: int = 2,
+        deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """
+        Generate a complete story using OpenRouter API with hedged fallback.
+        
+        The primary model (Gemini Flash) is started first. If it has not
+        responded within the hedge delay, the fallback model (Claude Haiku)
+        is fired concurrently and whichever succeeds first wins.
+        
+        Args:
+            premise: Story premise/setting
+            mood: Story mood/tone
+            characters: Character description
+            max_retries: Number of retry attempts
+            deadline: Request deadline; each API call's timeout is the time left on it
+            
+        Returns:
+            Generated story structure with chapters and choices
+        """
+        request_key = make_cache_key(
+            premise, mood, characters,
+            OpenRouterModel.GEMINI_FLASH.value,
+            self.STORY_TEMPERATURE,
+            self.PROMPT_VERSION
+        )
+        
+        if self.cache is not None:
+            cached = self.cache.get(request_key)
+            if cached is not None:
+                cached["cache_hit"] = True
+                cached["generation_cost"] = 0.0
+                return cached
+        
+        if self.similarity_cache is not None:
+            match = self.similarity_cache.lookup(premise, mood, characters)
+            if match is not None:
+                similar_story, similarity, matched_premise = match
+                similar_story.update({
+                    "similar_cache_hit": True,
+                    "similarity": round(similarity, 4),
+                    "matched_premise": matched_premise,
+                    "requested_premise": premise,
+                    "generation_cost": 0.0
+                })
+                return similar_story
+        
+        restarted = False
+        while True:
+            try:
+                # Wait on a shared call only as long as this request's own deadline allows
+                story_data, shared = await self.single_flight.do(
+                    request_key,
+                    lambda: self._generate_story_uncached(request_key, premise, mood, characters, deadline),
+                    timeout=deadline.timeout() if deadline is not None else None
+                )
+                break
+            except DeadlineExceeded:
+                if restarted or (deadline is not None and deadline.expired()):
+                    raise
+                # The shared call ran out of its leader's time, not ours: run our own
+                restarted = True
+            except asyncio.TimeoutError:
+                if deadline is None:
+                    raise
+                raise DeadlineExceeded(f"Deadline exceeded ({deadline.budget:.1f}s budget)")
+        
+        # Every waiter gets its own copy; only the leader is charged the cost
+        story_data = copy.deepcopy(story_data)
+        if shared:
+            story_data["coalesced"] = True
+            story_data["generation_cost"] = 0.0
+        
+        return story_data
+
+    async def _generate_story_uncached(
+        self,
+        request_key: str,
+        premise: str,
+        mood: str,
+        characters: str,
+        deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """Generate a story over the network and populate the cache"""
+        prompt = self._build_story_prompt(premise, mood, characters)
+        
+        try:
+            story_data = await self._generate_hedged(
+                lambda model: self._generate_with_model(model, prompt, premise, mood, deadline)
+            )
+        except FallbackExhaustedError as e:
+            return {
+                "error": "Both primary and fallback models failed",
+                "primary_error": e.primary_error,
+                "fallback_error": e.fallback_error,
+                "fallback_available": True
+            }
+        
+        if not story_data.get("fallback_generated"):
+            if self.cache is not None:
+                self.cache.set(request_key, story_data)
+            if self.similarity_cache is not None:
+                self.similarity_cache.add(premise, mood, characters, story_data)
+        
+        return story_data
+
+    async def generate_story_with_model(
+        self,
+        premise: str,
+        mood: str,
+        characters: str,
+        model: OpenRouterModel,
+        deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """
+        Generate a story with one specific model, without hedging or caching.
+        
+        Used where the caller has already picked the model (quality retries,
+        cheap drafts). The model's circuit breaker is still respected.
+        """
+        prompt = self._build_story_prompt(premise, mood, characters)
+        return await self._generate_single(model, prompt, premise, mood, deadline)
+
+    async def refine_story(
+        self,
+        draft: Dict,
+        premise: str,
+        mood: str,
+        characters: str,
+        model: OpenRouterModel = OpenRouterModel.CLAUDE_HAIKU
+    ) -> Dict:
+        """
+        Rewrite a draft story with a stronger model, keeping its structure.
+        
+        Args:
+            draft: Story dict with title and chapters
+            premise: Story premise/setting
+            mood: Story mood/tone
+            characters: Character description
+            model: Model used for the rewrite
+            
+        Returns:
+            Refined story dict, or error dict on failure
+        """
+        prompt = self._build_refine_prompt(draft, premise, mood, characters)
+        return await self._generate_single(model, prompt, premise, mood)
 
+    async def _generate_single(
+        self,
+        model: OpenRouterModel,
+        prompt: str,
+        premise: str,
+        mood: str,
+        deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """Run one story prompt on one model and map failures to an error dict"""
+        if not self.breakers[model].allow_request():
+            self.breaker_skips += 1
+            return {"error": f"Circuit open for {model.value}", "model_used": MODEL_NAMES[model]}
+        
+        try:
+            return await self._attempt_with_breaker(
+                model,
+                lambda m: self._generate_with_model(m, prompt, premise, mood, deadline)
+            )
+        except DeadlineExceeded as e:
+            # Out of time, not a model failure
+            return {"error": str(e), "model_used": MODEL_NAMES[model]}
+        except Exception as e:
+            print(f"{MODEL_LABELS[model]} failed: {e}")
+            self.failed_requests += 1
+            return {"error": str(e), "model_used": MODEL_NAMES[model]}
+
+    async def generate_story_outlined(
+        self,
+        premise: str,
+        mood: str = "neutral",
+        characters: str = "3 characters",
+        max_parallel: int = 3
+    ) -> Dict:
+        """
+        Generate a story in two phases: a short outline, then all chapters in parallel.
+        
+        Wall-clock time is roughly one outline call plus one chapter call,
+        instead of one long call writing every chapter serially.
+        
+        Args:
+            premise: Story premise/setting
+            mood: Story mood/tone
+            characters: Character description
+            max_parallel: Maximum chapter requests in flight at once
+            
+        Returns:
+            Story with the same shape as generate_story
+        """
+        try:
+            outline = await self.generate_outline(premise, mood, characters)
+            
+            semaphore = asyncio.Semaphore(max_parallel)
+            
+            async def bounded_chapter(beat: Dict) -> Dict:
+                async with semaphore:
+                    return await self.generate_chapter(outline, beat["id"], premise, mood, characters)
+            
+            chapter_tasks = [asyncio.ensure_future(bounded_chapter(beat)) for beat in outline["chapters"]]
+            try:
+                chapters = await asyncio.gather(*chapter_tasks)
+            finally:
+                # One chapter failing on both models fails the story; stop the rest
+                for task in chapter_tasks:
+                    if not task.done():
+                        task.cancel()
+            
+        except FallbackExhaustedError as e:
+            return {
+                "error": "Both primary and fallback models failed",
+                "primary_error": e.primary_error,
+                "fallback_error": e.fallback_error,
+                "fallback_available": True
+            }
+        
+        story_data = {
+            "title": outline["title"],
+            "chapters": [
+                {"id": chapter["id"], "text": chapter["text"], "choices": chapter["choices"]}
+                for chapter in chapters
+            ]
+        }
+        story_data.update({
+            "premise": premise,
+            "mood": mood,
+            "generated_at": time.time(),
+            "word_count": self._count_words(story_data),
+            "model_used": outline["model_used"],
+            "generation_cost": outline["generation_cost"] + sum(c["generation_cost"] for c in chapters),
+            "generation_mode": "outline_parallel",
+            "outline": [{"id": beat["id"], "beat": beat["beat"]} for beat in outline["chapters"]]
+        })
+        
+        return story_data
+
+    async def generate_outline(self, premise: str, mood: str, characters: str) -> Dict:
+        """Generate the story outline: title, chapter beats and choice graph"""
+        prompt = self._build_outline_prompt(premise, mood, characters)
+        
+        async def attempt(model: OpenRouterModel) -> Dict:
+            response = await self._make_api_request(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=600,
+                temperature=0.7
+            )
+            outline = self._parse_outline_response(response)
+            outline["model_used"] = MODEL_NAMES[model]
+            outline["model_response"] = response
+            outline["generation_cost"] = self._calculate_request_cost(model, response.get("usage", {}))
+            return outline
+        
+        return await self._generate_hedged(attempt, track_latency=False)
+
+    async def generate_chapter(
+        self,
+        outline: Dict,
+        chapter_id: int,
+        premise: str,
+        mood: str,
+        characters: str
+    ) -> Dict:
+        """Write the body of one outlined chapter"""
+        beat = next(b for b in outline["chapters"] if b["id"] == chapter_id)
+        prompt = self._build_chapter_prompt(outline, beat, premise, mood, characters)
+        word_range = "200-300" if chapter_id == outline["chapters"][0]["id"] else "100-200"
+        target_words = int(word_range.split("-")[1])
+        
+        async def attempt(model: OpenRouterModel) -> Dict:
+            response = await self._make_api_request(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=self.token_budget.max_tokens_for(model.value, target_words, structured=False),
+                temperature=0.7
+            )
+            text = response["choices"][0]["message"]["content"].strip()
+            if not text:
+                raise ValueError(f"Empty text for chapter {chapter_id}")
+            self.token_budget.record_usage(
+                model.value,
+                response.get("usage"),
+                len(text.split()),
+                structured=False,
+                prompt=prompt
+            )
+            return {
+                "id": chapter_id,
+                "text": text,
+                "choices": beat.get("choices", []),
+                "word_range": word_range,
+                "model_used": MODEL_NAMES[model],
+                "model_response": response,
+                "generation_cost": self._calculate_request_cost(model, response.get("usage", {}))
+            }
+        
+        return await self._generate_hedged(attempt, track_latency=False)
+
+    async def continue_story(self, story_state: Dict, choice_id: str) -> Dict:
+        """
+        Generate the next chapter after the player picks a choice.
+        
+        The prompt carries a rolling summary, a character/fact sheet and only
+        the most recent chapters verbatim, so its size stays bounded however
+        deep the story goes. The summary is refreshed in the background after
+        each chapter is served.
+        
+        Args:
+            story_state: Story dict with at least premise, mood and chapters;
+                updated in place with the new chapter and summary fields
+            choice_id: Id of the choice taken at the end of the last chapter
+            
+        Returns:
+            Dict with the new chapter, the updated story state and cost data,
+            or an error dict if every model failed
+        """
+        chapters = story_state.get("chapters") or []
+        if not chapters:
+            raise ValueError("Story has no chapters to continue from")
+        
+        last_chapter = chapters[-1]
+        choice = next((c for c in last_chapter.get("choices", []) if c.get("id") == choice_id), None)
+        if choice is None:
+            raise ValueError(f"Chapter {last_chapter.get('id')} has no choice '{choice_id}'")
+        
+        story_id = story_state.setdefault("story_id", uuid.uuid4().hex)
+        story_state.setdefault("summary", "")
+        story_state.setdefault("facts", [])
+        story_state.setdefault("summarized_through", 0)
+        self._apply_summary(story_state)
+        
+        chapter_id = max(c.get("id", 0) for c in chapters) + 1
+        prompt = self._build_continuation_prompt(story_state, choice, chapter_id)
+        self.continuations += 1
+        self.continuation_prompt_tokens += self.token_budget.estimate_tokens(prompt)
+        
+        async def attempt(model: OpenRouterModel) -> Dict:
+            response = await self._make_api_request(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=self.token_budget.max_tokens_for(model.value, self.CONTINUATION_TARGET_WORDS),
+                temperature=self.STORY_TEMPERATURE
+            )
+            chapter, _ = self.json_repairer.parse(response["choices"][0]["message"]["content"])
+            if not chapter or not chapter.get("text"):
+                raise ValueError(f"Continuation response for chapter {chapter_id} had no text")
+            
+            return {
+                "id": chapter_id,
+                "text": chapter["text"],
+                "choices": chapter.get("choices") or [],
+                "model_used": MODEL_NAMES[model],
+                "generation_cost": self._calculate_request_cost(model, response.get("usage", {}))
+            }
+        
+        try:
+            chapter = await self._generate_hedged(attempt, track_latency=False)
+        except FallbackExhaustedError as e:
+            return {
+                "error": "Both primary and fallback models failed",
+                "primary_error": e.primary_error,
+                "fallback_error": e.fallback_error,
+                "fallback_available": True
+            }
+        
+        model_used = chapter.pop("model_used")
+        generation_cost = chapter.pop("generation_cost")
+        
+        chapters.append(chapter)
+        story_state.setdefault("path", []).append(choice_id)
+        
+        # Served; fold the new chapter into the summary off the request path
+        self._schedule_summary_refresh(story_id, story_state)
+        
+        return {
+            "chapter": chapter,
+            "story_state": story_state,
+            "model_used": model_used,
+            "generation_cost": generation_cost
+        }
+
+    async def wait_for_summary(self, story_id: str) -> Optional[Dict]:
+        """Wait for a story's pending summary refresh, if any"""
+        task = self._pending_summaries.get(story_id)
+        if task is not None:
+            try:
+                await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+            except Exception:
+                pass
+        return self._story_summaries.get(story_id)
+
+    def _apply_summary(self, story_state: Dict):
+        """Merge the newest finished summary for this story into its state"""
+        refreshed = self._story_summaries.get(story_state["story_id"])
+        if refreshed is not None and refreshed["summarized_through"] > story_state["summarized_through"]:
+            story_state.update(copy.deepcopy(refreshed))
+
+    def _schedule_summary_refresh(self, story_id: str, story_state: Dict):
+        """Start refreshing the rolling summary for a story in the background"""
+        previous = self._pending_summaries.get(story_id)
+        if previous is not None and not previous.done():
+            # A newer snapshot supersedes the one in flight
+            previous.cancel()
+        
+        snapshot = {
+            "summary": story_state["summary"],
+            "facts": list(story_state["facts"]),
+            "summarized_through": story_state["summarized_through"],
+            "chapters": [
+                dict(c) for c in story_state["chapters"]
+                if c.get("id", 0) > story_state["summarized_through"]
+            ]
+        }
+        task = asyncio.ensure_future(self._refresh_summary(snapshot))
+        task.add_done_callback(
+            lambda t, story_id=story_id, state=story_state: self._on_summary_done(story_id, t, state)
+        )
+        self._pending_summaries[story_id] = task
+
+    def _on_summary_done(self, story_id: str, task: asyncio.Future, story_state: Dict):
+        """Record a finished summary and apply it to the live state object"""
+        if self._pending_summaries.get(story_id) is task:
+            del self._pending_summaries[story_id]
+        
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.summary_failures += 1
+            print(f"Summary refresh failed for story {story_id}: {task.exception()}")
+            return
+        
+        # Kept for callers that round-trip the state (e.g. through an API)
+        self._story_summaries[story_id] = task.result()
+        self._story_summaries.move_to_end(story_id)
+        while len(self._story_summaries) > self.MAX_TRACKED_SUMMARIES:
+            self._story_summaries.popitem(last=False)
+        
+        self._apply_summary(story_state)
+
+    async def _refresh_summary(self, snapshot: Dict) -> Dict:
+        """Fold every chapter but the latest into the rolling summary"""
+        # The latest chapter always goes into prompts verbatim
+        pending = [c for c in snapshot["chapters"][:-1] if c.get("id", 0) > snapshot["summarized_through"]]
+        if not pending:
+            return {
+                "summary": snapshot["summary"],
+                "facts": snapshot["facts"],
+                "summarized_through": snapshot["summarized_through"]
+            }
+        
+        prompt = self._build_summary_prompt(snapshot["summary"], snapshot["facts"], pending)
+        response = await self._make_api_request(
+            model=OpenRouterModel.GEMINI_FLASH,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=self.token_budget.max_tokens_for(
+                OpenRouterModel.GEMINI_FLASH.value,
+                self.SUMMARY_MAX_WORDS + self.MAX_STORY_FACTS * 12,
+                structured=False
+            ),
+            temperature=0.2
+        )
+        self._calculate_request_cost(OpenRouterModel.GEMINI_FLASH, response.get("usage", {}))
+        
+        parsed, _ = self.json_repairer.parse(response["choices"][0]["message"]["content"])
+        if not parsed or not isinstance(parsed.get("summary"), str):
+            raise ValueError("Summary response did not contain a summary")
+        
+        self.summary_refreshes += 1
+        return {
+            "summary": " ".join(parsed["summary"].split()[:self.SUMMARY_MAX_WORDS]),
+            "facts": [str(fact) for fact in parsed.get("facts") or []][:self.MAX_STORY_FACTS],
+            "summarized_through": max(c.get("id", 0) for c in pending)
+        }
+
+    async def _generate_with_model(
+        self,
+        model: OpenRouterModel,
+        prompt: str,
+        premise: str,
+        mood: str,
+        deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """Generate and parse a story with one specific model"""
+        response = await self._make_api_request(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=self._story_max_tokens(model),
+            temperature=self.STORY_TEMPERATURE,
+            response_format=self._story_response_format(model),
+            deadline=deadline
+        )
+        
+        story_data = self._parse_story_response(response, premise, mood)
+        self._calibrate_story_budget(model, prompt, story_data, response.get("usage"))
+        story_data["model_used"] = MODEL_NAMES[model]
+        story_data["generation_cost"] = self._calculate_request_cost(
+            model,
+            response.get("usage", {})
+        )
+        
+        return story_data
+
+    async def _generate_hedged(
+        self,
+        attempt: Callable[[OpenRouterModel], Awaitable[Dict]],
+        primary: OpenRouterModel = OpenRouterModel.GEMINI_FLASH,
+        fallback: OpenRouterModel = OpenRouterModel.CLAUDE_HAIKU,
+        track_latency: bool = True
+    ) -> Dict:
+        """
+        Race the fallback model against a slow primary.
+        
+        Args:
+            attempt: Coroutine factory producing a result for one model
+            primary: Model started first
+            fallback: Model started on hedge or primary failure
+            track_latency: Feed primary latency into the hedge delay window
+            
+        Raises:
+            FallbackExhaustedError: Both models failed
+            DeadlineExceeded: The request deadline ran out; no further model is tried
+        """
+        self.story_requests += 1
+        start_time = time.time()
+        
+        tasks: Dict[asyncio.Future, OpenRouterModel] = {}
+        errors: Dict[OpenRouterModel, str] = {}
+        lost_to_hedge: Set[OpenRouterModel] = set()
+        
+        def launch(model: OpenRouterModel) -> Optional[asyncio.Future]:
+            if not self.breakers[model].allow_request():
+                # Known-bad model: don't pay its timeout
+                self.breaker_skips += 1
+                errors[model] = f"Circuit open for {model.value}"
+                return None
+            task = asyncio.ensure_future(self._attempt_with_breaker(model, attempt, lost_to_hedge))
+            tasks[task] = model
+            return task
+        
+        try:
+            primary_task = launch(primary)
+            
+            if primary_task is None:
+                launch(fallback)
+            else:
+                delay = self._hedge_delay() if self.hedging.enabled else None
+                await asyncio.wait({primary_task}, timeout=delay)
+                
+                if not primary_task.done() and launch(fallback) is not None:
+                    # Primary is slower than its p95: hedge with the fallback model
+                    self.hedged_requests += 1
+            
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in done:
+                    model = tasks[task]
+                    error = task.exception()
+                    
+                    if error is None:
+                        if model == primary:
+                            if track_latency:
+                                self.primary_latencies.append(time.time() - start_time)
+                        elif primary_task in pending:
+                            # Censored sample: the primary took at least this long
+                            if track_latency:
+                                self.primary_latencies.append(time.time() - start_time)
+                            self.hedge_wins += 1
+                        
+                        story_data = task.result()
+                        for loser in pending:
+                            self._record_wasted_hedge(tasks[loser], story_data)
+                            lost_to_hedge.add(tasks[loser])
+                        return story_data
+                    
+                    if isinstance(error, DeadlineExceeded):
+                        # Out of time, not a model failure; the fallback would run out too
+                        raise error
+                    
+                    print(f"{MODEL_LABELS[model]} failed: {error}")
+                    self.failed_requests += 1
+                    errors[model] = str(error)
+                    
+                    if model == primary:
+                        if track_latency:
+                            self.primary_latencies.append(time.time() - start_time)
+                        if fallback not in tasks.values() and fallback not in errors:
+                            # Primary failed before the hedge fired: start fallback now
+                            fallback_task = launch(fallback)
+                            if fallback_task is not None:
+                                pending.add(fallback_task)
+            
+            raise FallbackExhaustedError(errors.get(primary, ""), errors.get(fallback, ""))
+            
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _attempt_with_breaker(
+        self,
+        model: OpenRouterModel,
+        attempt: Callable[[OpenRouterModel], Awaitable[Dict]],
+        lost_to_hedge: Optional[Set[OpenRouterModel]] = None
+    ) -> Dict:
+        """
+        Run one model attempt and feed its outcome to the model's breaker.
+        
+        Args:
+            model: Model to run
+            attempt: Coroutine factory producing a result for one model
+            lost_to_hedge: Models whose attempts were cancelled because another
+                model answered first
+        """
+        breaker = self.breakers[model]
+        start_time = time.time()
+        
+        try:
+            result = await attempt(model)
+        except (asyncio.CancelledError, DeadlineExceeded):
+            if lost_to_hedge is not None and model in lost_to_hedge:
+                # Slower than the hedge that beat it: keep the latency it reached
+                breaker.record_abandoned(time.time() - start_time)
+            else:
+                # Cut short by the caller, not a model failure
+                breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure(time.time() - start_time)
+            raise
+        
+        breaker.record_success(time.time() - start_time)
+        return result
+
+    def _hedge_delay(self) -> float:
+        """Hedge delay derived from observed primary latency percentile"""
+        policy = self.hedging
+        
+        if len(self.primary_latencies) < policy.min_samples:
+            return policy.initial_delay
+        
+        samples = sorted(self.primary_latencies)
+        index = min(len(samples) - 1, int(len(samples) * policy.percentile))
+        return min(policy.max_delay, max(policy.min_delay, samples[index]))
+
+    def _record_wasted_hedge(self, model: OpenRouterModel, winner: Dict):
+        """Estimate spend on a cancelled hedge using the winner's token usage"""
+        usage = winner.get("model_response", {}).get("usage", {})
+        if not usage:
+            return
+        
+        costs = self.costs[model]
+        self.hedge_wasted_cost += (
+            usage.get("prompt_tokens", 0) * costs.input +
+            usage.get("completion_tokens", 0) * costs.output
+        ) / 1_000_000
+
+    async def _make_api_request(
+        self,
+        model: OpenRouterModel,
+        messages: List[Dict],
+        max_tokens: int = 2000,
+        temperature: float = 0.7,
+        timeout: int = 45,
+        response_format: Optional[Dict] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """Make API request to OpenRouter with timeout (capped by the deadline, if any)"""
+        
+        if not self.api_key:
+            raise ValueError("OpenRouter API key not provided")
+        
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "HTTP-Referer": self.site_url,
+            "X-Title": self.app_name,
+            "Content-Type": "application/json"
+        }
+        
+        payload = {
+            "model": model.value,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": False
+        }
+        if response_format is not None:
+            payload["response_format"] = response_format
+        
+        start_time = time.time()
+        
+        scope = self._current_batch()
+        model_limit = scope.model_limits.get(model.value) if scope is not None else None
+        if model_limit is not None:
+            async with model_limit:
+                result = await self._post_rate_limited(model, headers, payload, timeout, deadline)
+        else:
+            result = await self._post_rate_limited(model, headers, payload, timeout, deadline)
+        
+        # Track request
+        self.total_requests += 1
+        request_time = time.time() - start_time
+        
+        # Add timing info
+        result["request_time"] = request_time
+        result["model"] = model.value
+        
+        return result
+
+    async def _post_rate_limited(
+        self,
+        model: OpenRouterModel,
+        headers: Dict,
+        payload: Dict,
+        timeout: int,
+        deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """
+        Send a completion through a pooled key's token bucket.
+        
+        429s and rejected keys are retried on the next available key (or
+        after backoff when the pool has only one). With a deadline, the
+        bucket wait and every attempt fit in the time left: each attempt's
+        timeout is taken from what remains after its wait, and
+        DeadlineExceeded is raised rather than waiting or retrying past it.
+        """
+        
+        for attempt in range(self.max_rate_limit_retries + 1):
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded("Deadline exceeded before the request could be sent")
+            
+            api_key = self.key_pool.acquire() or self.api_key
+            key_headers = dict(headers, Authorization=f"Bearer {api_key}")
+            
+            try:
+                await self.rate_limiter.acquire(
+                    api_key, model.value, max_wait=deadline.remaining() if deadline is not None else None
+                )
+                result = await self._post_completion(key_headers, payload, call_timeout(deadline, timeout))
+            except RateLimitedError as e:
+                self.key_pool.release(api_key, status=429, retry_after=e.retry_after, error=str(e))
+                self.rate_limiter.record_rate_limited(api_key, model.value, e.retry_after)
+                if attempt == self.max_rate_limit_retries:
+                    raise
+                continue
+            except KeyRejectedError as e:
+                self.key_pool.release(api_key, status=e.status, error=str(e))
+                if attempt == self.max_rate_limit_retries or not self.key_pool.available():
+                    raise
+                continue
+            except DeadlineExceeded:
+                # Out of time, not a problem with the key
+                self.key_pool.release(api_key)
+                raise
+            except Exception as e:
+                self.key_pool.release(api_key, error=str(e))
+                raise
+            except BaseException:
+                self.key_pool.release(api_key)
+                raise
+            
+            self.key_pool.release(api_key, status=200)
+            self.rate_limiter.update_from_headers(api_key, model.value, result.get("rate_limit"))
+            return result
 
-@dataclass
-class ModelCosts:
-    """Cost per 1M tokens for input/output"""
-    input: float
-    output: float
+    def _current_batch(self) -> Optional[BatchScope]:
+        """The scope of the batch the current task belongs to, if it is one of ours"""
+        scope = _batch_scope.get()
+        return scope if scope is not None and scope.client is self else None
 
+    async def _post_completion(self, headers: Dict, payload: Dict, timeout: int) -> Dict:
+        """POST a chat completion, reusing the batch's session when in a batch"""
+        
+        client = self._get_http_client()
+        if client is not None:
+            response = await client.post(
+                f"{self.base_url}/chat/completions", headers=headers, json=payload, timeout=timeout
+            )
+            if response.status_code != 200:
+                self._raise_for_status(response.status_code, response.headers, response.text)
+            
+            result = response.json()
+            result["rate_limit"] = parse_rate_limit_headers(response.headers)
+            return result
+        
+        scope = self._current_batch()
+        if scope is not None and scope.session is not None:
+            return await self._send_completion(scope.session, headers, payload, aiohttp.ClientTimeout(total=timeout))
+        
+        connector = aiohttp.TCPConnector(ssl=False)  # Disable SSL verification for corporate environments
+        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+            return await self._send_completion(session, headers, payload)
 
-class OpenRouterClient:
-    """OpenRouter API client with fallback support"""
+    async def _send_completion(
+        self,
+        session: aiohttp.ClientSession,
+        headers: Dict,
+        payload: Dict,
+        timeout: Optional[aiohttp.ClientTimeout] = None
+    ) -> Dict:
+        """Send one completion request on an open session"""
+        
+        request_kwargs = {"headers": headers, "json": payload}
+        if timeout is not None:
+            request_kwargs["timeout"] = timeout
+        
+        response = await session.post(f"{self.base_url}/chat/completions", **request_kwargs)
+        
+        if response.status != 200:
+            self._raise_for_status(response.status, response.headers, await response.text())
+        
+        result = await response.json()
+        result["rate_limit"] = parse_rate_limit_headers(response.headers)
+        return result
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
-        self.base_url = "https://openrouter.ai/api/v1"
-        self.site_url = "https://party-storyteller.app"
-        self.app_name = "AI Storytelling Engine"
+    def _raise_for_status(self, status: int, headers, error_text: str):
+        """Raise the error matching a non-200 completion response"""
         
-        # Model cost tracking (per 1M tokens)
-        self.costs = {
-            OpenRouterModel.GEMINI_FLASH: ModelCosts(input=0.075, output=0.30),
-            OpenRouterModel.CLAUDE_HAIKU: ModelCosts(input=0.25, output=1.25),
-            OpenRouterModel.CLAUDE_SONNET: ModelCosts(input=3.0, output=15.0)
+        if status == 429:
+            raise RateLimitedError(
+                f"API request failed: 429 - {error_text}",
+                retry_after=parse_retry_after(headers.get("Retry-After"))
+            )
+        
+        if status in (401, 403):
+            raise KeyRejectedError(f"API request failed: {status} - {error_text}", status)
+        
+        raise Exception(f"API request failed: {status} - {error_text}")
+    
+    def _get_http_client(self) -> Optional[httpx.AsyncClient]:
+        """The shared HTTP/2 client, created on first use when that transport is selected"""
+        
+        if self.transport != OpenRouterTransport.HTTP2:
+            return None
+        
+        if self._http_client is None:
+            try:
+                self._http_client = httpx.AsyncClient(
+                    http2=True,
+                    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                    timeout=httpx.Timeout(45.0, connect=10.0)
+                )
+            except ImportError as e:
+                print(f"Warning: HTTP/2 transport unavailable ({e}); using aiohttp")
+                self.transport = OpenRouterTransport.AIOHTTP
+                return None
+        
+        return self._http_client
+
+    async def generate_stories(
+        self,
+        requests: List[Union[str, Dict]],
+        concurrency: int = 8,
+        model_concurrency: Optional[Dict[OpenRouterModel, int]] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Generate many stories concurrently, yielding results as they finish.
+        
+        All requests share one HTTP session for the duration of the batch;
+        the session and per-model caps belong to this batch alone, so
+        concurrent batches and other calls are unaffected. A failed story is reported in its result and does not stop the batch;
+        the totals are kept in last_batch_report.
+        
+        Args:
+            requests: Premise strings or dicts of generate_story arguments
+            concurrency: Maximum stories generated at once
+            model_concurrency: Optional cap on in-flight requests per model
+            
+        Yields:
+            Result dicts in completion order with index, request, success,
+            and either story or error
+        """
+        report = {
+            "total": len(requests),
+            "succeeded": 0,
+            "failed": 0,
+            "failures": [],
+            "started_at": time.time(),
+            "completed_at": None
         }
+        self.last_batch_report = report
         
-        # Request tracking
-        self.total_requests = 0
-        self.total_cost = 0.0
-        self.failed_requests = 0
+        semaphore = asyncio.Semaphore(concurrency)
+        scope = BatchScope(self, model_limits={
+            model.value: asyncio.Semaphore(limit) for model, limit in (model_concurrency or {}).items()
+        })
+        if self._get_http_client() is None:
+            scope.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(ssl=False, limit=concurrency * 2)
+            )
         
-    async def generate_story(
+        async def run(index: int, request: Union[str, Dict]):
+            # Each task has its own context copy: the scope is visible to this
+            # story's requests (and tasks they start) only
+            _batch_scope.set(scope)
+            kwargs = {"premise": request} if isinstance(request, str) else dict(request)
+            async with semaphore:
+                try:
+                    story = await self.generate_story(**kwargs)
+                except Exception as e:
+                    story = {"error": f"{type(e).__name__}: {e}"}
+            return index, request, story
+        
+        tasks = [asyncio.ensure_future(run(index, request)) for index, request in enumerate(requests)]
+        
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, request, story = await next_done
+                
+                if "error" in story:
+                    report["failed"] += 1
+                    report["failures"].append({"index": index, "request": request, "error": story["error"]})
+                    yield {"index": index, "request": request, "success": False, "error": story["error"]}
+                else:
+                    report["succeeded"] += 1
+                    yield {"index": index, "request": request, "success": True, "story": story}
+            
+        finally:
+            unfinished = [task for task in tasks if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            if unfinished:
+                await asyncio.gather(*unfinished, return_exceptions=True)
+            
+            if scope.session is not None:
+                await scope.session.close()
+            
+            report["completed_at"] = time.time()
+
+    async def close(self):
+        """Close the HTTP/2 client, if open"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    async def generate_story_stream(
         self,
         premise: str,
         mood: str = "neutral",
         characters: str = "3 characters",
-        max_retries: int = 2
-    ) -> Dict:
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Dict]:
         """
-        Generate a complete story using OpenRouter API with fallback.
-        
+        Generate a story as a stream of events, one per completed chapter.
+
+        Events are dictionaries with a "type" key:
+            title: the story title, as soon as it has streamed
+            chapter: a complete chapter object (id, text, choices)
+            complete: the full parsed story, same shape as generate_story
+            error: both models failed
+
+        The fallback model is only tried if the primary fails before any
+        chapter has been emitted, so consumers never see duplicate chapters.
+
         Args:
             premise: Story premise/setting
             mood: Story mood/tone
             characters: Character description
-            max_retries: Number of retry attempts
-            
-        Returns:
-            Generated story structure with chapters and choices
+            deadline: Request deadline; bounds each streaming request
+
+        Yields:
+            Story events in arrival order
         """
         prompt = self._build_story_prompt(premise, mood, characters)
-        
-        # Try primary model first (Gemini Flash)
-        try:
-            response = await self._make_api_request(
-                model=OpenRouterModel.GEMINI_FLASH,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=2000,
-                temperature=0.7
-            )
-            
-            story_data = self._parse_story_response(response, premise, mood)
-            story_data["model_used"] = "gemini-flash"
-            story_data["generation_cost"] = self._calculate_request_cost(
-                OpenRouterModel.GEMINI_FLASH, 
-                response.get("usage", {})
-            )
-            
-            return story_data
-            
-        except Exception as e:
-            print(f"Primary model (Gemini Flash) failed: {e}")
-            self.failed_requests += 1
-            
-            # Fallback to Claude Haiku
+        errors = []
+
+        for model in (OpenRouterModel.GEMINI_FLASH, OpenRouterModel.CLAUDE_HAIKU):
+            if deadline is not None and deadline.expired():
+                errors.append("Deadline exceeded")
+                break
+
+            model_name = MODEL_NAMES[model]
+            breaker = self.breakers[model]
+            if not breaker.allow_request():
+                self.breaker_skips += 1
+                errors.append(f"Circuit open for {model.value}")
+                continue
+
+            parser = StoryStreamParser()
+            emitted = 0
+            title_sent = False
+            start_time = time.time()
+            usage = {}
+            generation_id = None
+
             try:
-                response = await self._make_api_request(
-                    model=OpenRouterModel.CLAUDE_HAIKU,
+                async for chunk in self._stream_api_request(
+                    model=model,
                     messages=[{"role": "user", "content": prompt}],
-                    max_tokens=2000,
-                    temperature=0.7
-                )
-                
-                story_data = self._parse_story_response(response, premise, mood)
-                story_data["model_used"] = "claude-haiku"
-                story_data["generation_cost"] = self._calculate_request_cost(
-                    OpenRouterModel.CLAUDE_HAIKU,
-                    response.get("usage", {})
-                )
-                
-                return story_data
-                
-            except Exception as e2:
-                print(f"Fallback model (Claude Haiku) also failed: {e2}")
+                    max_tokens=self._story_max_tokens(model),
+                    temperature=0.7,
+                    timeout=45,
+                    response_format=self._story_response_format(model),
+                    deadline=deadline
+                ):
+                    if chunk.get("usage"):
+                        usage = chunk["usage"]
+                    generation_id = generation_id or chunk.get("id")
+
+                    for chapter in parser.feed(chunk.get("content", "")):
+                        emitted += 1
+                        yield {
+                            "type": "chapter",
+                            "chapter": chapter,
+                            "index": emitted - 1,
+                            "elapsed": time.time() - start_time
+                        }
+
+                    if not title_sent and parser.title is not None:
+                        title_sent = True
+                        yield {"type": "title", "title": parser.title}
+
+                story_data = parser.result()
+                if story_data is None:
+                    raise ValueError("Streamed response did not contain a story")
+
+                story_data.update({
+                    "premise": premise,
+                    "mood": mood,
+                    "generated_at": time.time(),
+                    "word_count": self._count_words(story_data),
+                    "model_used": model_name,
+                    "generation_cost": self._calculate_request_cost(model, usage),
+                    "streamed": True,
+                    "model_response": {
+                        "id": generation_id,
+                        "model": model.value,
+                        "usage": usage,
+                        "request_time": time.time() - start_time
+                    }
+                })
+                self._calibrate_story_budget(model, prompt, story_data, usage)
+
+                breaker.record_success(time.time() - start_time)
+                yield {"type": "complete", "story": story_data}
+                return
+
+            except (asyncio.CancelledError, GeneratorExit):
+                breaker.release()
+                raise
+
+            except DeadlineExceeded as e:
+                # Out of time, not a model failure; no point trying the fallback
+                breaker.release()
+                errors.append(str(e))
+                break
+
+            except Exception as e:
+                print(f"Streaming with {model_name} failed: {e}")
+                breaker.record_failure(time.time() - start_time)
                 self.failed_requests += 1
-                
-                # Return error response
-                return {
-                    "error": "Both primary and fallback models failed",
-                    "primary_error": str(e),
-                    "fallback_error": str(e2),
-                    "fallback_available": True
-                }
+                errors.append(str(e))
 
-    async def _make_api_request(
+                if emitted:
+                    # Chapters already reached the consumer; don't restart
+                    break
+
+        yield {
+            "type": "error",
+            "error": "Streaming story generation failed",
+            "errors": errors,
+            "fallback_available": True
+        }
+
+    async def _stream_api_request(
         self,
         model: OpenRouterModel,
         messages: List[Dict],
         max_tokens: int = 2000,
         temperature: float = 0.7,
-        timeout: int = 45
-    ) -> Dict:
-        """Make API request to OpenRouter with timeout"""
-        
+        timeout: int = 45,
+        response_format: Optional[Dict] = None,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Dict]:
+        """Stream a chat completion from OpenRouter as server-sent events (timeout capped by the deadline)"""
+
         if not self.api_key:
             raise ValueError("OpenRouter API key not provided")
-        
+
+        api_key = self.key_pool.acquire() or self.api_key
         headers = {
-            "Authorization": f"Bearer {self.api_key}",
+            "Authorization": f"Bearer {api_key}",
             "HTTP-Referer": self.site_url,
             "X-Title": self.app_name,
-            "Content-Type": "application/json"
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream"
         }
-        
+
         payload = {
             "model": model.value,
             "messages": messages,
             "max_tokens": max_tokens,
             "temperature": temperature,
-            "stream": False
+            "stream": True,
+            "usage": {"include": True}
         }
-        
-        start_time = time.time()
-        
+        if response_format is not None:
+            payload["response_format"] = response_format
+
+        status = None
+        error = None
+        retry_after = None
+
+        try:
+            await self.rate_limiter.acquire(
+                api_key, model.value, max_wait=deadline.remaining() if deadline is not None else None
+            )
+
+            lines = self._stream_lines(headers, payload, call_timeout(deadline, timeout))
+            try:
+                async for line in lines:
+                    event = self._parse_sse_line(line)
+                    if event is None:
+                        continue
+                    if event.get("done"):
+                        break
+                    yield event
+            finally:
+                # Release the connection even when the consumer stops early
+                await lines.aclose()
+            status = 200
+
+        except RateLimitedError as e:
+            status, retry_after, error = 429, e.retry_after, str(e)
+            self.rate_limiter.record_rate_limited(api_key, model.value, retry_after)
+            raise
+
+        except KeyRejectedError as e:
+            status, error = e.status, str(e)
+            raise
+
+        except DeadlineExceeded:
+            raise
+
+        except Exception as e:
+            error = str(e)
+            raise
+
+        finally:
+            self.key_pool.release(api_key, status=status, retry_after=retry_after, error=error)
+
+    async def _stream_lines(self, headers: Dict, payload: Dict, timeout: int) -> AsyncIterator[str]:
+        """Yield the raw event-stream lines of a streaming completion"""
+
+        url = f"{self.base_url}/chat/completions"
+
+        client = self._get_http_client()
+        if client is not None:
+            async with client.stream("POST", url, headers=headers, json=payload, timeout=timeout) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    self._raise_for_status(response.status_code, response.headers, response.text)
+
+                self.total_requests += 1
+                async for line in response.aiter_lines():
+                    yield line
+            return
+
         connector = aiohttp.TCPConnector(ssl=False)  # Disable SSL verification for corporate environments
         async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
-            response = await session.post(f"{self.base_url}/chat/completions",
-                                   headers=headers,
-                                   json=payload)
-            
-            if response.status != 200:
-                error_text = await response.text()
-                raise Exception(f"API request failed: {response.status} - {error_text}")
-            
-            result = await response.json()
-            
-            # Track request
-            self.total_requests += 1
-            request_time = time.time() - start_time
-            
-            # Add timing info
-            result["request_time"] = request_time
-            result["model"] = model.value
-            
-            return result
+            async with session.post(url, headers=headers, json=payload) as response:
+                if response.status != 200:
+                    self._raise_for_status(response.status, response.headers, await response.text())
+
+                self.total_requests += 1
+                async for raw_line in response.content:
+                    yield raw_line.decode("utf-8", errors="replace")
+
+    def _parse_sse_line(self, line: str) -> Optional[Dict]:
+        """Parse one server-sent event line into a content/usage chunk"""
+        line = line.strip()
+
+        # Blank separators and ": OPENROUTER PROCESSING" keep-alive comments
+        if not line or line.startswith(":") or not line.startswith("data:"):
+            return None
+
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return {"done": True}
+
+        try:
+            chunk = json.loads(data)
+        except json.JSONDecodeError:
+            return None
+
+        if "error" in chunk:
+            raise Exception(f"Stream error: {chunk['error']}")
+
+        choices = chunk.get("choices") or [{}]
+        delta = choices[0].get("delta", {})
+
+        return {
+            "content": delta.get("content") or "",
+            "usage": chunk.get("usage"),
+            "finish_reason": choices[0].get("finish_reason"),
+            "id": chunk.get("id")
+        }
 
     def _build_story_prompt(self, premise: str, mood: str, characters: str) -> str:
         """Build optimized prompt for story generation"""
+        return build_story_prompt(premise, mood, characters)
+
+    def _build_refine_prompt(self, draft: Dict, premise: str, mood: str, characters: str) -> str:
+        """Build the prompt asking a stronger model to rewrite a draft"""
+        
+        draft_json = json.dumps(
+            {
+                "title": draft.get("title", "Untitled Story"),
+                "chapters": [
+                    {"id": c.get("id"), "text": c.get("text", ""), "choices": c.get("choices", [])}
+                    for c in draft.get("chapters", [])
+                ]
+            },
+            indent=2
+        )
         
-        return f"""You are a master storyteller creating an immersive, interactive story.
+        return f"""You are a master storyteller editing a draft of an interactive story.
 
-REQUIREMENTS:
-- Create a branching narrative with exactly 3-5 choice points
-- Total length: 500-1000 words across all chapters
 - Tone: {mood}
 - Characters: {characters}
 - Setting/Premise: {premise}
 
-STRUCTURE:
-Chapter 1: [200-300 words] - Setup and first choice
-Chapter 2-4: [100-200 words each] - Based on choices
-Each chapter ends with 2-3 meaningful choices
+Rewrite the draft below into polished prose:
+- Keep the same chapter ids, branching and number of choices
+- Total length: 500-1000 words across all chapters
+- Write like a human author, not an AI; avoid clichés
+- Strengthen emotional engagement and make every choice meaningful
+- Fix any inconsistencies between chapters
 
-QUALITY STANDARDS:
-- Write like a human author, not an AI
-- Create genuine emotional engagement
-- Avoid clichés and generic responses
-- Make choices meaningful and impactful
-- Ensure narrative consistency
+DRAFT:
+{draft_json}
 
-PREMISE: {premise}
-MOOD: {mood}
-CHARACTERS: {characters}
+Return the rewritten story in the same JSON format as the draft."""
 
-Generate the story in this JSON format:
+    def _build_outline_prompt(self, premise: str, mood: str, characters: str) -> str:
+        """Build a short prompt asking only for the story outline"""
+        
+        return f"""You are a master storyteller planning an interactive story.
+
+Plan a branching story with 3-5 chapters. Do not write the chapters yet.
+- Tone: {mood}
+- Characters: {characters}
+- Setting/Premise: {premise}
+
+For each chapter give a one-line beat and 2-3 meaningful choices that lead to
+other chapters. The final chapters may have no choices.
+
+Respond with JSON only:
 {{
     "title": "Story Title",
     "chapters": [
         {{
             "id": 1,
-            "text": "Chapter content...",
+            "beat": "One line describing what happens",
             "choices": [
                 {{"id": "a", "text": "Choice 1", "leads_to": 2}},
                 {{"id": "b", "text": "Choice 2", "leads_to": 3}}
@@ -218,22 +1611,144 @@ Generate the story in this JSON format:
     ]
 }}"""
 
+    def _build_chapter_prompt(
+        self,
+        outline: Dict,
+        beat: Dict,
+        premise: str,
+        mood: str,
+        characters: str
+    ) -> str:
+        """Build the prompt for writing one outlined chapter"""
+        
+        first_id = outline["chapters"][0]["id"]
+        word_range = "200-300" if beat["id"] == first_id else "100-200"
+        plan = "\n".join(f"{b['id']}. {b['beat']}" for b in outline["chapters"])
+        choices = "\n".join(f"- {c['text']}" for c in beat.get("choices", [])) or "- (none, this is an ending)"
+        
+        return f"""You are a master storyteller writing one chapter of the interactive story "{outline['title']}".
+
+Tone: {mood}
+Characters: {characters}
+Setting/Premise: {premise}
+
+Story plan:
+{plan}
+
+Write chapter {beat['id']}: {beat['beat']}
+- {word_range} words
+- Write like a human author, not an AI; avoid clichés
+- End at a moment where the reader must choose between:
+{choices}
+
+Return only the chapter prose, without a heading, choices list or JSON."""
+
+    def _build_continuation_prompt(self, story_state: Dict, choice: Dict, chapter_id: int) -> str:
+        """Build a bounded-size prompt for the chapter after a choice"""
+        
+        # Chapters the summary does not cover yet, capped so a lagging
+        # summary cannot grow the prompt
+        recent = [
+            c for c in story_state["chapters"]
+            if c.get("id", 0) > story_state["summarized_through"]
+        ][-self.CONTINUATION_VERBATIM_CHAPTERS:]
+        recent_text = "\n\n".join(f"Chapter {c.get('id')}:\n{c.get('text', '')}" for c in recent)
+        facts = "\n".join(f"- {fact}" for fact in story_state["facts"]) or "- (none yet)"
+        
+        return f"""You are a master storyteller continuing the interactive story "{story_state.get('title', 'Untitled Story')}".
+
+Tone: {story_state.get('mood', 'neutral')}
+Characters: {story_state.get('characters', '3 characters')}
+Setting/Premise: {story_state.get('premise', '')}
+
+Story so far (summary):
+{story_state["summary"] or "(the story has just begun)"}
+
+Characters and established facts:
+{facts}
+
+Most recent chapters:
+{recent_text}
+
+The reader chose: {choice.get('text', '')}
+
+Write chapter {chapter_id}, continuing directly from that choice.
+- 150-250 words, consistent with the facts above
+- Write like a human author, not an AI; avoid clichés
+- End with 2-3 meaningful choices
+
+Respond with JSON only:
+{{
+    "text": "Chapter content...",
+    "choices": [
+        {{"id": "a", "text": "Choice 1"}},
+        {{"id": "b", "text": "Choice 2"}}
+    ]
+}}"""
+
+    def _build_summary_prompt(self, summary: str, facts: List[str], chapters: List[Dict]) -> str:
+        """Build the prompt that folds new chapters into the rolling summary"""
+        
+        chapters_text = "\n\n".join(f"Chapter {c.get('id')}:\n{c.get('text', '')}" for c in chapters)
+        fact_lines = "\n".join(f"- {fact}" for fact in facts) or "- (none yet)"
+        
+        return f"""Update the running summary of an interactive story.
+
+Current summary:
+{summary or "(empty)"}
+
+Current character/fact sheet:
+{fact_lines}
+
+New chapters:
+{chapters_text}
+
+Rewrite the summary to cover everything so far in at most {self.SUMMARY_MAX_WORDS} words.
+Update the fact sheet to at most {self.MAX_STORY_FACTS} short entries: who the characters
+are, what they know or carry, and anything later chapters must stay consistent with.
+
+Respond with JSON only:
+{{"summary": "...", "facts": ["...", "..."]}}"""
+
+    def _parse_outline_response(self, response: Dict) -> Dict:
+        """Parse and validate an outline response"""
+        
+        content = response["choices"][0]["message"]["content"]
+        json_start = content.find("{")
+        json_end = content.rfind("}") + 1
+        
+        if json_start == -1 or json_end == 0:
+            raise ValueError("Outline response did not contain JSON")
+        
+        outline = json.loads(content[json_start:json_end])
+        chapters = outline.get("chapters") or []
+        
+        if not chapters:
+            raise ValueError("Outline response has no chapters")
+        
+        for index, chapter in enumerate(chapters):
+            chapter.setdefault("id", index + 1)
+            chapter.setdefault("beat", "")
+            chapter.setdefault("choices", [])
+        
+        outline.setdefault("title", "Untitled Story")
+        return outline
+
     def _parse_story_response(self, response: Dict, premise: str, mood: str) -> Dict:
         """Parse and validate OpenRouter response"""
         
         try:
             content = response["choices"][0]["message"]["content"]
             
-            # Try to extract JSON from response
-            json_start = content.find("{")
-            json_end = content.rfind("}") + 1
+            # Strict parse first; fences, smart quotes, trailing commas and a
+            # cut-off final chapter are repaired locally instead of regenerated
+            story_data, repairs = self.json_repairer.parse(content)
             
-            if json_start != -1 and json_end != -1:
-                json_str = content[json_start:json_end]
-                story_data = json.loads(json_str)
-            else:
+            if story_data is None:
                 # Fallback: create structured response from raw text
                 story_data = self._create_fallback_story(content, premise, mood)
+            elif repairs:
+                story_data["json_repairs"] = repairs
             
             # Add metadata
             story_data.update({
@@ -254,38 +1769,41 @@ Generate the story in this JSON format:
                 mood
             )
 
+    def _story_max_tokens(self, model: OpenRouterModel) -> int:
+        """Output budget for a full story from this model"""
+        return self.token_budget.max_tokens_for(
+            model.value,
+            self.STORY_TARGET_WORDS,
+            self.STORY_MAX_CHAPTERS
+        )
+
+    def _calibrate_story_budget(self, model: OpenRouterModel, prompt: str, story_data: Dict, usage: Optional[Dict]):
+        """Feed a story's real token usage back into the budgeter"""
+        if story_data.get("fallback_generated") or "truncated" in story_data.get("json_repairs", []):
+            # Cut-off or unstructured output would understate tokens per word
+            return
+        
+        self.token_budget.record_usage(
+            model.value,
+            usage,
+            self._count_words(story_data),
+            max(len(story_data.get("chapters", [])), 1),
+            prompt=prompt
+        )
+
+    def _story_response_format(self, model: OpenRouterModel) -> Optional[Dict]:
+        """JSON schema response_format for models that support it"""
+        if self.structured_output and model in STRUCTURED_OUTPUT_MODELS:
+            return STORY_RESPONSE_FORMAT
+        return None
+
     def _create_fallback_story(self, content: str, premise: str, mood: str) -> Dict:
         """Create fallback story structure from raw text"""
-        
-        # Split content into chapters if possible
-        paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
-        
-        chapters = []
-        for i, paragraph in enumerate(paragraphs[:3]):  # Max 3 chapters
-            chapter = {
-                "id": i + 1,
-                "text": paragraph,
-                "choices": [
-                    {"id": "a", "text": "Continue the story", "leads_to": i + 2},
-                    {"id": "b", "text": "Take a different path", "leads_to": i + 2}
-                ]
-            }
-            chapters.append(chapter)
-        
-        return {
-            "title": f"A {mood} story",
-            "chapters": chapters,
-            "premise": premise,
-            "mood": mood,
-            "fallback_generated": True
-        }
+        return create_fallback_story(content, premise, mood)
 
     def _count_words(self, story_data: Dict) -> int:
         """Count total words in story"""
-        total_words = 0
-        for chapter in story_data.get("chapters", []):
-            total_words += len(chapter.get("text", "").split())
-        return total_words
+        return count_story_words(story_data)
 
     def _calculate_request_cost(self, model: OpenRouterModel, usage: Dict) -> float:
         """Calculate cost for API request"""
@@ -301,6 +1819,48 @@ Generate the story in this JSON format:
         
         return cost
 
+    async def fetch_generation_cost(self, generation_id: str, timeout: int = 10) -> Optional[float]:
+        """
+        Look up the billed cost of a completed generation.
+
+        Returns:
+            Total cost in USD, or None if the provider has no stats for it yet
+        """
+        api_key = self.key_pool.acquire() or self.api_key
+        if not api_key or not generation_id:
+            self.key_pool.release(api_key)
+            return None
+
+        headers = {"Authorization": f"Bearer {api_key}"}
+        status = None
+
+        try:
+            scope = self._current_batch()
+            if scope is not None and scope.session is not None:
+                response = await scope.session.get(
+                    f"{self.base_url}/generation",
+                    params={"id": generation_id},
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=timeout)
+                )
+                status = response.status
+                data = await response.json() if status == 200 else {}
+            else:
+                connector = aiohttp.TCPConnector(ssl=False)
+                async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+                    response = await session.get(
+                        f"{self.base_url}/generation",
+                        params={"id": generation_id},
+                        headers=headers
+                    )
+                    status = response.status
+                    data = await response.json() if status == 200 else {}
+        finally:
+            self.key_pool.release(api_key, status=status)
+
+        cost = (data.get("data") or {}).get("total_cost")
+        return float(cost) if cost is not None else None
+
     async def test_connection(self) -> Dict:
         """Test OpenRouter API connection"""
         try:
@@ -332,7 +1892,36 @@ Generate the story in this JSON format:
             "failed_requests": self.failed_requests,
             "success_rate": (self.total_requests - self.failed_requests) / max(self.total_requests, 1),
             "total_cost": round(self.total_cost, 4),
-            "average_cost_per_request": round(self.total_cost / max(self.total_requests, 1), 4)
+            "average_cost_per_request": round(self.total_cost / max(self.total_requests, 1), 4),
+            "hedging": {
+                "enabled": self.hedging.enabled,
+                "current_delay": round(self._hedge_delay(), 2),
+                "hedged_requests": self.hedged_requests,
+                "hedge_rate": round(self.hedged_requests / max(self.story_requests, 1), 4),
+                "fallback_wins": self.hedge_wins,
+                "wasted_cost": round(self.hedge_wasted_cost, 6)
+            },
+            "cache": self.cache.get_stats() if self.cache is not None else None,
+            "similarity_cache": self.similarity_cache.get_stats() if self.similarity_cache is not None else None,
+            "single_flight": self.single_flight.get_stats(),
+            "rate_limiter": self.rate_limiter.get_stats(),
+            "circuit_breakers": {
+                model.value: breaker.get_stats() for model, breaker in self.breakers.items()
+            },
+            "breaker_skips": self.breaker_skips,
+            "json_repair": self.json_repairer.get_stats(),
+            "token_budget": self.token_budget.get_stats(),
+            "key_pool": self.key_pool.get_stats(),
+            "transport": self.transport.value,
+            "continuation": {
+                "continuations": self.continuations,
+                "average_prompt_tokens": round(
+                    self.continuation_prompt_tokens / max(self.continuations, 1), 1
+                ),
+                "summary_refreshes": self.summary_refreshes,
+                "summary_failures": self.summary_failures,
+                "pending_summaries": sum(1 for t in self._pending_summaries.values() if not t.done())
+            }
         }
 
 
@@ -0,0 +1,218 @@
+"""
+Rate Limiter - Shared token buckets for provider API calls
+
+This module queues requests per (API key, model) instead of letting bursts
+turn into 429 failures, and honours Retry-After and rate-limit headers.
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+from typing import Dict, Optional, Tuple
+
+from .deadline import DeadlineExceeded
+
+
+class RateLimitedError(Exception):
+    """Raised when the provider answers 429 Too Many Requests"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def parse_rate_limit_headers(headers) -> Dict:
+    """Extract X-RateLimit-* headers into a plain dict"""
+    info = {}
+
+    for name, key in (
+        ("X-RateLimit-Limit", "limit"),
+        ("X-RateLimit-Remaining", "remaining"),
+        ("X-RateLimit-Reset", "reset")
+    ):
+        value = headers.get(name) if headers else None
+        if value is None:
+            continue
+        try:
+            info[key] = float(value)
+        except ValueError:
+            continue
+
+    return info
+
+
+class TokenBucket:
+    """
+    Asyncio-safe token bucket.
+
+    Tokens are reserved synchronously (the balance may go negative), so
+    concurrent callers queue in arrival order without needing a lock.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+        # Queue metrics
+        self.waiting = 0
+        self.max_waiting = 0
+        self.acquired = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.rate_limited = 0
+
+    async def acquire(self, max_wait: Optional[float] = None) -> float:
+        """
+        Take one token, waiting if necessary; returns seconds waited.
+
+        Raises:
+            DeadlineExceeded: The wait would exceed max_wait (no token is taken)
+        """
+        start = time.monotonic()
+        self._refill(start)
+        self.tokens -= 1
+        wait = max(-self.tokens / self.rate, self.blocked_until - start, 0.0)
+
+        if max_wait is not None and wait > max_wait:
+            self.tokens += 1
+            raise DeadlineExceeded(f"Rate limit wait of {wait:.1f}s exceeds the {max(max_wait, 0.0):.1f}s left")
+
+        if wait > 0:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            try:
+                await asyncio.sleep(wait)
+                # A Retry-After may have arrived while we slept
+                while self.blocked_until > time.monotonic():
+                    if max_wait is not None and self.blocked_until - start > max_wait:
+                        raise DeadlineExceeded("Rate limit block outlasts the time left")
+                    await asyncio.sleep(self.blocked_until - time.monotonic())
+            except BaseException:
+                self.tokens += 1
+                raise
+            finally:
+                self.waiting -= 1
+
+        waited = time.monotonic() - start
+        self.acquired += 1
+        if waited > 0:
+            self.delayed += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+        return waited
+
+    def block_for(self, seconds: float):
+        """Stop handing out tokens for the given number of seconds"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def limit_remaining(self, remaining: float):
+        """Never hold more tokens than the provider says remain"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, remaining)
+
+    def get_stats(self) -> Dict:
+        """Get bucket statistics"""
+        self._refill(time.monotonic())
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "tokens": round(self.tokens, 2),
+            "queue_depth": self.waiting,
+            "max_queue_depth": self.max_waiting,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "rate_limited": self.rate_limited,
+            "average_wait": round(self.total_wait / max(self.acquired, 1), 4),
+            "max_wait": round(self.max_wait, 4),
+            "blocked_for": round(max(0.0, self.blocked_until - time.monotonic()), 2)
+        }
+
+    def _refill(self, now: float):
+        """Add tokens for the time elapsed since the last update"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+
+class RateLimiter:
+    """Process-wide token buckets keyed by (API key, model)"""
+
+    def __init__(self, rate: float = 10.0, capacity: float = 20.0, default_retry_after: float = 5.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.default_retry_after = default_retry_after
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def bucket(self, api_key: Optional[str], model: str) -> TokenBucket:
+        """Get or create the bucket for an API key and model"""
+        key = (self._fingerprint(api_key), model)
+        if key not in self.buckets:
+            self.buckets[key] = TokenBucket(self.rate, self.capacity)
+        return self.buckets[key]
+
+    async def acquire(self, api_key: Optional[str], model: str, max_wait: Optional[float] = None) -> float:
+        """Wait for a request slot, at most max_wait seconds; returns seconds waited"""
+        return await self.bucket(api_key, model).acquire(max_wait)
+
+    def record_rate_limited(self, api_key: Optional[str], model: str, retry_after: Optional[float] = None):
+        """Back off after a 429, honouring Retry-After when given"""
+        bucket = self.bucket(api_key, model)
+        bucket.rate_limited += 1
+        bucket.block_for(retry_after if retry_after is not None else self.default_retry_after)
+
+    def update_from_headers(self, api_key: Optional[str], model: str, rate_limit: Optional[Dict]):
+        """Adjust a bucket from parsed X-RateLimit-* headers"""
+        if not rate_limit:
+            return
+
+        bucket = self.bucket(api_key, model)
+
+        if "remaining" in rate_limit:
+            bucket.limit_remaining(rate_limit["remaining"])
+
+            if rate_limit["remaining"] <= 0 and "reset" in rate_limit:
+                # OpenRouter reports the reset as epoch milliseconds
+                reset = rate_limit["reset"]
+                reset_seconds = reset / 1000 if reset > 1e11 else reset
+                bucket.block_for(max(0.0, reset_seconds - time.time()))
+
+    def get_stats(self) -> Dict:
+        """Get statistics for every bucket"""
+        buckets = {
+            f"{fingerprint}:{model}": bucket.get_stats()
+            for (fingerprint, model), bucket in self.buckets.items()
+        }
+        return {
+            "queue_depth": sum(b.waiting for b in self.buckets.values()),
+            "rate_limited": sum(b.rate_limited for b in self.buckets.values()),
+            "total_wait": round(sum(b.total_wait for b in self.buckets.values()), 4),
+            "buckets": buckets
+        }
+
+    def _fingerprint(self, api_key: Optional[str]) -> str:
+        """Identify a key in stats without exposing it"""
+        if not api_key:
+            return "anonymous"
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+# Global rate limiter shared by every OpenRouter client in the process
+rate_limiter = RateLimiter(
+    rate=float(os.getenv("OPENROUTER_RATE_LIMIT_RPS", "10")),
+    capacity=float(os.getenv("OPENROUTER_RATE_LIMIT_BURST", "20"))
+)
@@ -0,0 +1,210 @@
+"""
+Similarity Cache - Near-duplicate premise matching
+
+This module serves stories for premises that are close to ones already
+generated, using hashed word and character n-gram vectors and one vectorized
+cosine-similarity pass over the stories with the same mood and characters.
+"""
+
+import copy
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .story_cache import normalize_text
+
+
+# Words that say nothing about what a premise is about
+STOPWORDS = frozenset({
+    "a", "an", "the", "in", "on", "of", "at", "to", "and", "with", "about",
+    "for", "set", "story", "tale", "adventure", "narrative"
+})
+
+
+class _RowGroup:
+    """
+    Index rows of one (mood, characters) group.
+
+    Rows live in an array grown by doubling, so appends are amortized O(1);
+    removal swaps the last row into the freed slot, so order is not kept.
+    """
+
+    def __init__(self, initial_size: int = 8):
+        self._rows = np.empty(initial_size, dtype=np.int64)
+        self._positions: Dict[int, int] = {}
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def append(self, row: int):
+        if self.length == len(self._rows):
+            grown = np.empty(len(self._rows) * 2, dtype=np.int64)
+            grown[:self.length] = self._rows[:self.length]
+            self._rows = grown
+        self._rows[self.length] = row
+        self._positions[row] = self.length
+        self.length += 1
+
+    def remove(self, row: int):
+        position = self._positions.pop(row)
+        self.length -= 1
+        if position != self.length:
+            moved = int(self._rows[self.length])
+            self._rows[position] = moved
+            self._positions[moved] = position
+
+    def view(self) -> np.ndarray:
+        """Live rows, without copying"""
+        return self._rows[:self.length]
+
+
+class SimilarityCache:
+    """Nearest-neighbour story cache over hashed character n-gram vectors"""
+
+    def __init__(
+        self,
+        threshold: float = 0.75,
+        capacity: int = 20_000,
+        dimensions: int = 128,
+        ngram_size: int = 3
+    ):
+        self.threshold = threshold
+        self.capacity = capacity
+        self.dimensions = dimensions
+        self.ngram_size = ngram_size
+
+        # Preallocated index; rows [0, size) are live, rows are L2-normalized
+        self._vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        self._group_ids = np.zeros(capacity, dtype=np.int64)
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._stories: List[Optional[Dict]] = [None] * capacity
+        self._texts: List[Optional[str]] = [None] * capacity
+        self._rows: Dict[Tuple[str, int], int] = {}
+        self.size = 0
+
+        # Rows partitioned by (mood, characters) so a lookup only scans
+        # stories it could actually serve
+        self._groups: Dict[int, _RowGroup] = {}
+
+        # Cache statistics
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self.total_lookup_time = 0.0
+
+    def lookup(self, premise: str, mood: str, characters: str) -> Optional[Tuple[Dict, float, str]]:
+        """
+        Find the most similar cached premise with the same mood and characters.
+
+        Args:
+            premise: Story premise/setting
+            mood: Story mood/tone (must match after normalization)
+            characters: Character description (must match after normalization)
+
+        Returns:
+            Tuple of (story copy, similarity, matched premise) above the
+            threshold, or None
+        """
+        start_time = time.perf_counter()
+        self.lookups += 1
+
+        try:
+            group = self._groups.get(self._group_id(mood, characters))
+            if group is None or not len(group):
+                return None
+            rows = group.view()
+
+            query = self._vectorize(normalize_text(premise))
+            scores = self._vectors[rows] @ query
+
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+
+            if similarity < self.threshold:
+                return None
+
+            row = int(rows[best])
+            self.hits += 1
+            self._last_used[row] = time.time()
+            return copy.deepcopy(self._stories[row]), similarity, self._texts[row]
+
+        finally:
+            self.total_lookup_time += time.perf_counter() - start_time
+
+    def add(self, premise: str, mood: str, characters: str, story: Dict):
+        """Index a generated story, evicting the least recently used entry when full"""
+        text = normalize_text(premise)
+        group_id = self._group_id(mood, characters)
+        key = (text, group_id)
+
+        row = self._rows.get(key)
+        if row is None:
+            if self.size < self.capacity:
+                row = self.size
+                self.size += 1
+            else:
+                row = int(np.argmin(self._last_used[:self.size]))
+                self._evict(row)
+            self._rows[key] = row
+            self._groups.setdefault(group_id, _RowGroup()).append(row)
+
+        self._vectors[row] = self._vectorize(text)
+        self._group_ids[row] = group_id
+        self._last_used[row] = time.time()
+        self._stories[row] = copy.deepcopy(story)
+        self._texts[row] = text
+
+    def get_stats(self) -> Dict:
+        """Get similarity cache statistics"""
+        return {
+            "entries": self.size,
+            "capacity": self.capacity,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / max(self.lookups, 1), 4),
+            "evictions": self.evictions,
+            "threshold": self.threshold,
+            "average_lookup_ms": round(self.total_lookup_time / max(self.lookups, 1) * 1000, 4)
+        }
+
+    def _evict(self, row: int):
+        """Remove a row from the key map and its group"""
+        group_id = int(self._group_ids[row])
+        del self._rows[(self._texts[row], group_id)]
+
+        group = self._groups[group_id]
+        group.remove(row)
+        if not len(group):
+            del self._groups[group_id]
+
+        self.evictions += 1
+
+    def _group_id(self, mood: str, characters: str) -> int:
+        """Stable integer id for a normalized (mood, characters) pair"""
+        return zlib.crc32(f"{normalize_text(mood)}|{normalize_text(characters)}".encode("utf-8"))
+
+    def _vectorize(self, text: str) -> np.ndarray:
+        """Hash word tokens and character n-grams into an L2-normalized vector"""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        words = [word.strip(".,!?;:'\"") for word in text.split()]
+        words = [word for word in words if word and word not in STOPWORDS]
+        padded = f" {' '.join(words)} "
+
+        features = list(words)
+        features += [padded[i:i + self.ngram_size] for i in range(len(padded) - self.ngram_size + 1)]
+
+        for feature in features:
+            digest = zlib.crc32(feature.encode("utf-8"))
+            # Signed hashing keeps collisions from only ever adding similarity
+            sign = 1.0 if digest & 1 else -1.0
+            vector[(digest >> 1) % self.dimensions] += sign
+
+        # Sublinear term frequency
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
@@ -0,0 +1,99 @@
+"""
+Single-Flight - Coalesce identical in-flight requests
+
+This module lets concurrent callers with the same key share one underlying
+call. Each caller waits at most its own timeout; the shared call is
+cancelled only once every waiter has gone away.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+@dataclass
+class _Call:
+    """One shared in-flight call"""
+    task: asyncio.Future
+    waiters: int = 0
+    cancelled: bool = False
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+
+        # Coalescing statistics
+        self.calls_started = 0
+        self.calls_coalesced = 0
+        self.calls_cancelled = 0
+
+    async def do(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Run factory() once per key for all concurrent callers.
+
+        Args:
+            key: Request identity; callers with equal keys share a call
+            factory: Zero-argument coroutine factory for the real work
+            timeout: Longest this caller waits; other waiters keep the call
+
+        Returns:
+            Tuple of (result, shared) where shared is True for callers
+            that joined an existing call instead of starting one
+
+        Raises:
+            asyncio.TimeoutError: This caller's timeout ran out first
+        """
+        call = self._calls.get(key)
+        if call is not None and call.cancelled:
+            # Being torn down; a new caller must not inherit the cancellation
+            call = None
+        shared = call is not None
+
+        if call is None:
+            call = _Call(task=asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _, key=key, call=call: self._forget(key, call))
+            self.calls_started += 1
+        else:
+            self.calls_coalesced += 1
+
+        call.waiters += 1
+        try:
+            result = await asyncio.wait_for(asyncio.shield(call.task), timeout)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Last interested caller left or gave up: stop the underlying work
+                call.cancelled = True
+                call.task.cancel()
+                self.calls_cancelled += 1
+
+        return result, shared
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running"""
+        return len(self._calls)
+
+    def get_stats(self) -> Dict:
+        """Get coalescing statistics"""
+        total = self.calls_started + self.calls_coalesced
+        return {
+            "calls_started": self.calls_started,
+            "calls_saved": self.calls_coalesced,
+            "calls_cancelled": self.calls_cancelled,
+            "in_flight": self.in_flight(),
+            "coalesce_rate": round(self.calls_coalesced / max(total, 1), 4)
+        }
+
+    def _forget(self, key: str, call: _Call):
+        """Drop a finished call so later requests start fresh"""
+        if self._calls.get(key) is call:
+            del self._calls[key]
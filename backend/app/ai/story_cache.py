@@ -0,0 +1,190 @@
+"""
+Story Cache - Persistent completion cache
+
+This module caches generated stories keyed on the normalized request, with an
+in-process LRU in front of a SQLite tier so repeated premises skip the API.
+"""
+
+import copy
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Lowercase and collapse whitespace so trivial variations share a key"""
+    return " ".join((value or "").lower().split())
+
+
+def make_cache_key(
+    premise: str,
+    mood: str,
+    characters: str,
+    model: str,
+    temperature: float,
+    prompt_version: str
+) -> str:
+    """Build a stable cache key for a story request"""
+    parts = [
+        normalize_text(premise),
+        normalize_text(mood),
+        normalize_text(characters),
+        model,
+        round(float(temperature), 3),
+        prompt_version
+    ]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+class StoryCache:
+    """Two-tier story cache: in-memory LRU backed by SQLite"""
+
+    def __init__(
+        self,
+        db_path: str = "story_cache.db",
+        memory_size: int = 256,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 7 * 86400
+    ):
+        self.db_path = db_path
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS story_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_story_cache_accessed ON story_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+        # Cache statistics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return a copy of the cached story, or None on miss or expiry"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, story = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return copy.deepcopy(story)
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM story_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM story_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE story_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+
+            story = json.loads(value)
+            self._remember(key, created_at, story)
+            self.disk_hits += 1
+            return copy.deepcopy(story)
+
+    def set(self, key: str, story: Dict):
+        """Store a story in both tiers, evicting the least recently used entries"""
+        now = time.time()
+
+        try:
+            value = json.dumps(story)
+        except (TypeError, ValueError) as e:
+            print(f"Warning: Could not cache story: {e}")
+            return
+
+        with self._lock:
+            self._remember(key, now, copy.deepcopy(story))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO story_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+
+            expired = self._conn.execute(
+                "DELETE FROM story_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+            self.expirations += max(expired, 0)
+
+            count = self._conn.execute("SELECT COUNT(*) FROM story_cache").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                self._conn.execute(
+                    """DELETE FROM story_cache WHERE key IN (
+                        SELECT key FROM story_cache ORDER BY accessed_at ASC LIMIT ?
+                    )""",
+                    (excess,)
+                )
+                self.evictions += excess
+
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every cached story"""
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM story_cache")
+            self._conn.commit()
+
+    def close(self):
+        """Close the SQLite connection"""
+        self._conn.close()
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+
+        with self._lock:
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM story_cache").fetchone()[0]
+
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / max(lookups, 1), 4),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "memory_entries": len(self._memory),
+            "disk_entries": disk_entries
+        }
+
+    def _remember(self, key: str, created_at: float, story: Dict):
+        """Insert into the in-memory LRU tier"""
+        self._memory[key] = (created_at, story)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
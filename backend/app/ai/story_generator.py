@@ -6,16 +6,29 @@ with text, audio, and images within the 60-second requirement.
 """
 
 import time
+import uuid
 import asyncio
-from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
 from .openrouter_client import OpenRouterClient, OpenRouterModel
 from .cost_optimizer import CostOptimizer, TaskComplexity
-from .quality_checker import StoryQualityChecker
+from .cost_reconciler import CostEvent, CostReconciler
+from .circuit_breaker import percentile
+from .deadline import Deadline, DeadlineExceeded, LatencyHistory
+from .cancellation import ClientDisconnected, DisconnectCheck, run_until_disconnected
+from .quality_checker import StoryQualityChecker, QualityResult
 from .tts_client import ElevenLabsClient, TTSModel, VoiceSettings
 from .image_client import StableDiffusionClient, ImageSize, ImageSettings
+from .ollama_client import OllamaClient
+from .task_graph import GraphRun, ResourceLimits, TaskGraph
+from ..ai_config import ModelTier, get_model_config, get_tier_model
+
+
+class NarrativeGenerationError(Exception):
+    """Raised by the text stage when no model produced a usable narrative"""
 
 
 class GenerationStatus(Enum):
@@ -30,6 +43,12 @@ class GenerationStatus(Enum):
     TIMEOUT = "timeout"
 
 
+class CancellationPolicy(Enum):
+    """What happens to finished stages when the client disconnects mid-generation"""
+    KEEP = "keep"          # Stored so a reconnecting client can fetch them by story id
+    DISCARD = "discard"
+
+
 @dataclass
 class GenerationProgress:
     """Progress tracking for story generation"""
@@ -43,10 +62,48 @@ class GenerationProgress:
 class StoryGenerator:
     """Main story generation orchestrator with <60s requirement"""
     
-    def __init__(self, timeout_seconds: int = 58):  # 2s buffer for safety
+    # Progressive mode: cheap draft first, stronger rewrite in the background
+    DRAFT_TIER = ModelTier.ULTRA_CHEAP
+    REFINE_TIER = ModelTier.QUALITY
+    DRAFT_TIMEOUT = 15
+    MAX_STORED_STORIES = 500
+    
+    # Streaming delivery: per-chapter media limit before a chapter is served without it
+    CHAPTER_MEDIA_TIMEOUT = 20
+    
+    # Chapter narrations synthesized at once for one story
+    AUDIO_CONCURRENCY = 3
+    
+    # Ensemble mode: cheap models raced for premium or high-complexity requests
+    ENSEMBLE_MODELS = (OpenRouterModel.GEMINI_FLASH, OpenRouterModel.LLAMA_3_1_8B, OpenRouterModel.CLAUDE_HAIKU)
+    ENSEMBLE_TIMEOUT = 25
+    
+    # Stages of the same resource class running at once, across all generations
+    STAGE_LIMITS = {"llm": 16, "tts": 4, "image": 2}
+    
+    # Request deadline: time kept back for packaging, and each stage's expected
+    # duration until enough runs have been observed (the old fixed thresholds)
+    FINALIZE_RESERVE = 2.0
+    STAGE_ESTIMATES = {"text": 0.0, "retry": 20.0, "audio": 10.0, "image": 15.0, "image_fast": 8.0}
+    
+    # Client disconnects: how often the connection is checked, and what to keep
+    DISCONNECT_POLL_INTERVAL = 0.5
+    CANCELLATION_POLICY = CancellationPolicy.KEEP
+    
+    def __init__(self, timeout_seconds: int = 58, text_client=None, audio_concurrency: Optional[int] = None):  # 2s buffer for safety
         self.timeout_seconds = timeout_seconds
+        self.audio_concurrency = audio_concurrency or self.AUDIO_CONCURRENCY
         self.openrouter_client = OpenRouterClient()
+        
+        # Default narrative client: local Ollama when get_model_config() routes there
+        if text_client is None and get_model_config()["provider"] == "ollama":
+            text_client = OllamaClient()
+        self.text_client = text_client or self.openrouter_client
         self.cost_optimizer = CostOptimizer()
+        self.cost_reconciler = CostReconciler(
+            self.cost_optimizer,
+            cost_lookup=self.openrouter_client.fetch_generation_cost
+        )
         self.quality_checker = StoryQualityChecker()
         self.tts_client = ElevenLabsClient()
         self.image_client = StableDiffusionClient()
@@ -57,6 +114,49 @@ class StoryGenerator:
         self.timeout_failures = 0
         self.quality_failures = 0
         
+        # Served stories by id; refined versions replace drafts in place
+        self.stories: "OrderedDict[str, Dict]" = OrderedDict()
+        self._refinements: Dict[str, asyncio.Task] = {}
+        self.drafts_served = 0
+        self.refinements_swapped = 0
+        self.refinements_rejected = 0
+        self.refinement_failures = 0
+        
+        # Streaming delivery: chapter 1 first, the rest attached as it arrives
+        self._deliveries: Dict[str, asyncio.Task] = {}
+        self.streamed_stories = 0
+        self.delivery_failures = 0
+        self.first_chapter_times: Deque[float] = deque(maxlen=200)
+        self.complete_times: Deque[float] = deque(maxlen=200)
+        
+        # Ensemble statistics
+        self.ensemble_runs = 0
+        self.ensemble_accepted_early = 0
+        self.ensemble_best_at_deadline = 0
+        self.ensemble_failures = 0
+        self.ensemble_cancelled = 0
+        self.ensemble_wins: Dict[str, int] = {}
+        
+        # Stage graph: shared per-resource limits and critical-path statistics
+        self.stage_resources = ResourceLimits(self.STAGE_LIMITS)
+        self.stage_runs = 0
+        self.bounding_stages: Dict[str, int] = {}
+        self.stage_time: Dict[str, float] = {}
+        
+        # Deadline budgeting: observed stage durations and what did not fit
+        self.stage_latency = LatencyHistory(defaults=self.STAGE_ESTIMATES)
+        self.stages_skipped: Dict[str, int] = {}
+        self.stages_downgraded: Dict[str, int] = {}
+        
+        # Cancellation on client disconnect, with observed stage costs for the savings estimate
+        self.cancellation_policy = self.CANCELLATION_POLICY
+        self.cancelled_generations = 0
+        self.cancellation_cost_saved = 0.0
+        self.cancelled_artifacts_kept = 0
+        self.cancelled_artifacts_discarded = 0
+        self.stage_cost_totals: Dict[str, float] = {}
+        self.stage_cost_counts: Dict[str, int] = {}
+        
     async def generate_complete_story(
         self,
         premise: str,
@@ -64,7 +164,9 @@ class StoryGenerator:
         characters: str = "3 characters",
         include_audio: bool = True,
         include_image: bool = True,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        premium: bool = False,
+        artifacts: Optional[Dict] = None
     ) -> Dict:
         """
         Generate complete story with all assets in <60 seconds.
@@ -76,11 +178,16 @@ class StoryGenerator:
             include_audio: Whether to generate audio clips
             include_image: Whether to generate story image
             progress_callback: Optional callback for progress updates
+            premium: Race several models (ensemble mode) instead of retrying serially;
+                high-complexity requests always use it
+            artifacts: Optional dict receiving each stage's result as it finishes,
+                so a cancelled generation can still see what was produced
             
         Returns:
             Complete story with metadata, or error information
         """
         start_time = time.time()
+        deadline = Deadline(self.timeout_seconds)
         self.total_generations += 1
         
         try:
@@ -107,221 +214,922 @@ class StoryGenerator:
                     start_time
                 )
             
-            # Step 2: Generate narrative text (30s budget)
-            progress.status = GenerationStatus.GENERATING_TEXT
-            progress.current_task = "Generating story narrative"
-            progress.progress_percent = 10
-            progress.elapsed_time = time.time() - start_time
+            # Steps 2-5 run as a stage graph: each stage starts once its inputs exist
+            graph = self._build_story_graph(
+                premise, mood, characters, include_audio, include_image,
+                progress, progress_callback, start_time, deadline, complexity, optimal_model, premium,
+                artifacts
+            )
+            run = await graph.run(timeout=deadline.remaining())
+            self._record_stage_run(run)
             
-            if progress_callback:
-                progress_callback(progress)
+            for stage in ("text", "quality", "package"):
+                error = run.errors.get(stage)
+                if isinstance(error, NarrativeGenerationError):
+                    return self._create_error_response("narrative_generation_failed", str(error), start_time)
+                if error is not None and not isinstance(error, asyncio.CancelledError):
+                    raise error
             
-            # Check timeout before major operation
-            if progress.elapsed_time > self.timeout_seconds * 0.5:  # 50% timeout check
-                return self._create_timeout_response(start_time)
+            if run.timed_out or "package" not in run.results:
+                raise asyncio.TimeoutError()
             
-            narrative_result = await asyncio.wait_for(
-                self._generate_narrative_with_fallback(premise, mood, characters),
-                timeout=30
-            )
+            final_story = run.results["package"]
+            final_story["generation"]["critical_path"] = run.report()["critical_path"]
             
-            if "error" in narrative_result:
-                return self._create_error_response(
-                    "narrative_generation_failed",
-                    narrative_result["error"],
-                    start_time
-                )
+            # Final timeout check
+            total_time = time.time() - start_time
+            if total_time > self.timeout_seconds:
+                self.timeout_failures += 1
+                return self._create_timeout_response(start_time)
             
-            # Step 3: Quality check (5s budget)
-            progress.status = GenerationStatus.QUALITY_CHECK
-            progress.current_task = "Checking story quality"
-            progress.progress_percent = 50
-            progress.elapsed_time = time.time() - start_time
+            # Success!
+            self.successful_generations += 1
+            progress.status = GenerationStatus.COMPLETED
+            progress.progress_percent = 100
+            progress.elapsed_time = total_time
             
             if progress_callback:
                 progress_callback(progress)
             
-            quality_result = self.quality_checker.check_story_quality(narrative_result)
+            return final_story
             
-            # If quality is too low, attempt one retry with different model
-            if not quality_result.valid and progress.elapsed_time < 35:
-                print("Quality check failed, attempting retry with different model")
-                
-                retry_model = "anthropic/claude-3-haiku" if optimal_model == "google/gemini-flash-1.5" else "google/gemini-flash-1.5"
-                
-                retry_result = await asyncio.wait_for(
-                    self._generate_narrative_specific_model(premise, mood, characters, retry_model),
-                    timeout=20
-                )
-                
-                if "error" not in retry_result:
-                    retry_quality = self.quality_checker.check_story_quality(retry_result)
-                    if retry_quality.score > quality_result.score:
-                        narrative_result = retry_result
-                        quality_result = retry_quality
-            
-            # Step 4: Parallel audio and image generation (20s budget remaining)
-            progress.current_task = "Generating multimedia content"
-            progress.progress_percent = 70
-            progress.elapsed_time = time.time() - start_time
+        except asyncio.TimeoutError:
+            self.timeout_failures += 1
+            return self._create_timeout_response(start_time)
             
+        except Exception as e:
+            return self._create_error_response(
+                "unexpected_error",
+                str(e),
+                start_time
+            )
+    
+    def _build_story_graph(
+        self,
+        premise: str,
+        mood: str,
+        characters: str,
+        include_audio: bool,
+        include_image: bool,
+        progress: GenerationProgress,
+        progress_callback: Optional[callable],
+        start_time: float,
+        deadline: Deadline,
+        complexity: TaskComplexity,
+        optimal_model: str,
+        premium: bool,
+        artifacts: Optional[Dict] = None
+    ) -> TaskGraph:
+        """
+        Stages of a complete story: text -> quality -> audio -> package, with
+        image -> package branching off text. The image only needs the premise,
+        mood and opening chapter, so it starts alongside the quality check
+        instead of after it.
+        
+        Every stage takes its timeout from the request deadline, keeping
+        FINALIZE_RESERVE for packaging, and skips (or, for the image,
+        downgrades) itself when its observed p90 no longer fits.
+        """
+        
+        def report(status: Optional[GenerationStatus], task: str, percent: int):
+            if status is not None:
+                progress.status = status
+            progress.current_task = task
+            progress.progress_percent = max(progress.progress_percent, percent)
+            progress.elapsed_time = time.time() - start_time
             if progress_callback:
                 progress_callback(progress)
+        
+        def fits(stage: str) -> bool:
+            return deadline.fits(self.stage_latency.p90(stage), reserve=self.FINALIZE_RESERVE)
+        
+        def skip(stage: str):
+            self.stages_skipped[stage] = self.stages_skipped.get(stage, 0) + 1
+        
+        async def timed(stage: str, coroutine):
+            """Run a stage's work within the deadline and record how long it took"""
+            started = time.monotonic()
+            try:
+                return await asyncio.wait_for(coroutine, timeout=deadline.timeout(reserve=self.FINALIZE_RESERVE))
+            finally:
+                self.stage_latency.record(stage, time.monotonic() - started)
+        
+        async def text_stage(results: Dict) -> Tuple[Dict, Optional[QualityResult]]:
+            # Step 2: Generate narrative text
+            report(GenerationStatus.GENERATING_TEXT, "Generating story narrative", 10)
             
-            # Check remaining time
-            remaining_time = self.timeout_seconds - progress.elapsed_time
-            if remaining_time < 5:  # Not enough time for multimedia
-                include_audio = False
-                include_image = False
-            
-            multimedia_tasks = []
-            
-            if include_audio and remaining_time > 10:
-                multimedia_tasks.append(self._generate_audio_clips(narrative_result))
-            
-            if include_image and remaining_time > 15:
-                multimedia_tasks.append(self._generate_story_image(premise, mood, narrative_result))
-            
-            # Execute multimedia generation in parallel
-            multimedia_results = []
-            if multimedia_tasks:
-                try:
-                    multimedia_timeout = min(remaining_time - 2, 20)  # Reserve 2s for finalization
-                    multimedia_results = await asyncio.wait_for(
-                        asyncio.gather(*multimedia_tasks, return_exceptions=True),
-                        timeout=multimedia_timeout
-                    )
-                except asyncio.TimeoutError:
-                    print("Multimedia generation timed out, proceeding with text only")
-                    multimedia_results = []
+            if not fits("text"):
+                # The story cannot finish in time: fail now rather than at the deadline
+                skip("text")
+                raise DeadlineExceeded("Not enough time left to generate the narrative")
             
-            # Step 5: Finalize response
-            progress.status = GenerationStatus.COMPLETED
-            progress.current_task = "Finalizing story"
-            progress.progress_percent = 95
-            progress.elapsed_time = time.time() - start_time
+            text_deadline = deadline.child(deadline.timeout(reserve=self.FINALIZE_RESERVE))
+            if premium or complexity == TaskComplexity.HIGH:
+                # Already quality-checked; replaces the serial retry below
+                narrative_result, quality_result = await timed("text", self._generate_narrative_ensemble(
+                    premise, mood, characters, complexity=complexity, deadline=text_deadline
+                ))
+            else:
+                narrative_result = await timed("text", self._generate_narrative_with_fallback(
+                    premise, mood, characters, deadline=text_deadline
+                ))
+                quality_result = None
             
-            if progress_callback:
-                progress_callback(progress)
+            if "error" in narrative_result:
+                raise NarrativeGenerationError(narrative_result["error"])
+            return narrative_result, quality_result
+        
+        async def quality_stage(results: Dict) -> Tuple[Dict, QualityResult]:
+            # Step 3: Quality check
+            narrative_result, quality_result = results["text"]
+            report(GenerationStatus.QUALITY_CHECK, "Checking story quality", 50)
             
-            # Compile final response
-            final_story = self._compile_final_story(
+            if quality_result is None:
+                quality_result = self.quality_checker.check_story_quality(narrative_result)
+                self._record_quality(narrative_result, complexity, quality_result)
+                
+                # If quality is too low, attempt one retry with different model
+                if not quality_result.valid:
+                    if not fits("retry"):
+                        skip("retry")
+                        return narrative_result, quality_result
+                    
+                    print("Quality check failed, attempting retry with different model")
+                    
+                    retry_model = "anthropic/claude-3-haiku" if optimal_model == "google/gemini-flash-1.5" else "google/gemini-flash-1.5"
+                    
+                    retry_result = await timed("retry", self._generate_narrative_specific_model(
+                        premise, mood, characters, retry_model, deadline=deadline
+                    ))
+                    
+                    if "error" not in retry_result:
+                        retry_quality = self.quality_checker.check_story_quality(retry_result)
+                        self._record_quality(retry_result, complexity, retry_quality)
+                        if retry_quality.score > quality_result.score:
+                            narrative_result = retry_result
+                            quality_result = retry_quality
+            
+            return narrative_result, quality_result
+        
+        async def media_stage(stage: str, generate) -> Optional[Dict]:
+            # Step 4: Image within the time left (audio bounds itself per chapter)
+            try:
+                return await timed(stage, generate())
+            except asyncio.TimeoutError:
+                print(f"{stage.capitalize()} generation ran out of time, proceeding without it")
+                return None
+        
+        async def image_stage(results: Dict) -> Optional[Dict]:
+            if not include_image:
+                return None
+            narrative_result = results["text"][0]
+            
+            if fits("image"):
+                stage, fast = "image", False
+            elif fits("image_fast"):
+                stage, fast = "image_fast", True
+                self.stages_downgraded["image"] = self.stages_downgraded.get("image", 0) + 1
+            else:
+                skip("image")
+                return None
+            
+            return await media_stage(stage, lambda: self._generate_story_image(
+                premise, mood, narrative_result, fast=fast, deadline=deadline
+            ))
+        
+        async def audio_stage(results: Dict) -> Optional[Dict]:
+            if not include_audio:
+                return None
+            if not fits("audio"):
+                skip("audio")
+                return None
+            report(None, "Generating multimedia content", 70)
+            narrative_result = results["quality"][0]
+            
+            # Bounds itself by the deadline so clips finished in time are kept
+            started = time.monotonic()
+            try:
+                return await self._generate_audio_clips(narrative_result, deadline=deadline)
+            finally:
+                self.stage_latency.record("audio", time.monotonic() - started)
+        
+        async def package_stage(results: Dict) -> Dict:
+            # Step 5: Finalize response
+            report(GenerationStatus.COMPLETED, "Finalizing story", 95)
+            narrative_result, quality_result = results["quality"]
+            multimedia_results = [
+                results[stage] for stage in ("audio", "image") if results.get(stage) is not None
+            ]
+            return self._compile_final_story(
                 narrative_result,
                 quality_result,
                 multimedia_results,
                 start_time,
                 optimal_model
             )
+        
+        def finished(stage: str, func):
+            """Record a stage's cost and publish its result as soon as it finishes"""
+            async def run(results: Dict):
+                value = await func(results)
+                self._record_stage_cost(stage, value)
+                if artifacts is not None:
+                    artifacts[stage] = value
+                return value
+            return run
+        
+        graph = TaskGraph(self.stage_resources)
+        graph.add("text", finished("text", text_stage), resource="llm")
+        graph.add("quality", finished("quality", quality_stage), deps=("text",), resource="llm")
+        graph.add("image", finished("image", image_stage), deps=("text",), resource="image", optional=True)
+        graph.add("audio", finished("audio", audio_stage), deps=("quality",), resource="tts", optional=True)
+        graph.add("package", package_stage, deps=("quality", "audio", "image"))
+        return graph
+    
+    def _record_stage_run(self, run: GraphRun):
+        """Count which stage bounded each generation's latency"""
+        self.stage_runs += 1
+        if run.critical_path:
+            bounding = max(run.critical_path, key=lambda name: run.timings[name].duration)
+            self.bounding_stages[bounding] = self.bounding_stages.get(bounding, 0) + 1
+        for name, timing in run.timings.items():
+            self.stage_time[name] = self.stage_time.get(name, 0.0) + timing.duration
+    
+    def _record_stage_cost(self, stage: str, value):
+        """Track what each billable stage costs when it runs to completion"""
+        if stage == "text":
+            cost = value[0].get("generation_cost")
+        elif stage == "audio" and value is not None:
+            cost = value.get("total_cost")
+        elif stage == "image" and value is not None:
+            cost = value.get("cost")
+        else:
+            return
+        if isinstance(cost, (int, float)):
+            self.stage_cost_totals[stage] = self.stage_cost_totals.get(stage, 0.0) + cost
+            self.stage_cost_counts[stage] = self.stage_cost_counts.get(stage, 0) + 1
+    
+    async def generate_story_for_client(
+        self,
+        premise: str,
+        mood: str = "neutral",
+        characters: str = "3 characters",
+        is_disconnected: Optional[DisconnectCheck] = None,
+        include_audio: bool = True,
+        include_image: bool = True,
+        premium: bool = False
+    ) -> Dict:
+        """
+        Generate a complete story for an HTTP client, stopping if it goes away.
+        
+        is_disconnected is polled during generation (FastAPI's
+        Request.is_disconnected). On disconnect the generation is cancelled,
+        which aborts every in-flight provider request; stages that already
+        finished are kept or discarded according to cancellation_policy.
+        
+        Returns:
+            The complete story, or a client_disconnected error response that
+            carries a story_id when finished stages were kept
+        """
+        if is_disconnected is None:
+            return await self.generate_complete_story(
+                premise, mood, characters, include_audio, include_image, premium=premium
+            )
+        
+        start_time = time.time()
+        artifacts: Dict = {}
+        try:
+            return await run_until_disconnected(
+                self.generate_complete_story(
+                    premise, mood, characters, include_audio, include_image,
+                    premium=premium, artifacts=artifacts
+                ),
+                is_disconnected,
+                poll_interval=self.DISCONNECT_POLL_INTERVAL
+            )
+        except ClientDisconnected:
+            return self._abandon_story(artifacts, include_audio, include_image, start_time)
+    
+    def _abandon_story(self, artifacts: Dict, include_audio: bool, include_image: bool, start_time: float) -> Dict:
+        """Account for a generation cancelled by a disconnect and apply the cancellation policy"""
+        self.cancelled_generations += 1
+        
+        # Stages that never finished cost nothing more; estimate what they would have cost
+        requested = ["text"] + (["audio"] if include_audio else []) + (["image"] if include_image else [])
+        saved = sum(
+            self.stage_cost_totals.get(stage, 0.0) / self.stage_cost_counts[stage]
+            for stage in requested
+            if stage not in artifacts and self.stage_cost_counts.get(stage)
+        )
+        self.cancellation_cost_saved += saved
+        
+        response = self._create_error_response(
+            "client_disconnected", "Client disconnected - generation cancelled", start_time
+        )
+        response["estimated_cost_saved"] = round(saved, 6)
+        
+        narrative = artifacts.get("quality") or artifacts.get("text")
+        if narrative is None:
+            return response
+        
+        if self.cancellation_policy == CancellationPolicy.DISCARD:
+            self.cancelled_artifacts_discarded += 1
+            return response
+        
+        story_id = str(uuid.uuid4())
+        self._store_story(story_id, narrative[0], narrative[1], "partial", refinement=None)
+        self.stories[story_id]["multimedia"] = {
+            stage: artifacts[stage] for stage in ("audio", "image") if artifacts.get(stage) is not None
+        }
+        self.cancelled_artifacts_kept += 1
+        response["story_id"] = story_id
+        return response
+    
+    async def generate_progressive_story(
+        self,
+        premise: str,
+        mood: str = "neutral",
+        characters: str = "3 characters"
+    ) -> Dict:
+        """
+        Serve a cheap draft immediately and refine it in the background.
+        
+        The draft comes from the ultra-cheap tier. A quality-tier model then
+        rewrites it, and the stored story is swapped for the rewrite only if
+        it passes the quality checker with a higher score. Use get_story()
+        with the returned story_id to fetch the current version.
+        
+        Args:
+            premise: Story premise/setting
+            mood: Story mood/tone
+            characters: Character description
             
-            # Final timeout check
-            total_time = time.time() - start_time
-            if total_time > self.timeout_seconds:
+        Returns:
+            Draft story response with story_id, or error information
+        """
+        start_time = time.time()
+        self.total_generations += 1
+        draft_model = get_tier_model(self.DRAFT_TIER)["model"]
+        
+        try:
+            draft = await asyncio.wait_for(
+                self._generate_narrative_specific_model(premise, mood, characters, draft_model),
+                timeout=self.DRAFT_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            draft = {"error": f"Draft generation exceeded {self.DRAFT_TIMEOUT}s"}
+        
+        if "error" in draft or draft.get("fallback_generated"):
+            # Cheap tier unavailable or unusable: serve the regular pipeline's text
+            print(f"Draft generation failed ({draft.get('error', 'unstructured output')}), using standard generation")
+            try:
+                draft = await asyncio.wait_for(
+                    self._generate_narrative_with_fallback(premise, mood, characters),
+                    timeout=30
+                )
+            except asyncio.TimeoutError:
                 self.timeout_failures += 1
                 return self._create_timeout_response(start_time)
             
-            # Success!
-            self.successful_generations += 1
-            progress.status = GenerationStatus.COMPLETED
-            progress.progress_percent = 100
-            progress.elapsed_time = total_time
-            
-            if progress_callback:
-                progress_callback(progress)
-            
-            return final_story
+            if "error" in draft:
+                return self._create_error_response(
+                    "narrative_generation_failed",
+                    draft["error"],
+                    start_time
+                )
+        
+        quality = self.quality_checker.check_story_quality(draft)
+        story_id = uuid.uuid4().hex
+        self._store_story(story_id, draft, quality, "draft")
+        self._refinements[story_id] = asyncio.ensure_future(
+            self._refine_story(story_id, premise, mood, characters)
+        )
+        
+        self.drafts_served += 1
+        self.successful_generations += 1
+        
+        response = self._compile_final_story(draft, quality, [], start_time, draft.get("model_used", draft_model))
+        response.update({"story_id": story_id, "version": "draft", "refinement": "pending"})
+        return response
+    
+    def get_story(self, story_id: str) -> Optional[Dict]:
+        """Current version of a progressively generated story"""
+        entry = self.stories.get(story_id)
+        if entry is None:
+            return None
+        
+        quality = entry["quality"]
+        response = {
+            "story_id": story_id,
+            "story": entry["story"],
+            "quality": {
+                "score": quality.score,
+                "human_likeness": quality.human_likeness_score,
+                "word_count": quality.word_count,
+                "valid": quality.valid,
+                "issues": len(quality.issues)
+            } if quality is not None else None,
+            "version": entry["version"],
+            "refinement": entry["refinement"]
+        }
+        if "delivery" in entry:
+            delivery = entry["delivery"]
+            response["delivery"] = {
+                key: delivery[key] for key in ("status", "chapters_ready", "time_to_first_chapter", "time_to_complete")
+            }
+            response["multimedia"] = {
+                key: value for key, value in (("audio", delivery["audio"]), ("image", delivery["image"])) if value
+            }
+        elif "multimedia" in entry:
+            response["multimedia"] = entry["multimedia"]
+        return response
+    
+    async def wait_for_refinement(self, story_id: str) -> Optional[Dict]:
+        """Wait for a story's background refinement, then return the current version"""
+        task = self._refinements.get(story_id)
+        if task is not None:
+            await asyncio.shield(task)
+        return self.get_story(story_id)
+    
+    async def generate_streaming_story(
+        self,
+        premise: str,
+        mood: str = "neutral",
+        characters: str = "3 characters",
+        include_audio: bool = True,
+        include_image: bool = True
+    ) -> Dict:
+        """
+        Return chapter 1 as soon as its text, audio and illustration are ready.
+        
+        The story text is streamed chapter by chapter. Chapter 1's key-sentence
+        audio and the story illustration start the moment chapter 1 has
+        streamed; later chapters and their audio keep generating in the
+        background and are attached to the same story_id. Use get_story() or
+        wait_for_story() to fetch them.
+        
+        Args:
+            premise: Story premise/setting
+            mood: Story mood/tone
+            characters: Character description
+            include_audio: Whether to narrate each chapter's key sentence
+            include_image: Whether to generate the story image
             
+        Returns:
+            First-chapter response with story_id, or error information
+        """
+        start_time = time.time()
+        self.total_generations += 1
+        self.streamed_stories += 1
+        
+        story_id = uuid.uuid4().hex
+        first_chapter = asyncio.get_running_loop().create_future()
+        self._store_story(story_id, {"title": None, "chapters": []}, None, "streaming", refinement=None)
+        self.stories[story_id]["delivery"] = {
+            "status": "generating",
+            "chapters_ready": 0,
+            "audio": [],
+            "image": None,
+            "time_to_first_chapter": None,
+            "time_to_complete": None
+        }
+        
+        task = asyncio.ensure_future(self._deliver_story(
+            story_id, premise, mood, characters, include_audio, include_image, start_time, first_chapter
+        ))
+        self._deliveries[story_id] = task
+        
+        try:
+            first = await asyncio.wait_for(asyncio.shield(first_chapter), timeout=self.timeout_seconds)
         except asyncio.TimeoutError:
+            task.cancel()
             self.timeout_failures += 1
             return self._create_timeout_response(start_time)
+        
+        if "error" in first:
+            return self._create_error_response("narrative_generation_failed", first["error"], start_time)
+        
+        self.successful_generations += 1
+        multimedia = {}
+        if first.get("audio") is not None:
+            multimedia["audio"] = first["audio"]
+        if first.get("image") is not None:
+            multimedia["image"] = first["image"]
+        
+        return {
+            "success": True,
+            "story_id": story_id,
+            "version": "streaming",
+            "title": first["title"],
+            "chapter": first["chapter"],
+            "multimedia": multimedia,
+            "generation": {
+                "time_to_first_chapter": round(first["elapsed"], 2),
+                "timeout_limit": self.timeout_seconds
+            },
+            "remaining": "generating"
+        }
+    
+    async def wait_for_story(self, story_id: str) -> Optional[Dict]:
+        """Wait for a streamed story's remaining chapters, then return it"""
+        task = self._deliveries.get(story_id)
+        if task is not None:
+            await asyncio.shield(task)
+        return self.get_story(story_id)
+    
+    async def _deliver_story(
+        self,
+        story_id: str,
+        premise: str,
+        mood: str,
+        characters: str,
+        include_audio: bool,
+        include_image: bool,
+        start_time: float,
+        first_chapter: asyncio.Future
+    ):
+        """Consume the text stream, narrating chapters as they arrive and publishing chapter 1 early"""
+        entry = self.stories[story_id]
+        delivery = entry["delivery"]
+        chapter_tasks: List[asyncio.Task] = []
+        title = None
+        
+        def start_chapter(chapter: Dict):
+            index = len(chapter_tasks)
+            entry["story"]["chapters"].append(chapter)
+            chapter_tasks.append(asyncio.ensure_future(self._prepare_chapter(
+                entry, index, chapter, premise, mood, title, include_audio, include_image and index == 0
+            )))
+            if index == 0:
+                chapter_tasks[0].add_done_callback(
+                    lambda done: self._publish_first_chapter(done, entry, title, start_time, first_chapter)
+                )
+        
+        try:
+            async for event in self.text_client.generate_story_stream(premise, mood, characters):
+                if event["type"] == "title":
+                    title = event["title"]
+                    entry["story"]["title"] = title
+                
+                elif event["type"] == "chapter":
+                    start_chapter(event["chapter"])
+                
+                elif event["type"] == "complete":
+                    story = event["story"]
+                    self._record_narrative_cost(story)
+                    title = story.get("title", title)
+                    # Chapters the stream parser could not emit early
+                    for chapter in story.get("chapters", [])[len(chapter_tasks):]:
+                        start_chapter(chapter)
+                    
+                    await asyncio.gather(*chapter_tasks)
+                    entry["story"] = story
+                    entry["quality"] = self.quality_checker.check_story_quality(story)
+                    delivery["status"] = "complete"
+                    delivery["time_to_complete"] = time.time() - start_time
+                    self.complete_times.append(delivery["time_to_complete"])
+                
+                elif event["type"] == "error":
+                    delivery["status"] = "failed"
+                    delivery["error"] = event["error"]
+            
+            if delivery["status"] == "generating":
+                delivery["status"] = "failed"
+                delivery["error"] = "Story stream ended before the story was complete"
+            if not chapter_tasks and not first_chapter.done():
+                first_chapter.set_result({"error": delivery["error"]})
+                
+        except asyncio.CancelledError:
+            delivery["status"] = "cancelled"
+            for task in chapter_tasks:
+                task.cancel()
+            raise
             
         except Exception as e:
-            return self._create_error_response(
-                "unexpected_error",
-                str(e),
-                start_time
+            print(f"Streaming delivery failed: {e}")
+            delivery["status"] = "failed"
+            delivery["error"] = str(e)
+            if not first_chapter.done():
+                first_chapter.set_result({"error": f"Narrative generation failed: {e}"})
+            
+        finally:
+            if delivery["status"] != "complete":
+                self.delivery_failures += 1
+            self._deliveries.pop(story_id, None)
+    
+    async def _prepare_chapter(
+        self,
+        entry: Dict,
+        index: int,
+        chapter: Dict,
+        premise: str,
+        mood: str,
+        title: Optional[str],
+        include_audio: bool,
+        include_image: bool
+    ) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """Generate one chapter's audio (and, for chapter 1, the story image) and attach them"""
+        
+        async def bounded(coroutine) -> Optional[Dict]:
+            try:
+                return await asyncio.wait_for(coroutine, timeout=self.CHAPTER_MEDIA_TIMEOUT)
+            except Exception as e:
+                print(f"Chapter {index + 1} media failed: {e}")
+                return None
+        
+        async def nothing() -> None:
+            return None
+        
+        audio, image = await asyncio.gather(
+            bounded(self._generate_chapter_audio(chapter, index)) if include_audio else nothing(),
+            bounded(self._generate_story_image(
+                premise, mood, {"title": title or "Untitled Story", "chapters": [chapter]}
+            )) if include_image else nothing()
+        )
+        
+        delivery = entry["delivery"]
+        if audio is not None:
+            delivery["audio"].append(audio)
+            delivery["audio"].sort(key=lambda clip: clip["chapter_id"])
+        if image is not None:
+            delivery["image"] = image
+        delivery["chapters_ready"] += 1
+        return audio, image
+    
+    def _publish_first_chapter(
+        self,
+        done: asyncio.Task,
+        entry: Dict,
+        title: Optional[str],
+        start_time: float,
+        first_chapter: asyncio.Future
+    ):
+        """Resolve the caller's wait once chapter 1 and its media are ready"""
+        if first_chapter.done() or done.cancelled():
+            return
+        if done.exception() is not None:
+            first_chapter.set_result({"error": f"Chapter 1 preparation failed: {done.exception()}"})
+            return
+        
+        audio, image = done.result()
+        elapsed = time.time() - start_time
+        entry["delivery"]["time_to_first_chapter"] = elapsed
+        self.first_chapter_times.append(elapsed)
+        first_chapter.set_result({
+            "title": entry["story"].get("title") or title,
+            "chapter": entry["story"]["chapters"][0],
+            "audio": audio,
+            "image": image,
+            "elapsed": elapsed
+        })
+    
+    async def _refine_story(self, story_id: str, premise: str, mood: str, characters: str):
+        """Rewrite a stored draft and swap it in if the rewrite scores higher"""
+        entry = self.stories.get(story_id)
+        if entry is None:
+            self._refinements.pop(story_id, None)
+            return
+        
+        refine_model = OpenRouterModel(get_tier_model(self.REFINE_TIER)["model"])
+        
+        try:
+            refined = await self.openrouter_client.refine_story(
+                entry["story"], premise, mood, characters, model=refine_model
             )
+            self._record_narrative_cost(refined)
+            
+            if "error" in refined or refined.get("fallback_generated"):
+                self.refinement_failures += 1
+                entry["refinement"] = "failed"
+                return
+            
+            quality = self.quality_checker.check_story_quality(refined)
+            if quality.valid and quality.score > entry["quality"].score:
+                entry.update({"story": refined, "quality": quality, "version": "refined", "refinement": "swapped"})
+                self.refinements_swapped += 1
+            else:
+                entry["refinement"] = "kept_draft"
+                self.refinements_rejected += 1
+                
+        except Exception as e:
+            print(f"Story refinement failed: {e}")
+            self.refinement_failures += 1
+            entry["refinement"] = "failed"
+            
+        finally:
+            self._refinements.pop(story_id, None)
     
-    async def _generate_narrative_with_fallback(self, premise: str, mood: str, characters: str) -> Dict:
+    def _store_story(
+        self,
+        story_id: str,
+        story: Dict,
+        quality: Optional[QualityResult],
+        version: str,
+        refinement: Optional[str] = "pending"
+    ):
+        """Remember a served story, dropping the oldest beyond the store limit"""
+        self.stories[story_id] = {
+            "story": story,
+            "quality": quality,
+            "version": version,
+            "refinement": refinement
+        }
+        while len(self.stories) > self.MAX_STORED_STORIES:
+            self.stories.popitem(last=False)
+    
+    async def _generate_narrative_with_fallback(
+        self, premise: str, mood: str, characters: str, deadline: Optional[Deadline] = None
+    ) -> Dict:
         """Generate narrative with automatic fallback"""
         try:
-            result = await self.openrouter_client.generate_story(premise, mood, characters)
-            
-            # Record cost
-            if "generation_cost" in result:
-                # Note: We'd need token info from response to record accurately
-                # For now, record estimated cost
-                self.cost_optimizer.record_request(
-                    result.get("model_used", "unknown"),
-                    500,  # Estimated input tokens
-                    1500,  # Estimated output tokens
-                    success="error" not in result
-                )
-            
+            result = await self.text_client.generate_story(premise, mood, characters, deadline=deadline)
+            self._record_narrative_cost(result)
             return result
             
         except Exception as e:
             return {"error": f"Narrative generation failed: {str(e)}"}
     
-    async def _generate_narrative_specific_model(self, premise: str, mood: str, characters: str, model: str) -> Dict:
+    async def _generate_narrative_specific_model(
+        self, premise: str, mood: str, characters: str, model: str, deadline: Optional[Deadline] = None
+    ) -> Dict:
         """Generate narrative using specific model"""
-        # This would require modifying the OpenRouter client to accept specific models
-        # For now, use the standard generation method
-        return await self._generate_narrative_with_fallback(premise, mood, characters)
+        try:
+            openrouter_model = OpenRouterModel(model)
+        except ValueError:
+            # Not an OpenRouter model we know: use the standard generation method
+            return await self._generate_narrative_with_fallback(premise, mood, characters, deadline=deadline)
+        
+        try:
+            result = await self.openrouter_client.generate_story_with_model(
+                premise, mood, characters, openrouter_model, deadline=deadline
+            )
+            self._record_narrative_cost(result)
+            return result
+            
+        except Exception as e:
+            return {"error": f"Narrative generation failed: {str(e)}"}
     
-    async def _generate_audio_clips(self, story: Dict) -> Dict:
-        """Generate audio clips for key story moments using ElevenLabs"""
+    async def _generate_narrative_ensemble(
+        self,
+        premise: str,
+        mood: str,
+        characters: str,
+        models: Optional[Tuple[OpenRouterModel, ...]] = None,
+        timeout: Optional[float] = None,
+        complexity: TaskComplexity = TaskComplexity.HIGH,
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[Dict, Optional[QualityResult]]:
+        """
+        Race several models and keep the first story that passes the quality check.
+        
+        Each result is scored as it arrives. The first valid story wins and the
+        other requests are cancelled; if none passes by the deadline (the
+        ensemble timeout, or the request deadline if that comes first), the
+        best-scoring story so far is used.
+        
+        Returns:
+            Tuple of (narrative or error dict, its quality result)
+        """
+        models = models or self.ENSEMBLE_MODELS
+        limit = timeout or self.ENSEMBLE_TIMEOUT
+        deadline = deadline.child(limit) if deadline is not None else Deadline(limit)
+        self.ensemble_runs += 1
+        
+        tasks = {
+            asyncio.ensure_future(
+                self.openrouter_client.generate_story_with_model(premise, mood, characters, model, deadline=deadline)
+            ): model
+            for model in models
+        }
+        pending = set(tasks)
+        best: Optional[Tuple[Dict, QualityResult]] = None
+        errors = []
+        
         try:
+            while pending:
+                remaining = deadline.remaining()
+                if remaining <= 0:
+                    break
+                
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in done:
+                    model = tasks[task]
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        result = {"error": str(e)}
+                    
+                    if "error" in result:
+                        errors.append(f"{model.value}: {result['error']}")
+                        continue
+                    
+                    self._record_narrative_cost(result)
+                    quality = self.quality_checker.check_story_quality(result)
+                    self._record_quality(result, complexity, quality)
+                    if best is None or quality.score > best[1].score:
+                        best = (result, quality)
+                    
+                    if quality.valid:
+                        self.ensemble_accepted_early += 1
+                        self._record_ensemble_win(result)
+                        return result, quality
+        finally:
+            for task in pending:
+                task.cancel()
+            self.ensemble_cancelled += len(pending)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        if best is None:
+            self.ensemble_failures += 1
+            return {"error": "All ensemble models failed", "errors": errors}, None
+        
+        self.ensemble_best_at_deadline += 1
+        self._record_ensemble_win(best[0])
+        return best
+    
+    def _record_ensemble_win(self, result: Dict):
+        model = result.get("model_used", "unknown")
+        self.ensemble_wins[model] = self.ensemble_wins.get(model, 0) + 1
+    
+    def _record_quality(self, result: Dict, complexity: TaskComplexity, quality: QualityResult):
+        """Feed a quality-check outcome to the cost optimizer's model selector"""
+        model = (result.get("model_response") or {}).get("model") or result.get("model_used")
+        if model:
+            self.cost_optimizer.model_selector.record_quality(model, complexity, quality.valid)
+    
+    def _record_narrative_cost(self, result: Dict):
+        """Queue a narrative request for background cost accounting"""
+        if "generation_cost" not in result:
+            return
+        if result.get("cache_hit") or result.get("similar_cache_hit") or result.get("coalesced"):
+            # Served without a provider request of its own
+            return
+        
+        response = result.get("model_response") or {}
+        self.cost_reconciler.record(CostEvent(
+            model=response.get("model") or result.get("model_used", "unknown"),
+            usage=response.get("usage") or {},
+            generation_id=response.get("id"),
+            success="error" not in result,
+            latency=response.get("request_time")
+        ))
+    
+    async def _generate_audio_clips(self, story: Dict, deadline: Optional[Deadline] = None) -> Dict:
+        """
+        Generate audio clips for key story moments using ElevenLabs.
+        
+        Chapters are narrated concurrently, at most audio_concurrency at a
+        time, and returned in chapter order. Chapters that fail, or are still
+        running when the deadline leaves only FINALIZE_RESERVE, are left out
+        and the rest of the clips are kept.
+        """
+        tasks = []
+        try:
+            semaphore = asyncio.Semaphore(self.audio_concurrency)
+            
+            async def narrate(chapter: Dict, index: int) -> Optional[Dict]:
+                async with semaphore:
+                    return await self._generate_chapter_audio(chapter, index, deadline=deadline)
+            
+            tasks = [
+                asyncio.ensure_future(narrate(chapter, i))
+                for i, chapter in enumerate(story.get("chapters", []))
+            ]
+            timeout = deadline.timeout(reserve=self.FINALIZE_RESERVE) if deadline is not None else None
+            if tasks:
+                await asyncio.wait(tasks, timeout=timeout)
+            
             audio_clips = []
             total_generation_time = 0
             total_cost = 0.0
+            failed_chapters = []
+            timed_out_chapters = []
+            errors = []
             
-            for i, chapter in enumerate(story.get("chapters", [])):
-                # Extract key sentences for audio
-                chapter_text = chapter.get("text", "")
-                sentences = [s.strip() for s in chapter_text.split('.') if s.strip()]
-                
-                # Select most impactful sentence (simplified logic)
-                if sentences:
-                    key_sentence = max(sentences, key=len)[:200]  # Limit to 200 chars for cost
-                    
-                    # Generate audio using ElevenLabs
-                    audio_result = await self.tts_client.generate_speech(
-                        text=key_sentence,
-                        voice="rachel",  # Professional female narrator
-                        model=TTSModel.FLASH_V2_5,  # Fast generation for <60s requirement
-                        voice_settings=VoiceSettings(
-                            stability=0.7,        # More stable for narration
-                            similarity_boost=0.8, # Consistent voice
-                            style=0.1,           # Minimal style for natural reading
-                            use_speaker_boost=True
-                        ),
-                        save_path=f"audio/chapter_{i+1}.mp3"
-                    )
-                    
-                    if audio_result["success"]:
-                        audio_clips.append({
-                            "chapter_id": chapter.get("id", i + 1),
-                            "text": key_sentence,
-                            "audio_path": audio_result.get("audio_path"),
-                            "audio_data": audio_result.get("audio_data"),
-                            "duration": audio_result["usage"].characters_used * 0.05,  # Approx 0.05s per char
-                            "voice_used": audio_result["voice_used"],
-                            "generation_time": audio_result["generation_time"],
-                            "cost": audio_result["usage"].cost_estimate
-                        })
-                        
-                        total_generation_time += audio_result["generation_time"]
-                        total_cost += audio_result["usage"].cost_estimate
-                    else:
-                        # Fallback to mock if TTS fails
-                        audio_clips.append({
-                            "chapter_id": chapter.get("id", i + 1),
-                            "text": key_sentence,
-                            "audio_url": f"https://mock-tts-api.com/audio/{i+1}.mp3",
-                            "duration": len(key_sentence.split()) * 0.5,
-                            "voice_id": "narrator_fallback",
-                            "error": audio_result.get("error")
-                        })
+            for i, task in enumerate(tasks):
+                if not task.done():
+                    timed_out_chapters.append(i + 1)
+                    continue
+                if task.exception() is not None:
+                    failed_chapters.append(i + 1)
+                    errors.append(str(task.exception()))
+                    continue
+                clip = task.result()
+                if clip is not None:
+                    audio_clips.append(clip)
+                    total_generation_time += clip.get("generation_time", 0)
+                    total_cost += clip.get("cost", 0.0)
+            
+            if not audio_clips and (failed_chapters or timed_out_chapters):
+                error = errors[0] if errors else "Deadline exceeded before any chapter was narrated"
+                return {
+                    "success": False,
+                    "error": f"TTS generation failed: {error}",
+                    "audio_clips": [],
+                    "provider": "fallback_mock"
+                }
             
             return {
                 "success": True,
@@ -331,6 +1139,8 @@ class StoryGenerator:
                 "total_generation_time": total_generation_time,
                 "total_cost": total_cost,
                 "provider": "elevenlabs",
+                "failed_chapters": failed_chapters,
+                "timed_out_chapters": timed_out_chapters,
                 "stats": self.tts_client.get_usage_stats()
             }
             
@@ -342,9 +1152,64 @@ class StoryGenerator:
                 "audio_clips": [],
                 "provider": "fallback_mock"
             }
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def _generate_chapter_audio(self, chapter: Dict, index: int, deadline: Optional[Deadline] = None) -> Optional[Dict]:
+        """Narrate a chapter's key sentence; None if the chapter has no text"""
+        # Extract key sentences for audio
+        chapter_text = chapter.get("text", "")
+        sentences = [s.strip() for s in chapter_text.split('.') if s.strip()]
+        
+        # Select most impactful sentence (simplified logic)
+        if not sentences:
+            return None
+        key_sentence = max(sentences, key=len)[:200]  # Limit to 200 chars for cost
+        
+        # Generate audio using ElevenLabs
+        audio_result = await self.tts_client.generate_speech(
+            text=key_sentence,
+            voice="rachel",  # Professional female narrator
+            model=TTSModel.FLASH_V2_5,  # Fast generation for <60s requirement
+            voice_settings=VoiceSettings(
+                stability=0.7,        # More stable for narration
+                similarity_boost=0.8, # Consistent voice
+                style=0.1,           # Minimal style for natural reading
+                use_speaker_boost=True
+            ),
+            save_path=f"audio/chapter_{index+1}.mp3",
+            deadline=deadline
+        )
+        
+        if audio_result["success"]:
+            return {
+                "chapter_id": chapter.get("id", index + 1),
+                "text": key_sentence,
+                "audio_path": audio_result.get("audio_path"),
+                "audio_data": audio_result.get("audio_data"),
+                "duration": audio_result["usage"].characters_used * 0.05,  # Approx 0.05s per char
+                "voice_used": audio_result["voice_used"],
+                "generation_time": audio_result["generation_time"],
+                "cost": audio_result["usage"].cost_estimate
+            }
+        
+        # Fallback to mock if TTS fails
+        return {
+            "chapter_id": chapter.get("id", index + 1),
+            "text": key_sentence,
+            "audio_url": f"https://mock-tts-api.com/audio/{index+1}.mp3",
+            "duration": len(key_sentence.split()) * 0.5,
+            "voice_id": "narrator_fallback",
+            "error": audio_result.get("error")
+        }
     
-    async def _generate_story_image(self, premise: str, mood: str, story: Dict) -> Dict:
-        """Generate story visualization using Stable Diffusion"""
+    async def _generate_story_image(
+        self, premise: str, mood: str, story: Dict, fast: bool = False, deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """Generate story visualization using Stable Diffusion; fast trades size and steps for time"""
         try:
             # Create enhanced image prompt from story
             title = story.get("title", "Untitled Story")
@@ -360,14 +1225,15 @@ class StoryGenerator:
             # Generate image using Stable Diffusion
             image_result = await self.image_client.generate_image(
                 prompt=full_prompt,
-                size=ImageSize.LANDSCAPE_768,  # Good for story illustrations
+                size=ImageSize.SQUARE_512 if fast else ImageSize.LANDSCAPE_768,  # Good for story illustrations
                 model=None,  # Auto-select optimal model
                 settings=ImageSettings(
-                    steps=25,           # Balanced quality/speed for <60s requirement
+                    steps=12 if fast else 25,  # Balanced quality/speed for <60s requirement
                     cfg_scale=7.5,      # Good prompt adherence
                     negative_prompt="blurry, low quality, deformed, text, watermark, signature, ugly"
                 ),
-                save_path=f"images/story_illustration.png"
+                save_path=f"images/story_illustration.png",
+                deadline=deadline
             )
             
             if image_result["success"]:
@@ -513,7 +1379,57 @@ class StoryGenerator:
             "quality_failures": self.quality_failures,
             "success_rate": round(success_rate * 100, 2),
             "timeout_rate": round((self.timeout_failures / max(self.total_generations, 1)) * 100, 2),
-            "cost_stats": self.cost_optimizer.get_daily_stats()
+            "progressive": {
+                "drafts_served": self.drafts_served,
+                "refinements_swapped": self.refinements_swapped,
+                "refinements_rejected": self.refinements_rejected,
+                "refinement_failures": self.refinement_failures,
+                "refinements_pending": len(self._refinements)
+            },
+            "ensemble": {
+                "runs": self.ensemble_runs,
+                "accepted_early": self.ensemble_accepted_early,
+                "best_at_deadline": self.ensemble_best_at_deadline,
+                "failures": self.ensemble_failures,
+                "cancelled_requests": self.ensemble_cancelled,
+                "wins": dict(self.ensemble_wins)
+            },
+            "delivery": {
+                "streamed": self.streamed_stories,
+                "failures": self.delivery_failures,
+                "in_progress": len(self._deliveries),
+                "time_to_first_chapter": self._latency_summary(self.first_chapter_times),
+                "time_to_complete": self._latency_summary(self.complete_times)
+            },
+            "stages": {
+                "runs": self.stage_runs,
+                "bounding_stages": dict(self.bounding_stages),
+                "average_stage_time": {
+                    name: round(total / max(self.stage_runs, 1), 3)
+                    for name, total in self.stage_time.items()
+                },
+                "latency": self.stage_latency.get_stats(),
+                "skipped": dict(self.stages_skipped),
+                "downgraded": dict(self.stages_downgraded)
+            },
+            "cancellation": {
+                "policy": self.cancellation_policy.value,
+                "cancelled": self.cancelled_generations,
+                "estimated_cost_saved": round(self.cancellation_cost_saved, 6),
+                "artifacts_kept": self.cancelled_artifacts_kept,
+                "artifacts_discarded": self.cancelled_artifacts_discarded
+            },
+            "cost_stats": self.cost_optimizer.get_daily_stats(),
+            "cost_reconciler": self.cost_reconciler.get_stats(),
+            "model_selector": self.cost_optimizer.model_selector.get_stats()
+        }
+    
+    def _latency_summary(self, samples: Deque[float]) -> Dict:
+        values = list(samples)
+        return {
+            "samples": len(values),
+            "p50": round(percentile(values, 0.50), 3),
+            "p95": round(percentile(values, 0.95), 3)
         }
     
     async def test_generation_speed(self) -> Dict:
@@ -0,0 +1,140 @@
+"""
+Story Stream Parser - Incremental JSON parsing for streamed stories
+
+This module parses the story JSON produced by the LLM while it is still being
+streamed, emitting each chapter object the moment its closing brace arrives.
+"""
+
+import re
+import json
+from typing import Dict, List, Optional
+
+
+# Matches the "chapters" key immediately before an opening bracket
+CHAPTERS_KEY_PATTERN = re.compile(r'"chapters"\s*:\s*$')
+TITLE_PATTERN = re.compile(r'"title"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+class StoryStreamParser:
+    """Incrementally parse story JSON and emit completed chapters"""
+
+    def __init__(self):
+        self.buffer = ""
+        self.title: Optional[str] = None
+        self.chapters: List[Dict] = []
+
+        # Scanner state
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._chapters_depth: Optional[int] = None
+        self._chapter_start: Optional[int] = None
+
+    def feed(self, text: str) -> List[Dict]:
+        """
+        Feed a chunk of streamed text.
+
+        Args:
+            text: Next content delta from the model
+
+        Returns:
+            Chapters completed by this chunk (possibly empty)
+        """
+        self.buffer += text
+        completed = []
+
+        while self._pos < len(self.buffer):
+            char = self.buffer[self._pos]
+
+            if not self._started:
+                # Skip markdown fences or preamble before the JSON object
+                if char == "{":
+                    self._started = True
+                    self._stack.append("{")
+                self._pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                self._pos += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char == "[":
+                if (
+                    self._chapters_depth is None
+                    and len(self._stack) == 1
+                    and CHAPTERS_KEY_PATTERN.search(self.buffer[max(0, self._pos - 32):self._pos])
+                ):
+                    self._chapters_depth = len(self._stack) + 1
+                self._stack.append("[")
+            elif char == "{":
+                self._stack.append("{")
+                if self._chapters_depth is not None and len(self._stack) == self._chapters_depth + 1:
+                    self._chapter_start = self._pos
+            elif char in "]}":
+                if self._stack:
+                    self._stack.pop()
+                if (
+                    char == "}"
+                    and self._chapter_start is not None
+                    and self._chapters_depth is not None
+                    and len(self._stack) == self._chapters_depth
+                ):
+                    chapter = self._decode_chapter(self.buffer[self._chapter_start:self._pos + 1])
+                    self._chapter_start = None
+                    if chapter is not None:
+                        self.chapters.append(chapter)
+                        completed.append(chapter)
+                elif char == "]" and self._chapters_depth is not None and len(self._stack) < self._chapters_depth:
+                    self._chapters_depth = None
+
+            self._pos += 1
+
+        if self.title is None:
+            match = TITLE_PATTERN.search(self.buffer)
+            if match:
+                self.title = json.loads(f'"{match.group(1)}"')
+
+        return completed
+
+    @property
+    def complete(self) -> bool:
+        """Whether the top-level story object has been closed"""
+        return self._started and not self._stack
+
+    def result(self) -> Optional[Dict]:
+        """Decode the full story object once streaming has finished"""
+        json_start = self.buffer.find("{")
+        json_end = self.buffer.rfind("}") + 1
+
+        if json_start == -1 or json_end == 0:
+            return None
+
+        try:
+            return json.loads(self.buffer[json_start:json_end])
+        except json.JSONDecodeError:
+            if self.chapters:
+                # Keep what streamed successfully if the tail is malformed
+                return {"title": self.title or "Untitled Story", "chapters": list(self.chapters)}
+            return None
+
+    def _decode_chapter(self, chapter_json: str) -> Optional[Dict]:
+        """Decode a single chapter object"""
+        try:
+            chapter = json.loads(chapter_json)
+        except json.JSONDecodeError as e:
+            print(f"Failed to parse streamed chapter: {e}")
+            return None
+
+        chapter.setdefault("id", len(self.chapters) + 1)
+        chapter.setdefault("choices", [])
+        return chapter
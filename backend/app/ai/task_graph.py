@@ -0,0 +1,275 @@
+"""
+Task Graph - Dependency-ordered stage execution
+
+This module runs a generation as a graph of stages. Each stage names the
+stages whose results it needs and the resource class it uses; the scheduler
+starts every stage as soon as its inputs exist, within per-resource
+concurrency limits, and reports the critical path of each run - the chain of
+stages that actually bounded its latency.
+"""
+
+import asyncio
+import contextlib
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+# A stage receives the results of every stage finished so far, keyed by name
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class StageStatus(Enum):
+    """Outcome of one stage in a run"""
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+    SKIPPED = "skipped"        # A required dependency failed
+    CANCELLED = "cancelled"    # The run timed out first
+
+
+@dataclass
+class TaskNode:
+    """One stage of a graph"""
+    name: str
+    func: StageFunc
+    deps: Tuple[str, ...] = ()
+    resource: str = "cpu"
+    optional: bool = False     # Failure leaves dependents to run without its result
+
+
+@dataclass
+class StageTiming:
+    """When a stage became ready, got its resource slot and finished (seconds from run start)"""
+    name: str
+    resource: str
+    status: StageStatus = StageStatus.PENDING
+    ready: Optional[float] = None
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    @property
+    def wait(self) -> float:
+        """Time spent queued for a resource slot"""
+        if self.ready is None or self.started is None:
+            return 0.0
+        return self.started - self.ready
+
+    @property
+    def duration(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+
+@dataclass
+class GraphRun:
+    """Results, errors and timings of one graph run"""
+    results: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, BaseException] = field(default_factory=dict)
+    timings: Dict[str, StageTiming] = field(default_factory=dict)
+    critical_path: List[str] = field(default_factory=list)
+    total_time: float = 0.0
+    timed_out: bool = False
+
+    def report(self) -> Dict:
+        """Per-stage timings and the critical path, rounded for responses and logs"""
+        return {
+            "total_time": round(self.total_time, 3),
+            "timed_out": self.timed_out,
+            "critical_path": [
+                {
+                    "stage": name,
+                    "resource": self.timings[name].resource,
+                    "wait": round(self.timings[name].wait, 3),
+                    "duration": round(self.timings[name].duration, 3)
+                }
+                for name in self.critical_path
+            ],
+            "stages": {
+                name: {
+                    "status": timing.status.value,
+                    "resource": timing.resource,
+                    "wait": round(timing.wait, 3),
+                    "duration": round(timing.duration, 3)
+                }
+                for name, timing in self.timings.items()
+            }
+        }
+
+
+@contextlib.asynccontextmanager
+async def _unlimited():
+    """Slot of a resource class without a limit"""
+    yield
+
+
+class ResourceLimits:
+    """Per-resource concurrency limits, shareable across graphs and runs"""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            limits: Most stages of each resource class running at once;
+                classes not listed are unlimited
+        """
+        self.limits = dict(limits or {})
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def slot(self, resource: str):
+        """Async context manager holding one slot of a resource class"""
+        if resource not in self.limits:
+            # contextlib.nullcontext only supports async with from Python 3.10
+            return _unlimited()
+
+        # Semaphores bind to the loop they are first used on
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphores = {}
+            self._loop = loop
+
+        if resource not in self._semaphores:
+            self._semaphores[resource] = asyncio.Semaphore(self.limits[resource])
+        return self._semaphores[resource]
+
+
+class TaskGraph:
+    """Run stages in dependency order, each as soon as its inputs are ready"""
+
+    def __init__(self, resources: Optional[ResourceLimits] = None):
+        self.resources = resources or ResourceLimits()
+        self.nodes: Dict[str, TaskNode] = {}
+
+    def add(
+        self,
+        name: str,
+        func: StageFunc,
+        deps: Tuple[str, ...] = (),
+        resource: str = "cpu",
+        optional: bool = False
+    ) -> TaskNode:
+        """
+        Add a stage. Dependencies must already be in the graph, so graphs are
+        acyclic by construction.
+        """
+        if name in self.nodes:
+            raise ValueError(f"Duplicate stage: {name}")
+        missing = [dep for dep in deps if dep not in self.nodes]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages: {', '.join(missing)}")
+
+        node = TaskNode(name, func, tuple(deps), resource, optional)
+        self.nodes[name] = node
+        return node
+
+    async def run(self, timeout: Optional[float] = None) -> GraphRun:
+        """
+        Run every stage, cancelling whatever is still running at the timeout.
+
+        Stage exceptions never escape: they are collected in GraphRun.errors
+        and the stage's dependents are skipped unless the stage is optional.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + timeout if timeout is not None else None
+
+        run = GraphRun(timings={
+            name: StageTiming(name, node.resource) for name, node in self.nodes.items()
+        })
+        pending = dict(self.nodes)
+        running: Dict[asyncio.Task, str] = {}
+
+        try:
+            while pending or running:
+                self._start_ready(pending, running, run, start)
+                if not running:
+                    break
+
+                remaining = None if deadline is None else max(0.0, deadline - loop.time())
+                done, _ = await asyncio.wait(running, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    run.timed_out = True
+                    for name in pending:
+                        run.timings[name].status = StageStatus.CANCELLED
+                    pending.clear()
+                    break
+
+                for task in done:
+                    name = running.pop(task)
+                    timing = run.timings[name]
+                    if task.cancelled():
+                        run.errors[name] = asyncio.CancelledError()
+                        timing.status = StageStatus.CANCELLED
+                    elif task.exception() is not None:
+                        run.errors[name] = task.exception()
+                        timing.status = StageStatus.FAILED
+                    else:
+                        run.results[name] = task.result()
+                        timing.status = StageStatus.DONE
+        finally:
+            for task, name in running.items():
+                task.cancel()
+                run.timings[name].status = StageStatus.CANCELLED
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        run.total_time = loop.time() - start
+        run.critical_path = self._critical_path(run)
+        return run
+
+    def _start_ready(self, pending: Dict[str, TaskNode], running: Dict[asyncio.Task, str], run: GraphRun, start: float):
+        """Start every pending stage whose dependencies have finished; skip those that can never run"""
+        loop = asyncio.get_running_loop()
+
+        # Stages are stored in dependency order, so one pass settles skips transitively
+        for name, node in list(pending.items()):
+            statuses = [run.timings[dep].status for dep in node.deps]
+
+            blocked = any(
+                status in (StageStatus.SKIPPED, StageStatus.CANCELLED)
+                or (status == StageStatus.FAILED and not self.nodes[dep].optional)
+                for dep, status in zip(node.deps, statuses)
+            )
+            if blocked:
+                del pending[name]
+                run.timings[name].status = StageStatus.SKIPPED
+                continue
+
+            if all(status in (StageStatus.DONE, StageStatus.FAILED) for status in statuses):
+                del pending[name]
+                run.timings[name].ready = loop.time() - start
+                running[loop.create_task(self._run_stage(node, run, start))] = name
+
+    async def _run_stage(self, node: TaskNode, run: GraphRun, start: float):
+        loop = asyncio.get_running_loop()
+        timing = run.timings[node.name]
+
+        async with self.resources.slot(node.resource):
+            timing.started = loop.time() - start
+            try:
+                return await node.func(run.results)
+            finally:
+                timing.finished = loop.time() - start
+
+    def _critical_path(self, run: GraphRun) -> List[str]:
+        """
+        Walk back from the last stage to finish, each time through the
+        dependency that finished last (the one that made the stage ready)
+        """
+        finished = {name: timing for name, timing in run.timings.items() if timing.finished is not None}
+        if not finished:
+            return []
+
+        current = max(finished, key=lambda name: finished[name].finished)
+        path = [current]
+        while True:
+            deps = [dep for dep in self.nodes[current].deps if dep in finished]
+            if not deps:
+                break
+            current = max(deps, key=lambda dep: finished[dep].finished)
+            path.append(current)
+
+        path.reverse()
+        return path
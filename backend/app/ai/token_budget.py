@@ -0,0 +1,128 @@
+"""
+Token Budget - Adaptive max_tokens for story requests
+
+This module sizes each request's max_tokens from the words and chapters we
+actually want and the model's observed tokens-per-word ratio, recalibrated
+from the usage figures every response already carries.
+"""
+
+from typing import Dict, Optional
+
+
+class TokenBudgeter:
+    """Per-model output budgets derived from observed tokens per word"""
+
+    def __init__(
+        self,
+        tokens_per_word: float = 1.35,
+        chars_per_token: float = 4.0,
+        chapter_overhead: int = 60,
+        headroom: float = 1.2,
+        smoothing: float = 0.2,
+        min_tokens: int = 128,
+        max_tokens: int = 3000
+    ):
+        """
+        Args:
+            tokens_per_word: Starting prose ratio before any usage is seen
+            chars_per_token: Starting ratio for the local token approximation
+            chapter_overhead: JSON keys, ids and choices per chapter, in tokens
+            headroom: Multiplier so a slightly long story is not cut off
+            smoothing: EWMA weight given to each new observation
+            min_tokens: Lower bound on any budget
+            max_tokens: Upper bound on any budget
+        """
+        self.default_tokens_per_word = tokens_per_word
+        self.default_chars_per_token = chars_per_token
+        self.chapter_overhead = chapter_overhead
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+
+        self._tokens_per_word: Dict[str, float] = {}
+        self._chars_per_token: Dict[str, float] = {}
+
+        # Budget statistics
+        self.budgets_issued = 0
+        self.tokens_budgeted = 0
+        self.calibrations = 0
+
+    def estimate_tokens(self, text: str, model: Optional[str] = None) -> int:
+        """Approximate the token count of text without a tokenizer"""
+        chars_per_token = self._chars_per_token.get(model, self.default_chars_per_token)
+        return max(1, round(len(text) / chars_per_token))
+
+    def tokens_per_word(self, model: str) -> float:
+        """Current prose tokens-per-word estimate for a model"""
+        return self._tokens_per_word.get(model, self.default_tokens_per_word)
+
+    def max_tokens_for(self, model: str, target_words: int, chapters: int = 1, structured: bool = True) -> int:
+        """
+        Output budget for a request.
+
+        Args:
+            model: Model identifier
+            target_words: Upper end of the prose length we ask for
+            chapters: Number of chapters in the response
+            structured: Whether the response is story JSON (adds per-chapter overhead)
+
+        Returns:
+            max_tokens to send with the request
+        """
+        tokens = target_words * self.tokens_per_word(model)
+        if structured:
+            tokens += chapters * self.chapter_overhead
+
+        budget = int(min(self.max_tokens, max(self.min_tokens, tokens * self.headroom)))
+        self.budgets_issued += 1
+        self.tokens_budgeted += budget
+        return budget
+
+    def record_usage(
+        self,
+        model: str,
+        usage: Optional[Dict],
+        words: int,
+        chapters: int = 1,
+        structured: bool = True,
+        prompt: Optional[str] = None
+    ):
+        """
+        Recalibrate a model's ratios from a completed response.
+
+        Args:
+            model: Model identifier
+            usage: OpenRouter usage dict (prompt_tokens, completion_tokens)
+            words: Prose words actually produced
+            chapters: Chapters in the response
+            structured: Whether the response was story JSON
+            prompt: Prompt text, to recalibrate the local token approximation
+        """
+        if not usage:
+            return
+
+        completion_tokens = usage.get("completion_tokens") or 0
+        if completion_tokens and words > 0:
+            prose_tokens = completion_tokens - (chapters * self.chapter_overhead if structured else 0)
+            observed = max(prose_tokens, words) / words
+            self._tokens_per_word[model] = self._blend(self.tokens_per_word(model), observed)
+            self.calibrations += 1
+
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        if prompt and prompt_tokens:
+            current = self._chars_per_token.get(model, self.default_chars_per_token)
+            self._chars_per_token[model] = self._blend(current, len(prompt) / prompt_tokens)
+
+    def get_stats(self) -> Dict:
+        """Get budget statistics and current ratios"""
+        return {
+            "budgets_issued": self.budgets_issued,
+            "average_budget": round(self.tokens_budgeted / max(self.budgets_issued, 1), 1),
+            "calibrations": self.calibrations,
+            "tokens_per_word": {model: round(ratio, 3) for model, ratio in self._tokens_per_word.items()},
+            "chars_per_token": {model: round(ratio, 3) for model, ratio in self._chars_per_token.items()}
+        }
+
+    def _blend(self, current: float, observed: float) -> float:
+        return (1 - self.smoothing) * current + self.smoothing * observed
@@ -15,6 +15,10 @@ from dataclasses import dataclass
 from enum import Enum
 import json
 
+from .key_pool import KeyPool
+from .deadline import Deadline, call_timeout
+from .rate_limiter import parse_retry_after
+
 
 class TTSModel(Enum):
     """Available ElevenLabs TTS models"""
@@ -54,8 +58,18 @@ class TTSUsage:
 class ElevenLabsClient:
     """ElevenLabs TTS API client with cost optimization"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, key_pool: Optional[KeyPool] = None):
         self.api_key = api_key or os.getenv("ELEVENLABS_API_KEY")
+        
+        # Every provisioned key shares the load (ELEVENLABS_API_KEYS=k1,k2,...)
+        if key_pool is not None:
+            self.key_pool = key_pool
+        elif api_key:
+            self.key_pool = KeyPool([api_key])
+        else:
+            self.key_pool = KeyPool.from_env("ELEVENLABS_API_KEY", "ELEVENLABS_API_KEYS")
+        if not self.api_key and len(self.key_pool):
+            self.api_key = self.key_pool.keys[0]
         self.base_url = "https://api.elevenlabs.io/v1"
         
         # Default voice settings
@@ -93,7 +107,8 @@ class ElevenLabsClient:
         model: TTSModel = TTSModel.FLASH_V2_5,
         output_format: OutputFormat = OutputFormat.MP3_44100_128,
         voice_settings: Optional[VoiceSettings] = None,
-        save_path: Optional[str] = None
+        save_path: Optional[str] = None,
+        deadline: Optional[Deadline] = None
     ) -> Dict:
         """
         Generate speech from text using ElevenLabs API
@@ -105,6 +120,7 @@ class ElevenLabsClient:
             output_format: Audio output format
             voice_settings: Custom voice settings
             save_path: Optional path to save audio file
+            deadline: Request deadline; the API call gets the time left on it
             
         Returns:
             Dictionary with audio data and metadata
@@ -134,7 +150,8 @@ class ElevenLabsClient:
                 voice_id=voice_id,
                 model=model,
                 output_format=output_format,
-                voice_settings=settings
+                voice_settings=settings,
+                timeout=call_timeout(deadline, 30)
             )
             
             generation_time = time.time() - start_time
@@ -192,8 +209,9 @@ class ElevenLabsClient:
     ) -> bytes:
         """Make TTS API request to ElevenLabs"""
         
+        api_key = self.key_pool.acquire() or self.api_key
         headers = {
-            "xi-api-key": self.api_key,
+            "xi-api-key": api_key,
             "Content-Type": "application/json"
         }
         
@@ -211,15 +229,31 @@ class ElevenLabsClient:
         
         url = f"{self.base_url}/text-to-speech/{voice_id}"
         
-        connector = aiohttp.TCPConnector(ssl=False)  # Disable SSL verification for corporate environments
-        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
-            response = await session.post(url, headers=headers, json=payload)
+        status = None
+        retry_after = None
+        error = None
+        
+        try:
+            connector = aiohttp.TCPConnector(ssl=False)  # Disable SSL verification for corporate environments
+            async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+                response = await session.post(url, headers=headers, json=payload)
+                status = response.status
+                    
+                if response.status != 200:
+                    if response.status == 429:
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    error_text = await response.text()
+                    raise Exception(f"API request failed: {response.status} - {error_text}")
                 
-            if response.status != 200:
-                error_text = await response.text()
-                raise Exception(f"API request failed: {response.status} - {error_text}")
+                return await response.read()
+                
+        except Exception as e:
+            error = str(e)
+            raise
             
-            return await response.read()
+        finally:
+            # 401/429 eject the key for a while so later requests use the others
+            self.key_pool.release(api_key, status=status, retry_after=retry_after, error=error)
     
     async def _save_audio_file(self, audio_data: bytes, file_path: str) -> str:
         """Save audio data to file"""
@@ -285,7 +319,8 @@ class ElevenLabsClient:
             "total_cost": round(self.total_cost, 4),
             "average_characters_per_request": round(avg_chars_per_request, 1),
             "average_cost_per_request": round(avg_cost_per_request, 4),
-            "estimated_credits_used": int(self.total_characters)  # Approximate
+            "estimated_credits_used": int(self.total_characters),  # Approximate
+            "key_pool": self.key_pool.get_stats()
         }
     
     async def test_connection(self) -> Dict:
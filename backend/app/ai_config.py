@@ -5,7 +5,7 @@ Supports Ollama (local), OpenRouter (cloud), and direct APIs
 
 import os
 from enum import Enum
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 class ModelTier(Enum):
     FREE = "free"           # Ollama local
@@ -19,7 +19,7 @@ AI_MODELS = {
     "ollama/llama3.1": {
         "provider": "ollama",
         "model": "llama3.1:8b",
-        "base_url": "http://localhost:11434",
+        "base_url": os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
         "cost_per_story": 0.0,
         "tier": ModelTier.FREE,
         "max_tokens": 4096
@@ -82,6 +82,24 @@ def get_model_config(budget_mode: bool = True, development: bool = False) -> Dic
     # Default to Gemini Flash for production
     return AI_MODELS["openrouter/gemini-flash"]
 
+def get_tier_model(tier: ModelTier, provider: str = "openrouter") -> Dict[str, Any]:
+    """First configured model of a tier for the given provider"""
+    for config in AI_MODELS.values():
+        if config["tier"] == tier and config["provider"] == provider:
+            return config
+    raise ValueError(f"No {provider} model configured for tier {tier.value}")
+
+def get_story_client(config: Optional[Dict[str, Any]] = None):
+    """Story client for a model config (defaults to get_model_config())"""
+    config = config or get_model_config()
+    
+    if config["provider"] == "ollama":
+        from .ai.ollama_client import OllamaClient
+        return OllamaClient(base_url=config.get("base_url"), model=config["model"])
+    
+    from .ai.openrouter_client import OpenRouterClient
+    return OpenRouterClient()
+
 # API configuration
 OPENROUTER_CONFIG = {
     "api_key": os.getenv("OPENROUTER_API_KEY"),
@@ -94,7 +112,9 @@ OPENROUTER_CONFIG = {
 
 OLLAMA_CONFIG = {
     "base_url": os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-    "timeout": 60
+    "timeout": 60,
+    "keep_alive": os.getenv("OLLAMA_KEEP_ALIVE", "30m"),        # Keep the model resident between stories
+    "max_concurrency": int(os.getenv("OLLAMA_NUM_PARALLEL", "2"))  # Match the server's parallel slots
 }
 
 # Cost tracking
@@ -3,12 +3,14 @@ FastAPI backend for AI Storytelling Engine
 Milestone 1: Basic setup with stub endpoints
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
 import asyncio
 
+from app.ai.cancellation import ClientDisconnected, run_until_disconnected
+
 app = FastAPI(
     title="AI Storytelling Engine API",
     description="Backend API for generating immersive, interactive stories",
@@ -63,7 +65,7 @@ async def health_check():
     }
 
 @app.post("/api/stories/generate", response_model=Story)
-async def generate_story(request: StoryRequest):
+async def generate_story(request: StoryRequest, http_request: Request):
     """
     Generate a new interactive story based on user input
     Milestone 1: Returns mock data
@@ -72,8 +74,11 @@ async def generate_story(request: StoryRequest):
     if not request.premise.strip():
         raise HTTPException(status_code=400, detail="Story premise is required")
     
-    # Simulate AI processing time
-    await asyncio.sleep(2)
+    # Simulate AI processing time, abandoning it if the client goes away
+    try:
+        await run_until_disconnected(asyncio.sleep(2), http_request.is_disconnected)
+    except ClientDisconnected:
+        raise HTTPException(status_code=499, detail="Client closed request")
     
     # Mock story generation - replace with actual AI in Milestone 2
     mock_story = Story(
@@ -0,0 +1,57 @@
+"""
+Test suite for request-scoped cancellation on client disconnect
+"""
+
+import asyncio
+import pytest
+
+from app.ai.cancellation import ClientDisconnected, run_until_disconnected
+
+
+def disconnect_after(checks):
+    """A disconnect check reporting a disconnect from the given poll onwards"""
+    polls = 0
+
+    async def is_disconnected():
+        nonlocal polls
+        polls += 1
+        return polls >= checks
+    return is_disconnected
+
+
+class TestRunUntilDisconnected:
+    """Test work is cancelled exactly when the client goes away"""
+
+    @pytest.mark.asyncio
+    async def test_returns_result_while_connected(self):
+        async def work():
+            await asyncio.sleep(0.02)
+            return "story"
+
+        result = await run_until_disconnected(work(), disconnect_after(100), poll_interval=0.005)
+
+        assert result == "story"
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_work(self):
+        """In-flight calls see the cancellation and unwind before the caller returns"""
+        unwound = asyncio.Event()
+
+        async def provider_call():
+            try:
+                await asyncio.sleep(10)
+            finally:
+                unwound.set()
+
+        with pytest.raises(ClientDisconnected):
+            await run_until_disconnected(provider_call(), disconnect_after(2), poll_interval=0.005)
+
+        assert unwound.is_set()
+
+    @pytest.mark.asyncio
+    async def test_work_errors_propagate(self):
+        async def work():
+            raise ValueError("bad premise")
+
+        with pytest.raises(ValueError):
+            await run_until_disconnected(work(), disconnect_after(100), poll_interval=0.005)
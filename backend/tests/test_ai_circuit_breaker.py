@@ -0,0 +1,137 @@
+"""
+Test suite for per-model circuit breakers
+"""
+
+from app.ai.circuit_breaker import CircuitBreaker, CircuitState, percentile
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions"""
+
+    def make_breaker(self, clock, **kwargs):
+        return CircuitBreaker("test-model", min_requests=4, clock=clock, **kwargs)
+
+    def test_percentile(self):
+        """Nearest-rank percentile over unsorted samples"""
+        samples = [float(i) for i in range(100, 0, -1)]
+        assert percentile(samples, 0.50) == 51.0
+        assert percentile(samples, 0.95) == 96.0
+        assert percentile([], 0.95) == 0.0
+
+    def test_stays_closed_below_min_requests(self):
+        """A few failures on a quiet model do not open the circuit"""
+        breaker = self.make_breaker(FakeClock())
+        for _ in range(3):
+            breaker.record_failure(1.0)
+
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.allow_request() is True
+
+    def test_opens_on_error_rate(self):
+        """The circuit opens once the rolling error rate crosses the threshold"""
+        breaker = self.make_breaker(FakeClock())
+        breaker.record_success(1.0)
+        breaker.record_success(1.0)
+        breaker.record_failure(1.0)
+        assert breaker.state == CircuitState.CLOSED
+
+        breaker.record_failure(1.0)
+
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.allow_request() is False
+        stats = breaker.get_stats()
+        assert stats["times_opened"] == 1
+        assert stats["rejected_requests"] == 1
+        assert "error rate" in stats["last_open_reason"]
+
+    def test_opens_on_p95_latency(self):
+        """Slow but successful responses open the circuit too"""
+        breaker = self.make_breaker(FakeClock(), latency_threshold=10.0)
+        for _ in range(4):
+            breaker.record_success(12.0)
+
+        assert breaker.state == CircuitState.OPEN
+        assert "p95 latency" in breaker.last_open_reason
+
+    def test_half_open_probe_success_closes(self):
+        """After the cool-down a single probe is allowed and closes the circuit on success"""
+        clock = FakeClock()
+        breaker = self.make_breaker(clock, open_seconds=30)
+        for _ in range(4):
+            breaker.record_failure(1.0)
+
+        clock.now += 31
+        assert breaker.allow_request() is True
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert breaker.allow_request() is False
+
+        breaker.record_success(1.0)
+
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.get_stats()["requests_in_window"] == 1
+
+    def test_half_open_probe_failure_reopens(self):
+        """A failed probe reopens the circuit for another cool-down"""
+        clock = FakeClock()
+        breaker = self.make_breaker(clock, open_seconds=30)
+        for _ in range(4):
+            breaker.record_failure(1.0)
+
+        clock.now += 31
+        assert breaker.allow_request() is True
+        breaker.record_failure(1.0)
+
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.times_opened == 2
+        assert breaker.allow_request() is False
+
+    def test_release_frees_probe_slot(self):
+        """A cancelled probe does not leave the circuit stuck half-open"""
+        clock = FakeClock()
+        breaker = self.make_breaker(clock, open_seconds=30)
+        for _ in range(4):
+            breaker.record_failure(1.0)
+
+        clock.now += 31
+        assert breaker.allow_request() is True
+        breaker.release()
+
+        assert breaker.allow_request() is True
+
+    def test_abandoned_probe_slower_than_threshold_reopens(self):
+        """A probe that loses to a hedge after the latency threshold reopens the circuit"""
+        clock = FakeClock()
+        breaker = self.make_breaker(clock, open_seconds=30, latency_threshold=25.0)
+        for _ in range(4):
+            breaker.record_failure(1.0)
+
+        clock.now += 31
+        assert breaker.allow_request() is True
+        breaker.record_abandoned(26.0)
+
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.times_opened == 2
+
+    def test_old_samples_leave_window(self):
+        """Samples older than the window no longer count"""
+        clock = FakeClock()
+        breaker = self.make_breaker(clock, window_seconds=60)
+        for _ in range(3):
+            breaker.record_failure(1.0)
+
+        clock.now += 61
+        breaker.record_failure(1.0)
+
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.get_stats()["requests_in_window"] == 1
+        assert breaker.error_rate() == 1.0
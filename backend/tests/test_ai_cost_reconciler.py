@@ -0,0 +1,173 @@
+"""
+Test suite for background cost reconciliation
+"""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.ai.cost_optimizer import CostOptimizer
+from app.ai.cost_reconciler import CostEvent, CostReconciler
+
+
+@pytest.fixture
+def optimizer(tmp_path):
+    """Cost optimizer writing to a temporary ledger"""
+    return CostOptimizer(daily_budget=10.0, cost_file=str(tmp_path / "costs.json"))
+
+
+def make_event(generation_id=None, prompt_tokens=1000, completion_tokens=2000):
+    return CostEvent(
+        model="google/gemini-flash-1.5",
+        usage={"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens},
+        generation_id=generation_id
+    )
+
+
+class TestCostReconciler:
+    """Test queued, batched cost accounting"""
+
+    @pytest.mark.asyncio
+    async def test_record_does_not_write_inline(self, optimizer):
+        """Queueing an event performs no ledger I/O on the caller's path"""
+        reconciler = CostReconciler(optimizer, flush_interval=0.01)
+
+        with patch.object(optimizer, 'write_cost_history') as mock_save:
+            assert reconciler.record(make_event()) is True
+            mock_save.assert_not_called()
+            assert optimizer.cost_history == []
+
+            await reconciler.close()
+
+        mock_save.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_batches_events_into_one_save(self, optimizer):
+        """Events queued together are written with a single save, priced from real usage"""
+        reconciler = CostReconciler(optimizer, batch_size=10, flush_interval=0.05)
+
+        with patch.object(optimizer, 'write_cost_history') as mock_save:
+            for index in range(5):
+                reconciler.record(make_event(f"gen-{index}"))
+            await reconciler.flush()
+
+        assert mock_save.call_count == 1
+        assert len(optimizer.cost_history) == 5
+        assert optimizer.cost_history[0].input_tokens == 1000
+        assert optimizer.cost_history[0].cost == pytest.approx(0.000675)
+        assert optimizer.cost_history[0].generation_id == "gen-0"
+
+        stats = reconciler.get_stats()
+        assert stats["written"] == 5
+        assert stats["batches"] == 1
+        await reconciler.close()
+
+    @pytest.mark.asyncio
+    async def test_reported_cost_is_used(self, optimizer):
+        """A cost carried in the usage block is trusted over the local estimate"""
+        reconciler = CostReconciler(optimizer, flush_interval=0.01)
+        event = make_event()
+        event.usage["cost"] = 0.0042
+
+        reconciler.record(event)
+        await reconciler.close()
+
+        assert optimizer.cost_history[0].cost == 0.0042
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_events(self, optimizer):
+        """A full queue drops the event instead of blocking the request"""
+        reconciler = CostReconciler(optimizer, max_queue=1, flush_interval=0.01)
+
+        assert reconciler.record(make_event()) is True
+        assert reconciler.record(make_event()) is False
+        assert reconciler.get_stats()["dropped"] == 1
+
+        await reconciler.close()
+
+    @pytest.mark.asyncio
+    async def test_lookup_replaces_estimate(self, optimizer):
+        """Billed cost from the provider replaces the estimate and the daily spend"""
+        lookup = AsyncMock(return_value=0.01)
+        reconciler = CostReconciler(optimizer, flush_interval=0.01, cost_lookup=lookup, lookup_delay=60)
+
+        reconciler.record(make_event("gen-1"))
+        reconciler.record(make_event())
+        await reconciler.flush()
+        await reconciler.reconcile_now()
+
+        lookup.assert_awaited_once_with("gen-1")
+        entry = optimizer.cost_history[0]
+        assert entry.cost == 0.01
+        assert entry.reconciled is True
+        assert optimizer.get_daily_stats()["total_spend"] == pytest.approx(0.010675)
+
+        with open(optimizer.cost_file) as f:
+            saved = json.load(f)
+        assert saved["cost_history"][0]["cost"] == 0.01
+
+        stats = reconciler.get_stats()
+        assert stats["corrections"] == 1
+        assert stats["pending_lookups"] == 0
+        await reconciler.close()
+
+    @pytest.mark.asyncio
+    async def test_missing_cost_is_retried_then_given_up(self, optimizer):
+        """Lookups without stats are retried up to max_lookup_attempts"""
+        lookup = AsyncMock(return_value=None)
+        reconciler = CostReconciler(
+            optimizer, flush_interval=0.01, cost_lookup=lookup, lookup_delay=60, max_lookup_attempts=2
+        )
+
+        reconciler.record(make_event("gen-1"))
+        await reconciler.flush()
+        await reconciler.reconcile_now()
+        assert reconciler.get_stats()["pending_lookups"] == 1
+
+        await reconciler.reconcile_now()
+
+        assert lookup.await_count == 2
+        assert reconciler.get_stats()["pending_lookups"] == 0
+        assert optimizer.cost_history[0].reconciled is False
+        await reconciler.close()
+
+    @pytest.mark.asyncio
+    async def test_write_failure_is_counted(self, optimizer, tmp_path):
+        """A failed background write reaches write_errors instead of being swallowed"""
+        optimizer.cost_file = str(tmp_path / "missing" / "costs.json")
+        reconciler = CostReconciler(optimizer, flush_interval=0.01)
+
+        reconciler.record(make_event())
+        await reconciler.flush()
+
+        assert reconciler.get_stats()["write_errors"] == 1
+        assert len(optimizer.cost_history) == 1
+        await reconciler.close()
+
+    @pytest.mark.asyncio
+    async def test_writes_snapshot_taken_on_the_loop(self, optimizer):
+        """The worker thread writes a copy, not the live ledger"""
+        reconciler = CostReconciler(optimizer, flush_interval=0.01)
+        written = []
+
+        def write(data):
+            # Ledger changes after the snapshot do not leak into the write
+            optimizer.cost_history.clear()
+            written.append(data)
+
+        with patch.object(optimizer, 'write_cost_history', side_effect=write):
+            reconciler.record(make_event("gen-1"))
+            await reconciler.flush()
+
+        assert written[0]["cost_history"][0]["generation_id"] == "gen-1"
+        await reconciler.close()
+
+    def test_record_without_event_loop_writes_directly(self, optimizer):
+        """Synchronous callers still get their cost recorded"""
+        reconciler = CostReconciler(optimizer)
+
+        with patch.object(optimizer, '_save_cost_history') as mock_save:
+            reconciler.record(make_event())
+
+        mock_save.assert_called_once()
+        assert len(optimizer.cost_history) == 1
@@ -0,0 +1,96 @@
+"""
+Test suite for request deadlines and stage latency history
+"""
+
+import asyncio
+import pytest
+
+from app.ai.deadline import Deadline, DeadlineExceeded, LatencyHistory, call_timeout
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestDeadline:
+    """Test remaining-time arithmetic and derived timeouts"""
+
+    def test_remaining_and_elapsed(self, clock):
+        deadline = Deadline(10, clock=clock)
+        clock.now += 4
+
+        assert deadline.remaining() == pytest.approx(6)
+        assert deadline.elapsed() == pytest.approx(4)
+        assert deadline.expired() is False
+
+        clock.now += 7
+        assert deadline.remaining() == 0
+        assert deadline.expired() is True
+
+    def test_timeout_respects_cap_and_reserve(self, clock):
+        """Timeouts never outlast the deadline, the cap or the reserve"""
+        deadline = Deadline(10, clock=clock)
+
+        assert deadline.timeout() == pytest.approx(10)
+        assert deadline.timeout(cap=3) == pytest.approx(3)
+        assert deadline.timeout(reserve=2) == pytest.approx(8)
+
+        clock.now += 9
+        assert deadline.timeout(cap=3) == pytest.approx(1)
+        with pytest.raises(DeadlineExceeded):
+            deadline.timeout(reserve=2)
+
+    def test_fits(self, clock):
+        deadline = Deadline(10, clock=clock)
+
+        assert deadline.fits(8, reserve=2) is True
+        assert deadline.fits(8.5, reserve=2) is False
+
+    def test_child_never_outlives_parent(self, clock):
+        deadline = Deadline(10, clock=clock)
+
+        assert deadline.child(25).remaining() == pytest.approx(10)
+        assert deadline.child(3).remaining() == pytest.approx(3)
+
+    def test_call_timeout(self, clock):
+        """Provider calls keep their default without a deadline"""
+        assert call_timeout(None, 30) == 30
+        assert call_timeout(Deadline(10, clock=clock), 30) == pytest.approx(10)
+        assert call_timeout(Deadline(60, clock=clock), 30) == 30
+
+    def test_deadline_exceeded_is_a_timeout(self):
+        """Callers already handling asyncio.TimeoutError handle an exceeded deadline"""
+        assert issubclass(DeadlineExceeded, asyncio.TimeoutError)
+
+
+class TestLatencyHistory:
+    """Test the per-stage p90 used for skip decisions"""
+
+    def test_default_until_enough_samples(self):
+        history = LatencyHistory(min_samples=5, defaults={"audio": 10.0})
+        for _ in range(4):
+            history.record("audio", 2.0)
+
+        assert history.p90("audio") == 10.0
+        assert history.p90("unknown") == 0.0
+
+        history.record("audio", 2.0)
+        assert history.p90("audio") == pytest.approx(2.0)
+
+    def test_p90_over_window(self):
+        history = LatencyHistory(window=10, min_samples=1)
+        for seconds in range(1, 21):
+            history.record("image", float(seconds))
+
+        # Only the last 10 samples (11..20) count
+        assert 18.0 <= history.p90("image") <= 20.0
+        assert history.get_stats()["image"]["samples"] == 10
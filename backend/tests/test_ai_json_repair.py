@@ -0,0 +1,87 @@
+"""
+Test suite for tolerant story JSON parsing
+"""
+
+from app.ai.json_repair import (
+    StoryJSONRepairer,
+    normalize_smart_quotes,
+    remove_trailing_commas,
+    strip_code_fences
+)
+
+
+class TestRepairFunctions:
+    """Test the individual repairs"""
+
+    def test_strip_code_fences(self):
+        """Fenced output yields the fence body"""
+        assert strip_code_fences('Here:\n```json\n{"a": 1}\n```\nDone') == '{"a": 1}\n'
+        assert strip_code_fences('{"a": 1}') == '{"a": 1}'
+
+    def test_remove_trailing_commas_outside_strings(self):
+        """Commas before closing brackets go, commas in text stay"""
+        assert remove_trailing_commas('{"a": [1, 2,], "b": "x,}",}') == '{"a": [1, 2], "b": "x,}"}'
+
+    def test_normalize_smart_quotes_delimiters_only(self):
+        """Curly delimiters become straight; curly prose inside strings is kept"""
+        assert normalize_smart_quotes('{“title”: “He said \\u201chi\\u201d”}') == '{"title": "He said \\u201chi\\u201d"}'
+        assert normalize_smart_quotes('{"text": "“quoted” prose"}') == '{"text": "“quoted” prose"}'
+        assert normalize_smart_quotes('{“text”: “say "hi"”}') == '{"text": "say \\"hi\\""}'
+
+
+class TestStoryJSONRepairer:
+    """Test end-to-end repair and metrics"""
+
+    def test_clean_json_is_not_repaired(self):
+        """Valid JSON parses without repairs"""
+        repairer = StoryJSONRepairer()
+        story, repairs = repairer.parse('{"title": "T", "chapters": []}')
+
+        assert story == {"title": "T", "chapters": []}
+        assert repairs == []
+        assert repairer.get_stats()["clean"] == 1
+
+    def test_smart_quotes_repaired(self):
+        """Curly-quoted JSON is recovered"""
+        repairer = StoryJSONRepairer()
+        story, repairs = repairer.parse('{“title”: “T”, “chapters”: [{“id”: 1, “text”: “x”, “choices”: []}]}')
+
+        assert story["title"] == "T"
+        assert repairs == ["smart_quotes"]
+
+    def test_truncated_final_chapter_dropped(self):
+        """A story cut off mid-chapter keeps its complete chapters"""
+        repairer = StoryJSONRepairer()
+        content = (
+            '{"title": "Cut", "chapters": ['
+            '{"id": 1, "text": "First, complete.", "choices": [{"id": "a", "text": "Go", "leads_to": 2}]}, '
+            '{"id": 2, "text": "Second, never fini'
+        )
+
+        story, repairs = repairer.parse(content)
+
+        assert story["title"] == "Cut"
+        assert [chapter["id"] for chapter in story["chapters"]] == [1]
+        assert repairs == ["truncated"]
+
+    def test_unrecoverable_output_reported(self):
+        """Plain prose cannot be repaired and counts as a failure"""
+        repairer = StoryJSONRepairer()
+        story, _ = repairer.parse("Once upon a time, with no JSON at all.")
+
+        assert story is None
+        stats = repairer.get_stats()
+        assert stats["failed"] == 1
+        assert stats["failure_rate"] == 1.0
+
+    def test_repair_rate_metrics(self):
+        """Repair counts are tracked per repair kind"""
+        repairer = StoryJSONRepairer()
+        repairer.parse('{"title": "T", "chapters": []}')
+        repairer.parse('{"title": "T", "chapters": [],}')
+
+        stats = repairer.get_stats()
+        assert stats["attempts"] == 2
+        assert stats["repaired"] == 1
+        assert stats["repair_rate"] == 0.5
+        assert stats["repairs"]["trailing_commas"] == 1
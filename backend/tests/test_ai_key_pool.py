@@ -0,0 +1,89 @@
+"""
+Test suite for API key pools
+"""
+
+from unittest.mock import patch
+
+from app.ai.key_pool import KeyPool, KeyStrategy, key_fingerprint
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestKeyPool:
+    """Test key selection, ejection and stats"""
+
+    def test_from_env_merges_and_dedupes(self):
+        """Comma-separated and single-key variables are combined"""
+        with patch.dict('os.environ', {'TEST_KEYS': 'k1, k2,,k1', 'TEST_KEY': 'k3'}):
+            pool = KeyPool.from_env("TEST_KEY", "TEST_KEYS")
+
+        assert pool.keys == ["k1", "k2", "k3"]
+
+    def test_empty_pool(self):
+        """An empty pool hands out no key"""
+        pool = KeyPool([None, ""])
+        assert len(pool) == 0
+        assert pool.acquire() is None
+
+    def test_round_robin(self):
+        """Round-robin cycles through keys"""
+        pool = KeyPool(["a", "b", "c"], strategy=KeyStrategy.ROUND_ROBIN)
+        leased = [pool.acquire() for _ in range(4)]
+        assert leased == ["a", "b", "c", "a"]
+
+    def test_least_loaded(self):
+        """Least-loaded picks the key with the fewest in-flight requests"""
+        pool = KeyPool(["a", "b"])
+        first = pool.acquire()
+        second = pool.acquire()
+        assert {first, second} == {"a", "b"}
+
+        pool.release(first, status=200)
+        assert pool.acquire() == first
+
+    def test_rate_limited_key_is_ejected_for_retry_after(self):
+        """A 429 takes the key out of rotation for Retry-After seconds"""
+        clock = FakeClock()
+        pool = KeyPool(["a", "b"], clock=clock)
+
+        pool.release(pool.acquire(), status=429, retry_after=10)
+        assert [pool.acquire() for _ in range(3)] == ["b", "b", "b"]
+
+        clock.now += 11
+        assert len(pool.available()) == 2
+
+    def test_rejected_key_is_ejected(self):
+        """A 401 ejects the key for the long rejection window"""
+        clock = FakeClock()
+        pool = KeyPool(["a", "b"], rejection_ejection=600, clock=clock)
+
+        pool.release("a", status=401, error="Unauthorized")
+        clock.now += 300
+
+        assert [state.key for state in pool.available()] == ["b"]
+        stats = pool.get_stats()["per_key"][key_fingerprint("a")]
+        assert stats["rejected"] == 1
+        assert stats["last_error"] == "Unauthorized"
+
+    def test_all_ejected_returns_soonest(self):
+        """When every key is ejected the one returning soonest is used"""
+        clock = FakeClock()
+        pool = KeyPool(["a", "b"], clock=clock)
+        pool.release("a", status=429, retry_after=30)
+        pool.release("b", status=429, retry_after=5)
+
+        assert pool.acquire() == "b"
+        assert pool.get_stats()["exhausted"] == 1
+
+    def test_stats_do_not_expose_keys(self):
+        """Keys only appear as fingerprints in stats"""
+        pool = KeyPool(["secret-key"])
+        assert "secret-key" not in str(pool.get_stats())
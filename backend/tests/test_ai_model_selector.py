@@ -0,0 +1,119 @@
+"""
+Test suite for observed-performance model selection
+"""
+
+import time
+import pytest
+
+from app.ai.cost_optimizer import CostEntry, CostOptimizer, TaskComplexity
+
+
+GEMINI = "google/gemini-flash-1.5"
+HAIKU = "anthropic/claude-3-haiku"
+LLAMA = "meta-llama/llama-3.1-8b-instruct"
+
+
+@pytest.fixture
+def optimizer(tmp_path):
+    return CostOptimizer(daily_budget=50.0, cost_file=str(tmp_path / "costs.json"))
+
+
+def observe(optimizer, model, count=10, latency=5.0, cost=0.001, success=True):
+    """Feed ledger entries for a model without touching disk"""
+    entries = [
+        CostEntry(
+            timestamp=time.time(),
+            model=model,
+            input_tokens=500,
+            output_tokens=1500,
+            cost=cost,
+            task_type="story_generation",
+            success=success,
+            latency=latency
+        )
+        for _ in range(count)
+    ]
+    optimizer.record_batch(entries, save=False)
+
+
+class TestModelSelector:
+    """Test choices made from observed latency, acceptance and cost"""
+
+    def test_static_fallback_without_data(self, optimizer):
+        """With no observations the static thresholds decide"""
+        assert optimizer.model_selector.choose(TaskComplexity.MEDIUM) is None
+        assert optimizer.choose_optimal_model(TaskComplexity.MEDIUM) == HAIKU
+        assert optimizer.model_selector.static_choices == 1
+
+    def test_needs_min_samples(self, optimizer):
+        """Models with too few latency samples are not trusted yet"""
+        observe(optimizer, LLAMA, count=5, cost=0.0001)
+
+        evaluation = optimizer.model_selector.explain(TaskComplexity.SIMPLE)["models"][LLAMA]
+
+        assert evaluation["eligible"] is False
+        assert evaluation["reason"] == "5/10 latency samples"
+
+    def test_chooses_cheapest_within_slo(self, optimizer):
+        """The cheapest model meeting the SLO wins and is used by choose_optimal_model"""
+        observe(optimizer, HAIKU, cost=0.002)
+        observe(optimizer, GEMINI, cost=0.0005)
+
+        assert optimizer.choose_optimal_model(TaskComplexity.HIGH) == GEMINI
+        assert optimizer.model_selector.observed_choices == 1
+
+    def test_excludes_model_over_slo(self, optimizer):
+        """A cheap model whose p95 exceeds the SLO is skipped"""
+        observe(optimizer, LLAMA, cost=0.0001, latency=40.0)
+        observe(optimizer, GEMINI, cost=0.0005, latency=4.0)
+
+        explanation = optimizer.model_selector.explain(TaskComplexity.SIMPLE)
+
+        assert explanation["observed_choice"] == GEMINI
+        assert explanation["models"][LLAMA]["eligible"] is False
+        assert "exceeds the SLO" in explanation["models"][LLAMA]["reason"]
+
+    def test_acceptance_rate_raises_expected_cost(self, optimizer):
+        """A model whose stories fail the quality check costs more per accepted story"""
+        selector = optimizer.model_selector
+        observe(optimizer, LLAMA, cost=0.0002)
+        observe(optimizer, GEMINI, cost=0.0005)
+        for accepted in (True, False, False, False, False):
+            selector.record_quality(LLAMA, TaskComplexity.MEDIUM, accepted)
+        selector.record_quality(GEMINI, TaskComplexity.MEDIUM, True)
+
+        assert selector.expected_cost(LLAMA, TaskComplexity.MEDIUM) == pytest.approx(0.001)
+        assert selector.choose(TaskComplexity.MEDIUM) == GEMINI
+        # Acceptance is tracked per complexity
+        assert selector.choose(TaskComplexity.SIMPLE) == LLAMA
+
+    def test_cost_corrections_update_selector(self, optimizer):
+        """Billed-cost corrections flow into the selector's spend"""
+        optimizer.record_batch([
+            CostEntry(time.time(), GEMINI, 500, 1500, 0.001, "story_generation", True, generation_id="gen-1", latency=3.0)
+        ], save=False)
+
+        optimizer.apply_cost_corrections({"gen-1": 0.003}, save=False)
+
+        assert optimizer.model_selector.models[GEMINI].total_cost == pytest.approx(0.003)
+
+    def test_dry_run_report(self, optimizer):
+        """The dry-run report explains each choice without recording one"""
+        observe(optimizer, GEMINI, cost=0.0005)
+
+        report = optimizer.model_selector.dry_run_report()
+
+        assert set(report) == {"simple", "medium", "high"}
+        assert report["medium"]["source"] == "observed"
+        assert report["medium"]["choice"] == GEMINI
+        assert report["medium"]["static_choice"] == HAIKU
+        assert "within the 25s p95 SLO" in report["medium"]["reason"]
+        assert optimizer.model_selector.observed_choices == 0
+
+    def test_budget_exhausted_overrides_observations(self, tmp_path):
+        """An exhausted budget still returns no model"""
+        optimizer = CostOptimizer(daily_budget=1.0, cost_file=str(tmp_path / "costs.json"))
+        observe(optimizer, GEMINI, cost=0.0005)
+
+        assert optimizer.choose_optimal_model(TaskComplexity.HIGH) is None
+        assert optimizer.model_selector.dry_run_report()["high"]["source"] == "budget"
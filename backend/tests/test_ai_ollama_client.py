@@ -0,0 +1,237 @@
+"""
+Test suite for the local Ollama client
+"""
+
+import json
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from app.ai.ollama_client import OllamaClient
+from app.ai.story_generator import StoryGenerator
+from app.ai_config import get_story_client
+
+
+STORY_JSON = json.dumps({
+    "title": "The Lighthouse",
+    "chapters": [
+        {"id": 1, "text": "The lamp flickered over a dark sea.", "choices": [{"id": "a", "text": "Climb", "leads_to": 2}]},
+        {"id": 2, "text": "At the top a stranger waited.", "choices": []}
+    ]
+})
+
+
+def ndjson_lines(content: str, pieces: int = 4, load_duration: int = 0):
+    """Split content into Ollama /api/chat stream lines"""
+    size = max(1, len(content) // pieces + 1)
+    lines = [
+        json.dumps({"message": {"role": "assistant", "content": content[i:i + size]}, "done": False})
+        for i in range(0, len(content), size)
+    ]
+    lines.append(json.dumps({
+        "message": {"role": "assistant", "content": ""},
+        "done": True,
+        "prompt_eval_count": 120,
+        "eval_count": 40,
+        "load_duration": load_duration
+    }))
+    return [(line + "\n").encode() for line in lines]
+
+
+class FakeResponse:
+    def __init__(self, lines, status=200, delay=0.0):
+        self.status = status
+        self._lines = lines
+        self._delay = delay
+
+    @property
+    def content(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for line in self._lines:
+            if self._delay:
+                await asyncio.sleep(self._delay)
+            yield line
+
+    async def text(self):
+        return "model not found"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Stands in for aiohttp.ClientSession, recording posted payloads"""
+
+    def __init__(self, responses, payloads):
+        self._responses = responses
+        self.payloads = payloads
+
+    def post(self, url, json=None):
+        self.payloads.append(json)
+        return self._responses(json)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def fake_sessions(responses):
+    payloads = []
+    return payloads, patch(
+        'app.ai.ollama_client.aiohttp.ClientSession',
+        side_effect=lambda *args, **kwargs: FakeSession(responses, payloads)
+    )
+
+
+class TestOllamaClient:
+    """Test story generation against a local Ollama server"""
+
+    @pytest.fixture
+    def client(self):
+        return OllamaClient(base_url="http://ollama:11434", model="llama3.1:8b", keep_alive="45m", max_concurrency=2)
+
+    @pytest.mark.asyncio
+    async def test_generate_story_streams_chat(self, client):
+        """Stories come back in the OpenRouter shape with keep_alive and JSON mode requested"""
+        payloads, sessions = fake_sessions(lambda payload: FakeResponse(ndjson_lines(STORY_JSON)))
+
+        with sessions:
+            story = await client.generate_story("A lighthouse keeper", "eerie", "2 characters")
+
+        assert story["title"] == "The Lighthouse"
+        assert len(story["chapters"]) == 2
+        assert story["model_used"] == "ollama/llama3.1:8b"
+        assert story["generation_cost"] == 0.0
+        assert story["model_response"]["usage"] == {"prompt_tokens": 120, "completion_tokens": 40, "cost": 0.0}
+
+        payload = payloads[0]
+        assert payload["stream"] is True
+        assert payload["keep_alive"] == "45m"
+        assert payload["format"] == "json"
+        assert payload["options"]["num_predict"] > 0
+        assert "A lighthouse keeper" in payload["messages"][0]["content"]
+
+    @pytest.mark.asyncio
+    async def test_generate_story_error_after_retries(self, client):
+        """A server error on every attempt returns an error dict"""
+        _, sessions = fake_sessions(lambda payload: FakeResponse([], status=404))
+
+        with sessions:
+            result = await client.generate_story("Test premise", max_retries=1)
+
+        assert result["error"] == "Local model failed"
+        assert len(result["errors"]) == 2
+        assert "404" in result["errors"][0]
+
+    @pytest.mark.asyncio
+    async def test_inline_stream_error_raises(self, client):
+        """Errors reported inside the stream fail the attempt"""
+        error_line = [json.dumps({"error": "out of memory"}).encode()]
+        _, sessions = fake_sessions(lambda payload: FakeResponse(error_line))
+
+        with sessions:
+            result = await client.generate_story("Test premise", max_retries=0)
+
+        assert "out of memory" in result["errors"][0]
+
+    @pytest.mark.asyncio
+    async def test_generate_story_stream_events(self, client):
+        """Streaming yields title, chapters and the complete story"""
+        _, sessions = fake_sessions(lambda payload: FakeResponse(ndjson_lines(STORY_JSON, pieces=8)))
+
+        with sessions:
+            events = [event async for event in client.generate_story_stream("A lighthouse keeper")]
+
+        types = [event["type"] for event in events]
+        assert types.count("chapter") == 2
+        assert "title" in types
+        assert types[-1] == "complete"
+        assert events[-1]["story"]["streamed"] is True
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_capped(self, client):
+        """No more than max_concurrency requests reach the server at once"""
+        peak = 0
+
+        def responses(payload):
+            nonlocal peak
+            peak = max(peak, client.in_flight)
+            return FakeResponse(ndjson_lines(STORY_JSON), delay=0.01)
+
+        _, sessions = fake_sessions(responses)
+
+        with sessions:
+            stories = await asyncio.gather(*(client.generate_story(f"Premise {i}") for i in range(5)))
+
+        assert all("error" not in story for story in stories)
+        assert peak == 2
+        assert client.get_stats()["queued_requests"] >= 3
+
+    def test_concurrency_slots_follow_the_running_loop(self):
+        """A client built outside any loop can be contended on several loops in turn"""
+        client = OllamaClient(base_url="http://ollama:11434", model="llama3.1:8b", max_concurrency=1)
+        _, sessions = fake_sessions(lambda payload: FakeResponse(ndjson_lines(STORY_JSON), delay=0.01))
+
+        async def burst():
+            return await asyncio.gather(*(client.generate_story(f"Premise {i}") for i in range(3)))
+
+        with sessions:
+            for _ in range(2):
+                stories = asyncio.run(burst())
+                assert all("error" not in story for story in stories)
+
+        assert client.get_stats()["queued_requests"] >= 4
+
+    @pytest.mark.asyncio
+    async def test_cold_load_is_tracked(self, client):
+        """A slow model load in the final stream line counts as a cold start"""
+        lines = ndjson_lines(STORY_JSON, load_duration=3_000_000_000)
+        _, sessions = fake_sessions(lambda payload: FakeResponse(lines))
+
+        with sessions:
+            await client.generate_story("Test premise")
+
+        stats = client.get_stats()
+        assert stats["cold_loads"] == 1
+        assert stats["load_time"] == 3.0
+
+    @pytest.mark.asyncio
+    async def test_preload_and_unload(self, client):
+        """Empty chat requests load and release the model"""
+        payloads, sessions = fake_sessions(lambda payload: FakeResponse([]))
+
+        with sessions:
+            assert await client.preload() is True
+            assert await client.unload() is True
+
+        assert payloads[0] == {"model": "llama3.1:8b", "messages": [], "keep_alive": "45m"}
+        assert payloads[1]["keep_alive"] == 0
+
+
+class TestOllamaRouting:
+    """Test routing story traffic to the local provider"""
+
+    def test_get_story_client_routes_development_to_ollama(self):
+        """Development configs get the local client"""
+        with patch.dict('os.environ', {'ENVIRONMENT': 'development'}):
+            client = get_story_client()
+
+        assert isinstance(client, OllamaClient)
+        assert client.model == "llama3.1:8b"
+
+    def test_story_generator_uses_text_client(self):
+        """StoryGenerator sends narratives to the configured text client"""
+        local = OllamaClient()
+        generator = StoryGenerator(text_client=local)
+
+        assert generator.text_client is local
+
+        with patch.dict('os.environ', {'ENVIRONMENT': 'development'}):
+            assert isinstance(StoryGenerator().text_client, OllamaClient)
@@ -7,15 +7,24 @@ import pytest
 import asyncio
 from unittest.mock import AsyncMock, patch, MagicMock
 import aiohttp
+import httpx
 import json
 import time
 
 from app.ai.openrouter_client import (
     OpenRouterClient, 
     OpenRouterModel, 
+    OpenRouterTransport,
     ModelCosts,
+    HedgingPolicy,
     setup_openrouter_client
 )
+from app.ai.story_cache import StoryCache
+from app.ai.similarity_cache import SimilarityCache
+from app.ai.rate_limiter import RateLimiter, RateLimitedError
+from app.ai.key_pool import KeyPool, KeyStrategy, KeyRejectedError
+from app.ai.deadline import Deadline, DeadlineExceeded
+from app.ai.circuit_breaker import CircuitBreaker, CircuitState
 
 
 class TestOpenRouterClient:
@@ -106,6 +115,599 @@ class TestOpenRouterClient:
             assert "fallback_error" in result
             assert client.failed_requests == 2
     
+    @pytest.mark.asyncio
+    async def test_generate_story_hedges_slow_primary(self, mock_response_data):
+        """Test fallback is fired concurrently when the primary is slow"""
+        client = OpenRouterClient("test_key", hedging=HedgingPolicy(initial_delay=0.05))
+        primary_cancelled = asyncio.Event()
+        
+        async def side_effect(*args, **kwargs):
+            if kwargs.get('model') == OpenRouterModel.GEMINI_FLASH:
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    primary_cancelled.set()
+                    raise
+            return mock_response_data
+        
+        with patch.object(client, '_make_api_request', side_effect=side_effect):
+            start = time.time()
+            result = await client.generate_story("Test premise")
+            await asyncio.sleep(0)
+        
+        assert time.time() - start < 1
+        assert result["model_used"] == "claude-haiku"
+        assert primary_cancelled.is_set()
+        
+        stats = client.get_stats()["hedging"]
+        assert stats["hedged_requests"] == 1
+        assert stats["hedge_rate"] == 1.0
+        assert stats["fallback_wins"] == 1
+        assert stats["wasted_cost"] > 0
+    
+    @pytest.mark.asyncio
+    async def test_generate_story_fast_primary_not_hedged(self, client, mock_response_data):
+        """Test no hedge is fired when the primary answers within the delay"""
+        with patch.object(client, '_make_api_request', return_value=mock_response_data) as mock_request:
+            result = await client.generate_story("Test premise")
+        
+        assert result["model_used"] == "gemini-flash"
+        assert mock_request.call_count == 1
+        assert client.get_stats()["hedging"]["hedged_requests"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_primary_losing_to_hedges_opens_breaker(self, mock_response_data):
+        """Test a degraded primary that keeps losing to hedges trips its latency breaker"""
+        client = OpenRouterClient("test_key", hedging=HedgingPolicy(initial_delay=0.01))
+        client.breakers[OpenRouterModel.GEMINI_FLASH] = CircuitBreaker(
+            OpenRouterModel.GEMINI_FLASH.value, min_requests=5, latency_threshold=0.04
+        )
+    
+        async def side_effect(*args, **kwargs):
+            if kwargs.get('model') == OpenRouterModel.GEMINI_FLASH:
+                await asyncio.sleep(5)
+            await asyncio.sleep(0.05)
+            return mock_response_data
+    
+        with patch.object(client, '_make_api_request', side_effect=side_effect):
+            for i in range(5):
+                result = await client.generate_story(f"Test premise {i}")
+                assert result["model_used"] == "claude-haiku"
+                await asyncio.sleep(0)
+    
+        breaker = client.breakers[OpenRouterModel.GEMINI_FLASH]
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.last_open_reason.startswith("p95 latency")
+    
+    def test_hedge_delay_uses_latency_percentile(self):
+        """Test hedge delay follows observed primary p95 within bounds"""
+        client = OpenRouterClient("test_key", hedging=HedgingPolicy(min_samples=10, min_delay=1.0, max_delay=10.0))
+        assert client._hedge_delay() == client.hedging.initial_delay
+        
+        client.primary_latencies.extend([2.0] * 95 + [6.0] * 5)
+        assert client._hedge_delay() == 6.0
+        
+        client.primary_latencies.extend([30.0] * 100)
+        assert client._hedge_delay() == 10.0
+    
+    @pytest.mark.asyncio
+    async def test_generate_story_skips_open_primary_breaker(self, client, mock_response_data):
+        """Test an open primary breaker sends the request straight to the fallback"""
+        for _ in range(10):
+            client.breakers[OpenRouterModel.GEMINI_FLASH].record_failure(1.0)
+        
+        with patch.object(client, '_make_api_request', return_value=mock_response_data) as mock_request:
+            result = await client.generate_story("Test premise")
+        
+        assert result["model_used"] == "claude-haiku"
+        assert mock_request.call_count == 1
+        assert mock_request.call_args.kwargs["model"] == OpenRouterModel.CLAUDE_HAIKU
+        
+        stats = client.get_stats()
+        assert stats["breaker_skips"] == 1
+        assert stats["circuit_breakers"]["google/gemini-flash-1.5"]["state"] == "open"
+    
+    @pytest.mark.asyncio
+    async def test_generate_story_both_breakers_open(self, client):
+        """Test requests fail fast without network calls when every breaker is open"""
+        for breaker in client.breakers.values():
+            for _ in range(10):
+                breaker.record_failure(1.0)
+        
+        with patch.object(client, '_make_api_request') as mock_request:
+            result = await client.generate_story("Test premise")
+        
+        assert result["error"] == "Both primary and fallback models failed"
+        assert "Circuit open" in result["primary_error"]
+        assert mock_request.call_count == 0
+    
+    @pytest.mark.asyncio
+    async def test_generate_story_cache_hit_skips_network(self, tmp_path, mock_response_data):
+        """Test a repeated request is served from the cache"""
+        cache = StoryCache(db_path=str(tmp_path / "cache.db"))
+        client = OpenRouterClient("test_key", cache=cache)
+        
+        with patch.object(client, '_make_api_request', return_value=mock_response_data) as mock_request:
+            first = await client.generate_story("Test premise", "neutral", "2 characters")
+            second = await client.generate_story("  test PREMISE", "Neutral", "2 characters")
+        
+        assert mock_request.call_count == 1
+        assert "cache_hit" not in first
+        assert second["cache_hit"] is True
+        assert second["generation_cost"] == 0.0
+        assert second["title"] == first["title"]
+        assert client.get_stats()["cache"]["hits"] == 1
+        cache.close()
+    
+    @pytest.mark.asyncio
+    async def test_generate_story_errors_not_cached(self, tmp_path):
+        """Test failed generations are not written to the cache"""
+        cache = StoryCache(db_path=str(tmp_path / "cache.db"))
+        client = OpenRouterClient("test_key", cache=cache)
+        
+        with patch.object(client, '_make_api_request', side_effect=Exception("API failed")):
+            result = await client.generate_story("Test premise")
+        
+        assert "error" in result
+        assert cache.get_stats()["disk_entries"] == 0
+        cache.close()
+    
+    @pytest.mark.asyncio
+    async def test_generate_story_similarity_cache_hit(self, mock_response_data):
+        """Test a near-duplicate premise is served from the similarity cache"""
+        client = OpenRouterClient("test_key", similarity_cache=SimilarityCache())
+        
+        with patch.object(client, '_make_api_request', return_value=mock_response_data) as mock_request:
+            await client.generate_story("A cyberpunk detective story", "gritty", "a detective")
+            result = await client.generate_story("Cyberpunk detective tale in Neo Tokyo", "gritty", "a detective")
+        
+        assert mock_request.call_count == 1
+        assert result["similar_cache_hit"] is True
+        assert result["requested_premise"] == "Cyberpunk detective tale in Neo Tokyo"
+        assert result["generation_cost"] == 0.0
+        assert client.get_stats()["similarity_cache"]["hits"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_generate_story_coalesces_identical_requests(self, client, mock_response_data):
+        """Test concurrent identical requests share one API call"""
+        async def slow_response(*args, **kwargs):
+            await asyncio.sleep(0.02)
+            return mock_response_data
+        
+        with patch.object(client, '_make_api_request', side_effect=slow_response) as mock_request:
+            results = await asyncio.gather(*[
+                client.generate_story("Test premise", "neutral", "2 characters") for _ in range(3)
+            ])
+        
+        assert mock_request.call_count == 1
+        assert sum(1 for r in results if r.get("coalesced")) == 2
+        assert sum(1 for r in results if r["generation_cost"] > 0) == 1
+        assert client.get_stats()["single_flight"]["calls_saved"] == 2
+        
+        results[0]["title"] = "Mutated"
+        assert results[1]["title"] == "Test Story"
+    
+    @pytest.mark.asyncio
+    async def test_coalesced_follower_outlives_leader_deadline(self, client, mock_response_data):
+        """Test a follower with time left is not failed by the leader's expired deadline"""
+        async def deadline_bound_response(*args, deadline=None, **kwargs):
+            await asyncio.sleep(min(0.05, deadline.remaining()))
+            if deadline.expired():
+                raise DeadlineExceeded("Deadline exceeded")
+            return mock_response_data
+        
+        with patch.object(client, '_make_api_request', side_effect=deadline_bound_response) as mock_request:
+            leader, follower = await asyncio.gather(
+                client.generate_story("Test premise", deadline=Deadline(0.01)),
+                client.generate_story("Test premise", deadline=Deadline(1.0)),
+                return_exceptions=True
+            )
+        
+        assert isinstance(leader, DeadlineExceeded)
+        assert follower["title"] == "Test Story"
+        assert mock_request.call_count == 2
+        assert client.failed_requests == 0
+    
+    @pytest.mark.asyncio
+    async def test_coalesced_follower_gives_up_at_its_own_deadline(self, client, mock_response_data):
+        """Test a follower stops waiting when its own deadline runs out before the leader's call"""
+        async def slow_response(*args, **kwargs):
+            await asyncio.sleep(0.1)
+            return mock_response_data
+        
+        with patch.object(client, '_make_api_request', side_effect=slow_response):
+            leader, follower = await asyncio.gather(
+                client.generate_story("Test premise", deadline=Deadline(1.0)),
+                client.generate_story("Test premise", deadline=Deadline(0.02)),
+                return_exceptions=True
+            )
+        
+        assert leader["title"] == "Test Story"
+        assert isinstance(follower, DeadlineExceeded)
+    
+    def _continuation_side_effect(self, prompts):
+        """Fake API answering chapter and summary prompts"""
+        async def fake_request(**kwargs):
+            prompt = kwargs["messages"][0]["content"]
+            prompts.append(prompt)
+            if prompt.startswith("Update the running summary"):
+                content = json.dumps({"summary": "The hero set out.", "facts": ["The hero carries a lamp"]})
+            else:
+                chapter = {"text": f"Chapter prose {len(prompts)} " + "word " * 200, "choices": [{"id": "a", "text": "Go on"}]}
+                content = json.dumps(chapter)
+            return {"choices": [{"message": {"content": content}}], "usage": {"prompt_tokens": 50, "completion_tokens": 50}}
+        return fake_request
+    
+    @pytest.mark.asyncio
+    async def test_continue_story_appends_chapter_and_refreshes_summary(self, client):
+        """Test continuation serves a chapter, then summarizes in the background"""
+        prompts = []
+        story_state = {
+            "premise": "A lighthouse keeper",
+            "mood": "eerie",
+            "chapters": [{"id": 1, "text": "The lamp went dark.", "choices": [{"id": "a", "text": "Climb the stairs"}]}]
+        }
+        
+        with patch.object(client, '_make_api_request', side_effect=self._continuation_side_effect(prompts)):
+            result = await client.continue_story(story_state, "a")
+            
+            assert result["chapter"]["id"] == 2
+            assert result["chapter"]["choices"][0]["id"] == "a"
+            assert story_state["path"] == ["a"]
+            assert "Climb the stairs" in prompts[0]
+            
+            await client.wait_for_summary(story_state["story_id"])
+            assert story_state["summary"] == "The hero set out."
+            assert story_state["facts"] == ["The hero carries a lamp"]
+            assert story_state["summarized_through"] == 1
+            
+            await client.continue_story(story_state, "a")
+            chapter_prompt = prompts[-1]
+            await client.wait_for_summary(story_state["story_id"])
+        
+        # Chapter 1 is now only present through the summary
+        assert "The lamp went dark." not in chapter_prompt
+        assert "The hero set out." in chapter_prompt
+        assert client.get_stats()["continuation"]["summary_refreshes"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_continue_story_prompt_stays_bounded(self, client):
+        """Test prompt size does not grow with story depth"""
+        prompts = []
+        story_state = {
+            "premise": "A long road",
+            "chapters": [{"id": 1, "text": "Start.", "choices": [{"id": "a", "text": "Walk"}]}]
+        }
+        
+        with patch.object(client, '_make_api_request', side_effect=self._continuation_side_effect(prompts)):
+            for _ in range(12):
+                await client.continue_story(story_state, "a")
+                await client.wait_for_summary(story_state["story_id"])
+        
+        chapter_prompts = [p for p in prompts if not p.startswith("Update the running summary")]
+        assert len(story_state["chapters"]) == 13
+        assert len(chapter_prompts[-1]) <= len(chapter_prompts[2]) * 1.1
+    
+    @pytest.mark.asyncio
+    async def test_continue_story_unknown_choice(self, client):
+        """Test an unknown choice id is rejected before any request"""
+        story_state = {"chapters": [{"id": 1, "text": "x", "choices": [{"id": "a", "text": "Go"}]}]}
+        
+        with patch.object(client, '_make_api_request') as mock_request:
+            with pytest.raises(ValueError):
+                await client.continue_story(story_state, "z")
+        
+        assert mock_request.call_count == 0
+    
+    @pytest.mark.asyncio
+    async def test_generate_stories_completion_order_and_failures(self, client, mock_response_data):
+        """Test batch results stream in completion order with partial failures"""
+        async def side_effect(*args, **kwargs):
+            prompt = kwargs["messages"][0]["content"]
+            if "slow premise" in prompt:
+                await asyncio.sleep(0.05)
+            if "broken premise" in prompt:
+                raise Exception("API failed")
+            return mock_response_data
+        
+        requests = [
+            {"premise": "slow premise", "mood": "calm"},
+            "fast premise",
+            {"premise": "broken premise"}
+        ]
+        
+        with patch.object(client, '_make_api_request', side_effect=side_effect):
+            results = [result async for result in client.generate_stories(requests, concurrency=3)]
+        
+        assert [r["index"] for r in results] == [1, 2, 0]
+        assert results[0]["success"] is True
+        assert results[1]["success"] is False
+        assert "failed" in results[1]["error"]
+        
+        report = client.last_batch_report
+        assert report["total"] == 3
+        assert report["succeeded"] == 2
+        assert report["failed"] == 1
+        assert report["failures"][0]["index"] == 2
+        assert client._current_batch() is None
+    
+    @pytest.mark.asyncio
+    async def test_generate_stories_respects_concurrency_caps(self, client, mock_response_data):
+        """Test batch concurrency and per-model caps bound in-flight requests"""
+        in_flight = 0
+        peak = 0
+        sessions = set()
+        
+        async def fake_post(headers, payload, timeout):
+            nonlocal in_flight, peak
+            sessions.add(id(client._current_batch().session))
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return dict(mock_response_data)
+        
+        with patch.object(client, '_post_completion', side_effect=fake_post):
+            results = [
+                result async for result in client.generate_stories(
+                    [f"premise {i}" for i in range(8)],
+                    concurrency=6,
+                    model_concurrency={OpenRouterModel.GEMINI_FLASH: 2}
+                )
+            ]
+        
+        assert len(results) == 8
+        assert all(r["success"] for r in results)
+        assert peak == 2
+        assert len(sessions) == 1
+        assert client._current_batch() is None
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_batches_keep_their_own_scope(self, client, mock_response_data):
+        """Test overlapping batches and unrelated calls never share a batch's session or caps"""
+        seen = {}
+        
+        async def fake_post(headers, payload, timeout):
+            scope = client._current_batch()
+            prompt = payload["messages"][0]["content"]
+            label = "short" if "short" in prompt else "long" if "long" in prompt else "single"
+            if scope is not None:
+                seen.setdefault(label, set()).add(id(scope.session))
+                assert not scope.session.closed
+            else:
+                seen.setdefault(label, set()).add(None)
+            await asyncio.sleep(0.05 if label == "long" else 0.01)
+            if scope is not None:
+                # Still open even if the other batch has finished
+                assert not scope.session.closed
+            return dict(mock_response_data)
+        
+        async def collect(requests, **kwargs):
+            return [result async for result in client.generate_stories(requests, **kwargs)]
+        
+        with patch.object(client, '_post_completion', side_effect=fake_post):
+            short, long, single = await asyncio.gather(
+                collect(["short premise"], model_concurrency={OpenRouterModel.GEMINI_FLASH: 1}),
+                collect(["long premise 1", "long premise 2"]),
+                client.generate_story("single premise")
+            )
+        
+        assert all(r["success"] for r in short + long)
+        assert "error" not in single
+        assert seen["single"] == {None}
+        assert len(seen["long"]) == 1
+        assert seen["short"].isdisjoint(seen["long"])
+    
+    @pytest.mark.asyncio
+    async def test_api_request_attempts_share_the_deadline(self, mock_response_data):
+        """Test each attempt's timeout comes from the time left and no retry outlives the deadline"""
+        limiter = RateLimiter(rate=100.0, capacity=10)
+        client = OpenRouterClient("test_key", rate_limiter=limiter)
+        timeouts = []
+        
+        async def fake_post(headers, payload, timeout):
+            timeouts.append(timeout)
+            await asyncio.sleep(0.05)
+            raise RateLimitedError("API request failed: 429 - slow down", retry_after=0.05)
+        
+        deadline = Deadline(0.15)
+        with patch.object(client, '_post_completion', side_effect=fake_post):
+            with pytest.raises(DeadlineExceeded):
+                await client._make_api_request(
+                    OpenRouterModel.GEMINI_FLASH, [{"role": "user", "content": "hi"}], deadline=deadline
+                )
+        
+        # The first attempt got the whole budget, the retry only what was left,
+        # and the third never started because its Retry-After wait no longer fit
+        assert len(timeouts) == 2
+        assert timeouts[0] <= 0.15
+        assert timeouts[1] < timeouts[0] - 0.05
+    
+    @pytest.mark.asyncio
+    async def test_expired_deadline_stops_the_fallback_chain(self, client):
+        """Test running out of time neither starts the fallback nor counts as a failure"""
+        async def out_of_time(*args, deadline=None, **kwargs):
+            await asyncio.sleep(deadline.remaining())
+            raise DeadlineExceeded("Deadline exceeded")
+        
+        with patch.object(client, '_make_api_request', side_effect=out_of_time) as mock_request:
+            with pytest.raises(DeadlineExceeded):
+                await client.generate_story("Test premise", deadline=Deadline(0.01))
+        
+        assert mock_request.call_count == 1
+        assert mock_request.call_args.kwargs["model"] == OpenRouterModel.GEMINI_FLASH
+        assert client.failed_requests == 0
+    
+    @pytest.mark.asyncio
+    async def test_api_request_rate_limited_is_queued_and_retried(self, mock_response_data):
+        """Test a 429 backs off and retries instead of failing over"""
+        limiter = RateLimiter(rate=100.0, capacity=10)
+        client = OpenRouterClient("test_key", rate_limiter=limiter)
+        responses = [RateLimitedError("API request failed: 429 - slow down", retry_after=0.02), dict(mock_response_data)]
+        
+        async def fake_post(headers, payload, timeout):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        
+        with patch.object(client, '_post_completion', side_effect=fake_post):
+            result = await client.generate_story("Test premise")
+        
+        assert result["model_used"] == "gemini-flash"
+        assert client.failed_requests == 0
+        assert client.get_stats()["rate_limiter"]["rate_limited"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_api_request_rotates_keys_on_rejection(self, mock_response_data):
+        """Test a rejected or throttled key is ejected and the request moves to another key"""
+        pool = KeyPool(["key_a", "key_b"], strategy=KeyStrategy.ROUND_ROBIN)
+        client = OpenRouterClient(key_pool=pool, rate_limiter=RateLimiter(rate=100.0, capacity=10))
+        used = []
+        
+        async def fake_post(headers, payload, timeout):
+            used.append(headers["Authorization"])
+            if headers["Authorization"] == "Bearer key_a":
+                raise KeyRejectedError("API request failed: 401 - bad key", 401)
+            return dict(mock_response_data)
+        
+        with patch.object(client, '_post_completion', side_effect=fake_post):
+            await client._make_api_request(model=OpenRouterModel.GEMINI_FLASH, messages=[])
+            await client._make_api_request(model=OpenRouterModel.GEMINI_FLASH, messages=[])
+        
+        assert used == ["Bearer key_a", "Bearer key_b", "Bearer key_b"]
+        assert client.api_key == "key_a"
+        assert client.get_stats()["key_pool"]["available"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_api_request_rate_limit_retries_exhausted(self):
+        """Test persistent 429s eventually surface as an error"""
+        limiter = RateLimiter(rate=100.0, capacity=10)
+        client = OpenRouterClient("test_key", rate_limiter=limiter, max_rate_limit_retries=1)
+        
+        with patch.object(client, '_post_completion', side_effect=RateLimitedError("429", retry_after=0)):
+            with pytest.raises(RateLimitedError):
+                await client._make_api_request(
+                    model=OpenRouterModel.GEMINI_FLASH,
+                    messages=[{"role": "user", "content": "test"}]
+                )
+        
+        assert limiter.get_stats()["rate_limited"] == 2
+    
+    @pytest.fixture
+    def mock_outline_data(self):
+        """Mock outline response"""
+        outline = {
+            "title": "The Lantern Keeper",
+            "chapters": [
+                {"id": 1, "beat": "Ada finds the lantern", "choices": [
+                    {"id": "a", "text": "Light it", "leads_to": 2},
+                    {"id": "b", "text": "Bury it", "leads_to": 3}
+                ]},
+                {"id": 2, "beat": "The lantern wakes the harbour", "choices": []},
+                {"id": 3, "beat": "The ground glows", "choices": []}
+            ]
+        }
+        return {
+            "choices": [{"message": {"content": json.dumps(outline)}}],
+            "usage": {"prompt_tokens": 80, "completion_tokens": 120}
+        }
+    
+    @pytest.mark.asyncio
+    async def test_generate_story_outlined(self, client, mock_outline_data):
+        """Test outline-then-parallel generation assembles the story shape"""
+        in_flight = 0
+        peak = 0
+        
+        async def side_effect(*args, **kwargs):
+            nonlocal in_flight, peak
+            prompt = kwargs["messages"][0]["content"]
+            if "Do not write the chapters yet" in prompt:
+                return mock_outline_data
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            chapter_line = next(line for line in prompt.splitlines() if line.startswith("Write chapter"))
+            return {
+                "choices": [{"message": {"content": f"Prose for {chapter_line}"}}],
+                "usage": {"prompt_tokens": 50, "completion_tokens": 100}
+            }
+        
+        with patch.object(client, '_make_api_request', side_effect=side_effect):
+            result = await client.generate_story_outlined("Test premise", max_parallel=2)
+        
+        assert result["title"] == "The Lantern Keeper"
+        assert [c["id"] for c in result["chapters"]] == [1, 2, 3]
+        assert "Write chapter 2" in result["chapters"][1]["text"]
+        assert result["chapters"][0]["choices"][0]["leads_to"] == 2
+        assert result["generation_mode"] == "outline_parallel"
+        assert result["word_count"] > 0
+        assert result["generation_cost"] > 0
+        assert peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_generate_story_outlined_outline_failure(self, client):
+        """Test outline mode reports failure when the outline is unusable"""
+        bad_outline = {"choices": [{"message": {"content": "no json here"}}]}
+        
+        with patch.object(client, '_make_api_request', return_value=bad_outline):
+            result = await client.generate_story_outlined("Test premise")
+        
+        assert result["error"] == "Both primary and fallback models failed"
+        assert "JSON" in result["primary_error"]
+    
+    @pytest.mark.asyncio
+    async def test_generate_story_stream_yields_chapters(self, client, mock_response_data):
+        """Test streaming emits chapters before the complete story"""
+        content = mock_response_data["choices"][0]["message"]["content"]
+
+        async def fake_stream(*args, **kwargs):
+            for i in range(0, len(content), 10):
+                yield {"content": content[i:i + 10], "usage": None, "id": "gen-stream"}
+            yield {"content": "", "usage": {"prompt_tokens": 100, "completion_tokens": 200}, "id": "gen-stream"}
+
+        with patch.object(client, '_stream_api_request', side_effect=fake_stream):
+            events = [event async for event in client.generate_story_stream("Test premise")]
+
+        types = [event["type"] for event in events]
+        assert types.index("chapter") < types.index("complete")
+        assert "title" in types
+        assert events[-1]["story"]["model_used"] == "gemini-flash"
+        assert events[-1]["story"]["generation_cost"] > 0
+        assert events[-1]["story"]["premise"] == "Test premise"
+        assert events[-1]["story"]["model_response"]["id"] == "gen-stream"
+        assert events[-1]["story"]["model_response"]["usage"]["completion_tokens"] == 200
+
+    @pytest.mark.asyncio
+    async def test_generate_story_stream_fallback(self, client, mock_response_data):
+        """Test streaming falls back when the primary fails before any chapter"""
+        content = mock_response_data["choices"][0]["message"]["content"]
+
+        async def fake_stream(*args, **kwargs):
+            if kwargs.get('model') == OpenRouterModel.GEMINI_FLASH:
+                raise Exception("Primary stream failed")
+            yield {"content": content, "usage": None}
+
+        with patch.object(client, '_stream_api_request', side_effect=fake_stream):
+            events = [event async for event in client.generate_story_stream("Test premise")]
+
+        assert events[-1]["type"] == "complete"
+        assert events[-1]["story"]["model_used"] == "claude-haiku"
+        assert client.failed_requests == 1
+
+    def test_parse_sse_line(self, client):
+        """Test server-sent event parsing"""
+        chunk = {"choices": [{"delta": {"content": "Hello"}, "finish_reason": None}]}
+
+        assert client._parse_sse_line(": OPENROUTER PROCESSING") is None
+        assert client._parse_sse_line("") is None
+        assert client._parse_sse_line("data: [DONE]") == {"done": True}
+        assert client._parse_sse_line(f"data: {json.dumps(chunk)}")["content"] == "Hello"
+
+        with pytest.raises(Exception, match="Stream error"):
+            client._parse_sse_line('data: {"error": {"message": "overloaded"}}')
+
     @pytest.mark.asyncio
     async def test_api_request_success(self, client):
         """Test successful API request"""
@@ -157,6 +759,87 @@ class TestOpenRouterClient:
                 messages=[{"role": "user", "content": "test"}]
             )
     
+    @pytest.mark.asyncio
+    async def test_http2_transport_reuses_one_client(self, mock_response_data):
+        """Test the HTTP/2 transport sends every completion through the shared client"""
+        seen = []
+        
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(200, json=mock_response_data, headers={"x-ratelimit-remaining": "9"})
+        
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        client = OpenRouterClient(api_key="test_key", http_client=http_client)
+        assert client.transport == OpenRouterTransport.HTTP2
+        
+        with patch('aiohttp.ClientSession') as mock_session:
+            results = await asyncio.gather(*(
+                client._make_api_request(OpenRouterModel.GEMINI_FLASH, [{"role": "user", "content": "test"}])
+                for _ in range(3)
+            ))
+        
+        mock_session.assert_not_called()
+        assert len(seen) == 3
+        assert seen[0].headers["Authorization"] == "Bearer test_key"
+        assert json.loads(seen[0].content)["model"] == OpenRouterModel.GEMINI_FLASH.value
+        assert results[0]["usage"]["completion_tokens"] == 200
+        assert client.get_stats()["transport"] == "http2"
+        
+        await client.close()
+        assert http_client.is_closed
+    
+    @pytest.mark.asyncio
+    async def test_http2_transport_maps_errors(self):
+        """Test HTTP/2 responses raise the same rate-limit and rejection errors"""
+        def handler(request):
+            if request.headers["Authorization"] == "Bearer limited":
+                return httpx.Response(429, text="slow down", headers={"Retry-After": "7"})
+            return httpx.Response(401, text="bad key")
+        
+        client = OpenRouterClient(
+            api_key="limited",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+        payload = {"model": OpenRouterModel.GEMINI_FLASH.value, "messages": []}
+        
+        with pytest.raises(RateLimitedError) as rate_limited:
+            await client._post_completion({"Authorization": "Bearer limited"}, payload, 5)
+        assert rate_limited.value.retry_after == 7.0
+        
+        with pytest.raises(KeyRejectedError) as rejected:
+            await client._post_completion({"Authorization": "Bearer other"}, payload, 5)
+        assert rejected.value.status == 401
+        
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_http2_transport_streams(self):
+        """Test streaming completions over the HTTP/2 client"""
+        chunk = {"choices": [{"delta": {"content": "Hello"}, "finish_reason": None}]}
+        body = f"data: {json.dumps(chunk)}\n\n: OPENROUTER PROCESSING\n\ndata: [DONE]\n\n"
+        
+        client = OpenRouterClient(
+            api_key="test_key",
+            rate_limiter=RateLimiter(),
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, text=body)))
+        )
+        
+        events = [
+            event async for event in
+            client._stream_api_request(OpenRouterModel.GEMINI_FLASH, [{"role": "user", "content": "test"}])
+        ]
+        
+        assert [event["content"] for event in events] == ["Hello"]
+        assert client.total_requests == 1
+        await client.close()
+    
+    def test_transport_from_environment(self):
+        """Test the transport is selectable through OPENROUTER_TRANSPORT"""
+        with patch.dict('os.environ', {'OPENROUTER_TRANSPORT': 'http2'}):
+            assert OpenRouterClient(api_key="test_key").transport == OpenRouterTransport.HTTP2
+        
+        assert OpenRouterClient(api_key="test_key", transport="aiohttp").transport == OpenRouterTransport.AIOHTTP
+    
     def test_build_story_prompt(self, client):
         """Test story prompt building"""
         prompt = client._build_story_prompt(
@@ -207,6 +890,61 @@ class TestOpenRouterClient:
         assert result["title"] == "A neutral story"
         assert "fallback_generated" in result
     
+    def test_parse_story_response_repairs_without_fallback(self, client):
+        """Test fenced JSON with trailing commas is repaired instead of discarded"""
+        response = {
+            "choices": [{
+                "message": {
+                    "content": '```json\n{"title": "Fixed", "chapters": [{"id": 1, "text": "Saved words.", "choices": [],},],}\n```'
+                }
+            }]
+        }
+        
+        result = client._parse_story_response(response, "test premise", "neutral")
+        
+        assert result["title"] == "Fixed"
+        assert "fallback_generated" not in result
+        assert result["json_repairs"] == ["code_fence", "trailing_commas"]
+        assert client.get_stats()["json_repair"]["repaired"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_structured_output_requested_for_supported_models(self, mock_response_data):
+        """Test response_format is sent to Gemini Flash but not to Claude Haiku"""
+        client = OpenRouterClient("test_key", rate_limiter=RateLimiter(rate=100.0, capacity=10))
+        payloads = []
+        
+        async def fake_post(headers, payload, timeout):
+            payloads.append(payload)
+            return dict(mock_response_data)
+        
+        with patch.object(client, '_post_completion', side_effect=fake_post):
+            await client._generate_with_model(OpenRouterModel.GEMINI_FLASH, "prompt", "premise", "mood")
+            await client._generate_with_model(OpenRouterModel.CLAUDE_HAIKU, "prompt", "premise", "mood")
+        
+        assert payloads[0]["response_format"]["type"] == "json_schema"
+        assert "response_format" not in payloads[1]
+    
+    @pytest.mark.asyncio
+    async def test_story_max_tokens_follows_observed_usage(self, client):
+        """Test max_tokens is derived from target length and shrinks after calibration"""
+        requested = []
+        story = {"title": "Short", "chapters": [{"id": 1, "text": "word " * 100, "choices": []}]}
+        
+        async def fake_request(**kwargs):
+            requested.append(kwargs["max_tokens"])
+            return {
+                "choices": [{"message": {"content": json.dumps(story)}}],
+                "usage": {"prompt_tokens": 300, "completion_tokens": 170}
+            }
+        
+        with patch.object(client, '_make_api_request', side_effect=fake_request):
+            for _ in range(3):
+                await client._generate_with_model(OpenRouterModel.GEMINI_FLASH, "prompt", "premise", "mood")
+        
+        assert requested[0] < 2000
+        assert requested[-1] < requested[0]
+        assert client.get_stats()["token_budget"]["calibrations"] == 3
+    
     def test_create_fallback_story(self, client):
         """Test fallback story creation"""
         content = "Chapter 1 content here.\n\nChapter 2 content here.\n\nChapter 3 content here."
@@ -0,0 +1,138 @@
+"""
+Test suite for the shared token-bucket rate limiter
+"""
+
+import time
+import asyncio
+import pytest
+
+from app.ai.rate_limiter import (
+    TokenBucket,
+    RateLimiter,
+    parse_retry_after,
+    parse_rate_limit_headers
+)
+from app.ai.deadline import DeadlineExceeded
+
+
+class TestHeaderParsing:
+    """Test rate-limit header helpers"""
+
+    def test_parse_retry_after(self):
+        """Retry-After seconds are parsed, junk is ignored"""
+        assert parse_retry_after("2.5") == 2.5
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
+
+    def test_parse_rate_limit_headers(self):
+        """X-RateLimit-* headers become numbers"""
+        info = parse_rate_limit_headers({"X-RateLimit-Limit": "20", "X-RateLimit-Remaining": "0"})
+
+        assert info == {"limit": 20.0, "remaining": 0.0}
+        assert parse_rate_limit_headers(None) == {}
+
+
+class TestTokenBucket:
+    """Test token bucket queueing"""
+
+    @pytest.mark.asyncio
+    async def test_burst_then_queue(self):
+        """Requests beyond the burst wait for refill instead of failing"""
+        bucket = TokenBucket(rate=100.0, capacity=2)
+
+        waits = await asyncio.gather(*[bucket.acquire() for _ in range(4)])
+
+        assert waits[0] < 0.005 and waits[1] < 0.005
+        assert waits[3] >= 0.015
+        stats = bucket.get_stats()
+        assert stats["acquired"] == 4
+        assert stats["max_queue_depth"] == 2
+        assert stats["queue_depth"] == 0
+
+    @pytest.mark.asyncio
+    async def test_block_for_delays_acquire(self):
+        """A Retry-After block holds every caller"""
+        bucket = TokenBucket(rate=100.0, capacity=5)
+        bucket.block_for(0.03)
+
+        start = time.monotonic()
+        await bucket.acquire()
+
+        assert time.monotonic() - start >= 0.025
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_returns_token(self):
+        """A cancelled waiter does not consume capacity"""
+        bucket = TokenBucket(rate=1.0, capacity=1)
+        await bucket.acquire()
+
+        waiter = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        assert bucket.waiting == 0
+        assert bucket.tokens > -1
+
+    @pytest.mark.asyncio
+    async def test_wait_beyond_max_wait_raises(self):
+        """A caller with too little time left fails fast and takes no token"""
+        bucket = TokenBucket(rate=100.0, capacity=5)
+        bucket.block_for(10)
+
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            await bucket.acquire(max_wait=0.5)
+
+        assert time.monotonic() - start < 0.1
+        assert bucket.acquired == 0
+        assert bucket.get_stats()["tokens"] == 5
+
+    @pytest.mark.asyncio
+    async def test_block_arriving_mid_wait_respects_max_wait(self):
+        """A Retry-After that lands while waiting is checked against max_wait too"""
+        bucket = TokenBucket(rate=50.0, capacity=1)
+        await bucket.acquire()
+
+        waiter = asyncio.ensure_future(bucket.acquire(max_wait=0.5))
+        await asyncio.sleep(0)
+        bucket.block_for(10)
+
+        with pytest.raises(DeadlineExceeded):
+            await waiter
+        assert bucket.waiting == 0
+
+
+class TestRateLimiter:
+    """Test the per key and model registry"""
+
+    def test_buckets_per_key_and_model(self):
+        """Keys and models get independent buckets"""
+        limiter = RateLimiter()
+
+        assert limiter.bucket("key-a", "m1") is limiter.bucket("key-a", "m1")
+        assert limiter.bucket("key-a", "m1") is not limiter.bucket("key-b", "m1")
+        assert limiter.bucket("key-a", "m1") is not limiter.bucket("key-a", "m2")
+        assert "key-a" not in str(limiter.get_stats())
+
+    def test_record_rate_limited_uses_retry_after(self):
+        """A 429 blocks the bucket for Retry-After or the default"""
+        limiter = RateLimiter(default_retry_after=7.0)
+
+        limiter.record_rate_limited("key", "m1", retry_after=2.0)
+        limiter.record_rate_limited("key", "m2")
+
+        assert 1.5 < limiter.bucket("key", "m1").get_stats()["blocked_for"] <= 2.0
+        assert 6.5 < limiter.bucket("key", "m2").get_stats()["blocked_for"] <= 7.0
+        assert limiter.get_stats()["rate_limited"] == 2
+
+    def test_update_from_headers_exhausted(self):
+        """Zero remaining requests blocks until the reported reset"""
+        limiter = RateLimiter()
+        reset_ms = (time.time() + 3) * 1000
+
+        limiter.update_from_headers("key", "m1", {"remaining": 0, "reset": reset_ms})
+
+        stats = limiter.bucket("key", "m1").get_stats()
+        assert stats["tokens"] <= 0
+        assert 2.0 < stats["blocked_for"] <= 3.0
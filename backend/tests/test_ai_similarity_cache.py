@@ -0,0 +1,98 @@
+"""
+Test suite for the near-duplicate premise cache
+"""
+
+import numpy as np
+
+from app.ai.similarity_cache import SimilarityCache
+
+
+def _story(title):
+    return {"title": title, "chapters": []}
+
+
+class TestSimilarityCache:
+    """Test vectorized nearest-neighbour lookups"""
+
+    def test_near_duplicate_premise_hits(self):
+        """Rephrased premises with the same subject are served"""
+        cache = SimilarityCache()
+        cache.add("a cyberpunk detective story", "gritty", "a detective", _story("Neon"))
+
+        match = cache.lookup("cyberpunk detective tale in neo tokyo", "gritty", "a detective")
+
+        assert match is not None
+        story, similarity, matched = match
+        assert story["title"] == "Neon"
+        assert similarity >= cache.threshold
+        assert matched == "a cyberpunk detective story"
+
+    def test_unrelated_premise_misses(self):
+        """Different subjects fall below the threshold"""
+        cache = SimilarityCache()
+        cache.add("a cyberpunk detective story", "gritty", "a detective", _story("Neon"))
+
+        assert cache.lookup("a cyberpunk heist story", "gritty", "a detective") is None
+        assert cache.lookup("a gardening guide", "gritty", "a detective") is None
+
+    def test_mood_and_characters_must_match(self):
+        """Only stories with the same mood and characters are candidates"""
+        cache = SimilarityCache()
+        cache.add("a cyberpunk detective story", "gritty", "a detective", _story("Neon"))
+
+        assert cache.lookup("a cyberpunk detective story", "cheerful", "a detective") is None
+        assert cache.lookup("a cyberpunk detective story", "gritty", "two robots") is None
+
+    def test_returns_copies(self):
+        """Mutating a served story does not change the index"""
+        cache = SimilarityCache()
+        cache.add("a haunted lighthouse", "eerie", "keeper", _story("Beacon"))
+
+        cache.lookup("a haunted lighthouse", "eerie", "keeper")[0]["title"] = "Changed"
+
+        assert cache.lookup("a haunted lighthouse", "eerie", "keeper")[0]["title"] == "Beacon"
+
+    def test_bounded_capacity_evicts_least_recently_used(self):
+        """The least recently used entry is replaced when the index is full"""
+        cache = SimilarityCache(capacity=2)
+        cache.add("a haunted lighthouse", "eerie", "keeper", _story("Beacon"))
+        cache.add("a dragon bakery", "eerie", "keeper", _story("Crumbs"))
+        cache.lookup("a haunted lighthouse", "eerie", "keeper")
+
+        cache.add("a submarine garden", "eerie", "keeper", _story("Kelp"))
+
+        assert cache.size == 2
+        assert cache.get_stats()["evictions"] == 1
+        assert cache.lookup("a dragon bakery", "eerie", "keeper") is None
+        assert cache.lookup("a haunted lighthouse", "eerie", "keeper") is not None
+        assert cache.lookup("a submarine garden", "eerie", "keeper") is not None
+
+    def test_group_survives_growth_and_evictions(self):
+        """Group indexes stay consistent as they grow past their initial size and rows are evicted"""
+        subjects = ["lighthouse", "bakery", "submarine", "volcano", "orchard", "glacier",
+                    "carnival", "monastery", "railway", "observatory", "canyon", "vineyard"]
+        cache = SimilarityCache(capacity=10)
+        for subject in subjects:
+            cache.add(f"a haunted {subject}", "eerie", "keeper", _story(subject))
+
+        assert cache.size == 10
+        assert cache.get_stats()["evictions"] == 2
+        for subject in subjects[2:]:
+            assert cache.lookup(f"a haunted {subject}", "eerie", "keeper")[0]["title"] == subject
+
+    def test_re_adding_premise_updates_in_place(self):
+        """The same premise replaces its row instead of growing the index"""
+        cache = SimilarityCache()
+        cache.add("a haunted lighthouse", "eerie", "keeper", _story("Old"))
+        cache.add("A haunted  lighthouse", "Eerie", "keeper", _story("New"))
+
+        assert cache.size == 1
+        assert cache.lookup("a haunted lighthouse", "eerie", "keeper")[0]["title"] == "New"
+
+    def test_vectors_are_normalized(self):
+        """Index rows are unit length so dot products are cosine similarities"""
+        cache = SimilarityCache()
+
+        vector = cache._vectorize("a cyberpunk detective story")
+
+        assert np.isclose(np.linalg.norm(vector), 1.0)
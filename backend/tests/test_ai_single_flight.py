@@ -0,0 +1,126 @@
+"""
+Test suite for single-flight request coalescing
+"""
+
+import asyncio
+import pytest
+
+from app.ai.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test coalescing and cancellation semantics"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_call(self):
+        """Callers with the same key await one underlying call"""
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "story"
+
+        results = await asyncio.gather(*[flight.do("k", work) for _ in range(5)])
+
+        assert calls == 1
+        assert [value for value, _ in results] == ["story"] * 5
+        assert [shared for _, shared in results].count(False) == 1
+        assert flight.get_stats()["calls_saved"] == 4
+        assert flight.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        """Distinct keys are not coalesced"""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0)
+            return 1
+
+        await asyncio.gather(flight.do("a", work), flight.do("b", work))
+
+        assert flight.get_stats()["calls_started"] == 2
+        assert flight.get_stats()["calls_saved"] == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_all_waiters(self):
+        """A failing call raises in every waiter"""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(flight.do("k", work), flight.do("k", work), return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_one_waiter_cancelled_call_continues(self):
+        """Cancelling one waiter leaves the shared call running for the others"""
+        flight = SingleFlight()
+        finished = asyncio.Event()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            finished.set()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        value, shared = await second
+
+        assert value == "done"
+        assert finished.is_set()
+        assert flight.get_stats()["calls_cancelled"] == 0
+
+    @pytest.mark.asyncio
+    async def test_last_waiter_cancelled_cancels_call(self):
+        """The underlying call is cancelled once every waiter is gone"""
+        flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiters = [asyncio.ensure_future(flight.do("k", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert cancelled.is_set()
+        assert flight.get_stats()["calls_cancelled"] == 1
+
+        async def fresh():
+            return "fresh"
+
+        assert await flight.do("k", fresh) == ("fresh", False)
+
+    @pytest.mark.asyncio
+    async def test_waiter_timeout_leaves_call_for_others(self):
+        """A waiter whose own timeout runs out gives up without ending the call for others"""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        impatient = asyncio.ensure_future(flight.do("k", work, timeout=0.01))
+        patient = asyncio.ensure_future(flight.do("k", work, timeout=1.0))
+
+        with pytest.raises(asyncio.TimeoutError):
+            await impatient
+        assert await patient == ("done", True)
+        assert flight.get_stats()["calls_cancelled"] == 0
@@ -0,0 +1,103 @@
+"""
+Test suite for the persistent story cache
+"""
+
+import time
+import pytest
+from unittest.mock import patch
+
+from app.ai.story_cache import StoryCache, make_cache_key, normalize_text
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create a cache backed by a temporary SQLite file"""
+    story_cache = StoryCache(db_path=str(tmp_path / "cache.db"), memory_size=2, max_entries=3)
+    yield story_cache
+    story_cache.close()
+
+
+def _story(title):
+    return {"title": title, "chapters": [{"id": 1, "text": "Text", "choices": []}]}
+
+
+class TestCacheKey:
+    """Test request normalization"""
+
+    def test_normalize_text(self):
+        """Case and whitespace differences are ignored"""
+        assert normalize_text("  A  Cyberpunk\nDetective ") == "a cyberpunk detective"
+        assert normalize_text(None) == ""
+
+    def test_key_is_stable_across_trivial_variations(self):
+        """Equivalent requests share a key, different settings do not"""
+        key = make_cache_key("A heist", "tense", "2 thieves", "google/gemini-flash-1.5", 0.7, "v1")
+
+        assert key == make_cache_key(" a  HEIST", "Tense", "2 thieves ", "google/gemini-flash-1.5", 0.7, "v1")
+        assert key != make_cache_key("A heist", "tense", "2 thieves", "google/gemini-flash-1.5", 0.9, "v1")
+        assert key != make_cache_key("A heist", "tense", "2 thieves", "google/gemini-flash-1.5", 0.7, "v2")
+
+
+class TestStoryCache:
+    """Test two-tier caching behaviour"""
+
+    def test_miss_then_memory_hit(self, cache):
+        """A stored story is served from memory"""
+        assert cache.get("k1") is None
+
+        cache.set("k1", _story("One"))
+        assert cache.get("k1")["title"] == "One"
+
+        stats = cache.get_stats()
+        assert stats["misses"] == 1
+        assert stats["memory_hits"] == 1
+
+    def test_returns_copies(self, cache):
+        """Mutating a returned story does not corrupt the cache"""
+        cache.set("k1", _story("One"))
+        cache.get("k1")["title"] = "Changed"
+
+        assert cache.get("k1")["title"] == "One"
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Stories persist in SQLite across cache instances"""
+        path = str(tmp_path / "persist.db")
+        first = StoryCache(db_path=path)
+        first.set("k1", _story("Persisted"))
+        first.close()
+
+        second = StoryCache(db_path=path)
+        assert second.get("k1")["title"] == "Persisted"
+        assert second.get_stats()["disk_hits"] == 1
+        second.close()
+
+    def test_size_based_eviction(self, cache):
+        """The least recently used disk entries are evicted past max_entries"""
+        for i in range(5):
+            cache.set(f"k{i}", _story(str(i)))
+
+        stats = cache.get_stats()
+        assert stats["disk_entries"] == 3
+        assert stats["memory_entries"] == 2
+        assert stats["evictions"] == 2
+
+        cache._memory.clear()
+        assert cache.get("k0") is None
+        assert cache.get("k4")["title"] == "4"
+
+    def test_ttl_expiry(self, cache):
+        """Entries older than the TTL are treated as misses"""
+        cache.set("k1", _story("Old"))
+
+        with patch("app.ai.story_cache.time.time", return_value=time.time() + cache.ttl_seconds + 1):
+            assert cache.get("k1") is None
+
+        assert cache.get_stats()["expirations"] == 1
+
+    def test_clear(self, cache):
+        """Clearing empties both tiers"""
+        cache.set("k1", _story("One"))
+        cache.clear()
+
+        assert cache.get("k1") is None
+        assert cache.get_stats()["disk_entries"] == 0
@@ -11,13 +11,16 @@ from dataclasses import dataclass
 
 from app.ai.story_generator import (
     StoryGenerator,
+    CancellationPolicy,
     GenerationStatus,
     GenerationProgress,
     generate_story,
     test_speed
 )
 from app.ai.cost_optimizer import TaskComplexity
+from app.ai.openrouter_client import OpenRouterModel
 from app.ai.quality_checker import QualityResult
+from app.ai.deadline import Deadline
 
 
 class TestGenerationStatus:
@@ -334,7 +337,7 @@ class TestStoryGenerator:
     ):
         """Test narrative generation with fallback"""
         with patch.object(generator.openrouter_client, 'generate_story', return_value=mock_narrative_result):
-            with patch.object(generator.cost_optimizer, 'record_request') as mock_record:
+            with patch.object(generator.cost_reconciler, 'record') as mock_record:
                 
                 result = await generator._generate_narrative_with_fallback(
                     "Test premise", "neutral", "3 characters"
@@ -343,6 +346,37 @@ class TestStoryGenerator:
                 assert "title" in result
                 assert "chapters" in result
                 mock_record.assert_called_once()
+                event = mock_record.call_args.args[0]
+                assert event.model == "google/gemini-flash-1.5"
+                assert event.success is True
+    
+    @pytest.mark.asyncio
+    async def test_narrative_cost_uses_real_usage_and_generation_id(self, generator, mock_narrative_result):
+        """Test the queued cost event carries the response's usage block and generation id"""
+        mock_narrative_result["model_response"] = {
+            "id": "gen-abc123",
+            "model": "google/gemini-flash-1.5",
+            "usage": {"prompt_tokens": 420, "completion_tokens": 1310}
+        }
+        
+        with patch.object(generator.openrouter_client, 'generate_story', return_value=mock_narrative_result):
+            with patch.object(generator.cost_reconciler, 'record') as mock_record:
+                await generator._generate_narrative_with_fallback("Test premise", "neutral", "3 characters")
+        
+        event = mock_record.call_args.args[0]
+        assert event.generation_id == "gen-abc123"
+        assert event.usage == {"prompt_tokens": 420, "completion_tokens": 1310}
+    
+    @pytest.mark.asyncio
+    async def test_cached_narrative_is_not_charged(self, generator, mock_narrative_result):
+        """Test cache hits queue no cost event"""
+        mock_narrative_result["cache_hit"] = True
+        
+        with patch.object(generator.openrouter_client, 'generate_story', return_value=mock_narrative_result):
+            with patch.object(generator.cost_reconciler, 'record') as mock_record:
+                await generator._generate_narrative_with_fallback("Test premise", "neutral", "3 characters")
+        
+        mock_record.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_generate_narrative_with_fallback_error(self, generator):
@@ -356,6 +390,333 @@ class TestStoryGenerator:
             assert "error" in result
             assert "API error" in result["error"]
     
+    @pytest.mark.asyncio
+    async def test_generate_narrative_specific_model_uses_model(self, generator, mock_narrative_result):
+        """Test the specific-model path calls that model instead of the hedged default"""
+        with patch.object(generator.openrouter_client, 'generate_story_with_model', return_value=mock_narrative_result) as mock_generate:
+            with patch.object(generator.cost_reconciler, 'record'):
+                result = await generator._generate_narrative_specific_model(
+                    "Test premise", "neutral", "3 characters", "anthropic/claude-3-haiku"
+                )
+        
+        assert result["title"] == mock_narrative_result["title"]
+        assert mock_generate.call_args.args[3] == OpenRouterModel.CLAUDE_HAIKU
+    
+    @pytest.mark.asyncio
+    async def test_progressive_story_swaps_in_better_refinement(self, generator, mock_narrative_result):
+        """Test the draft is served first and replaced by a higher-scoring rewrite"""
+        refined = dict(mock_narrative_result, title="The Refined Detective")
+        draft_quality = QualityResult(True, 60, 55, 150, [{}], 2, 70)
+        refined_quality = QualityResult(True, 85, 82, 150, [], 0, 88)
+        
+        with patch.object(generator.openrouter_client, 'generate_story_with_model', return_value=mock_narrative_result) as mock_draft:
+            with patch.object(generator.openrouter_client, 'refine_story', return_value=refined) as mock_refine:
+                with patch.object(generator.quality_checker, 'check_story_quality', side_effect=[draft_quality, refined_quality]):
+                    with patch.object(generator.cost_reconciler, 'record'):
+                        result = await generator.generate_progressive_story("Test premise")
+                        
+                        assert result["success"] is True
+                        assert result["version"] == "draft"
+                        assert result["refinement"] == "pending"
+                        assert mock_draft.call_args.args[3] == OpenRouterModel.LLAMA_3_1_8B
+                        
+                        current = await generator.wait_for_refinement(result["story_id"])
+        
+        assert mock_refine.call_args.kwargs["model"] == OpenRouterModel.CLAUDE_HAIKU
+        assert current["version"] == "refined"
+        assert current["story"]["title"] == "The Refined Detective"
+        assert current["quality"]["score"] == 85
+        assert generator.get_generation_stats()["progressive"]["refinements_swapped"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_progressive_story_keeps_draft_when_rewrite_scores_lower(self, generator, mock_narrative_result):
+        """Test a worse rewrite does not replace the draft"""
+        draft_quality = QualityResult(True, 80, 75, 150, [], 0, 85)
+        refined_quality = QualityResult(True, 70, 65, 150, [], 1, 80)
+        
+        with patch.object(generator.openrouter_client, 'generate_story_with_model', return_value=mock_narrative_result):
+            with patch.object(generator.openrouter_client, 'refine_story', return_value=dict(mock_narrative_result, title="Worse")):
+                with patch.object(generator.quality_checker, 'check_story_quality', side_effect=[draft_quality, refined_quality]):
+                    with patch.object(generator.cost_reconciler, 'record'):
+                        result = await generator.generate_progressive_story("Test premise")
+                        current = await generator.wait_for_refinement(result["story_id"])
+        
+        assert current["version"] == "draft"
+        assert current["refinement"] == "kept_draft"
+        assert current["story"]["title"] == mock_narrative_result["title"]
+    
+    @pytest.mark.asyncio
+    async def test_progressive_story_falls_back_when_draft_fails(self, generator, mock_narrative_result, mock_quality_result):
+        """Test a failed draft falls back to the standard generation path"""
+        with patch.object(generator.openrouter_client, 'generate_story_with_model', return_value={"error": "down"}):
+            with patch.object(generator, '_generate_narrative_with_fallback', return_value=mock_narrative_result) as mock_fallback:
+                with patch.object(generator.openrouter_client, 'refine_story', return_value={"error": "down"}):
+                    with patch.object(generator.quality_checker, 'check_story_quality', return_value=mock_quality_result):
+                        result = await generator.generate_progressive_story("Test premise")
+                        current = await generator.wait_for_refinement(result["story_id"])
+        
+        assert result["success"] is True
+        mock_fallback.assert_called_once()
+        assert current["refinement"] == "failed"
+    
+    @pytest.mark.asyncio
+    async def test_ensemble_returns_first_accepted_story(self, generator, mock_narrative_result):
+        """Test the first story passing the quality check wins and slower models are cancelled"""
+        cancelled = []
+        
+        async def generate(premise, mood, characters, model, deadline=None):
+            if model == OpenRouterModel.LLAMA_3_1_8B:
+                return dict(mock_narrative_result, model_used="llama-3.1-8b")
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(model)
+                raise
+            return dict(mock_narrative_result, model_used=model.value)
+        
+        accepted = QualityResult(True, 82, 80, 150, [], 0, 85)
+        
+        with patch.object(generator.openrouter_client, 'generate_story_with_model', side_effect=generate):
+            with patch.object(generator.quality_checker, 'check_story_quality', return_value=accepted):
+                with patch.object(generator.cost_reconciler, 'record'):
+                    story, quality = await generator._generate_narrative_ensemble("Test premise", "neutral", "3 characters")
+        
+        assert story["model_used"] == "llama-3.1-8b"
+        assert quality.score == 82
+        assert set(cancelled) == {OpenRouterModel.GEMINI_FLASH, OpenRouterModel.CLAUDE_HAIKU}
+        stats = generator.get_generation_stats()["ensemble"]
+        assert stats["accepted_early"] == 1
+        assert stats["cancelled_requests"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_ensemble_picks_best_at_deadline(self, generator, mock_narrative_result):
+        """Test the best-scoring story is used when none passes before the deadline"""
+        scores = {"gemini-flash": 55, "llama-3.1-8b": 62}
+        
+        async def generate(premise, mood, characters, model, deadline=None):
+            if model == OpenRouterModel.CLAUDE_HAIKU:
+                await asyncio.sleep(5)
+            if model == OpenRouterModel.GEMINI_FLASH:
+                return {"error": "Circuit open"}
+            return dict(mock_narrative_result, model_used="llama-3.1-8b")
+        
+        def check(story):
+            return QualityResult(False, scores[story["model_used"]], 50, 150, [{}], 3, 60)
+        
+        with patch.object(generator.openrouter_client, 'generate_story_with_model', side_effect=generate):
+            with patch.object(generator.quality_checker, 'check_story_quality', side_effect=check):
+                with patch.object(generator.cost_reconciler, 'record'):
+                    story, quality = await generator._generate_narrative_ensemble(
+                        "Test premise", "neutral", "3 characters", timeout=0.1
+                    )
+        
+        assert story["model_used"] == "llama-3.1-8b"
+        assert quality.score == 62
+        assert generator.ensemble_best_at_deadline == 1
+        assert generator.ensemble_cancelled == 1
+    
+    @pytest.mark.asyncio
+    async def test_ensemble_all_models_fail(self, generator):
+        """Test an error dict comes back when every model fails"""
+        with patch.object(generator.openrouter_client, 'generate_story_with_model', return_value={"error": "down"}):
+            story, quality = await generator._generate_narrative_ensemble("Test premise", "neutral", "3 characters")
+        
+        assert story["error"] == "All ensemble models failed"
+        assert len(story["errors"]) == 3
+        assert quality is None
+    
+    @pytest.mark.asyncio
+    async def test_premium_request_uses_ensemble_without_serial_retry(
+        self, generator, mock_narrative_result, mock_quality_result
+    ):
+        """Test premium requests race models instead of retrying after a failed check"""
+        with patch.object(generator, '_determine_complexity', return_value=TaskComplexity.SIMPLE):
+            with patch.object(generator, '_generate_narrative_ensemble', return_value=(mock_narrative_result, mock_quality_result)) as mock_ensemble:
+                with patch.object(generator, '_generate_narrative_with_fallback') as mock_single:
+                    with patch.object(generator.quality_checker, 'check_story_quality') as mock_check:
+                        result = await generator.generate_complete_story(
+                            "Test premise", include_audio=False, include_image=False, premium=True
+                        )
+        
+        assert result["success"] is True
+        mock_ensemble.assert_called_once()
+        mock_single.assert_not_called()
+        mock_check.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_generate_complete_story_reports_critical_path(
+        self, generator, mock_narrative_result, mock_quality_result, mock_audio_result, mock_image_result
+    ):
+        """Test the stage graph reports the chain of stages that bounded latency"""
+        async def slow_audio(story, deadline=None):
+            await asyncio.sleep(0.05)
+            return mock_audio_result
+
+        with patch.object(generator, '_determine_complexity', return_value=TaskComplexity.SIMPLE):
+            with patch.object(generator, '_generate_narrative_with_fallback', return_value=mock_narrative_result):
+                with patch.object(generator.quality_checker, 'check_story_quality', return_value=mock_quality_result):
+                    with patch.object(generator, '_generate_audio_clips', side_effect=slow_audio):
+                        with patch.object(generator, '_generate_story_image', return_value=mock_image_result):
+                            result = await generator.generate_complete_story("Test premise")
+
+        assert result["success"] is True
+        assert "image" in result["multimedia"] and "audio" in result["multimedia"]
+        path = [step["stage"] for step in result["generation"]["critical_path"]]
+        assert path == ["text", "quality", "audio", "package"]
+        stats = generator.get_generation_stats()["stages"]
+        assert stats["runs"] == 1
+        assert stats["bounding_stages"] == {"audio": 1}
+
+    @pytest.mark.asyncio
+    async def test_stages_downgrade_or_skip_when_p90_does_not_fit(
+        self, generator, mock_narrative_result, mock_quality_result, mock_image_result
+    ):
+        """Test slow stages degrade instead of running into the request deadline"""
+        for _ in range(5):
+            generator.stage_latency.record("image", 29.0)
+            generator.stage_latency.record("audio", 40.0)
+
+        with patch.object(generator, '_determine_complexity', return_value=TaskComplexity.SIMPLE):
+            with patch.object(generator, '_generate_narrative_with_fallback', return_value=mock_narrative_result) as mock_text:
+                with patch.object(generator.quality_checker, 'check_story_quality', return_value=mock_quality_result):
+                    with patch.object(generator, '_generate_audio_clips') as mock_audio:
+                        with patch.object(generator, '_generate_story_image', return_value=mock_image_result) as mock_image:
+                            result = await generator.generate_complete_story("Test premise")
+
+        assert result["success"] is True
+        assert mock_text.call_args.kwargs["deadline"].remaining() <= 28
+        mock_audio.assert_not_called()
+        assert mock_image.call_args.kwargs["fast"] is True
+        stats = generator.get_generation_stats()["stages"]
+        assert stats["skipped"] == {"audio": 1}
+        assert stats["downgraded"] == {"image": 1}
+
+    @pytest.mark.asyncio
+    async def test_client_disconnect_cancels_generation(
+        self, generator, mock_narrative_result, mock_quality_result
+    ):
+        """Test a disconnect cancels outstanding stages and keeps the finished narrative"""
+        audio_cancelled = asyncio.Event()
+        disconnected = False
+        
+        async def slow_audio(story, deadline=None):
+            nonlocal disconnected
+            disconnected = True
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                audio_cancelled.set()
+                raise
+        
+        async def is_disconnected():
+            return disconnected
+        
+        # One earlier story's audio cost 0.002
+        generator.stage_cost_totals["audio"] = 0.002
+        generator.stage_cost_counts["audio"] = 1
+        generator.DISCONNECT_POLL_INTERVAL = 0.005
+        with patch.object(generator, '_determine_complexity', return_value=TaskComplexity.SIMPLE):
+            with patch.object(generator, '_generate_narrative_with_fallback', return_value=mock_narrative_result):
+                with patch.object(generator.quality_checker, 'check_story_quality', return_value=mock_quality_result):
+                    with patch.object(generator, '_generate_audio_clips', side_effect=slow_audio):
+                        result = await generator.generate_story_for_client(
+                            "Test premise", is_disconnected=is_disconnected, include_image=False
+                        )
+        
+        assert result["success"] is False
+        assert result["error"]["type"] == "client_disconnected"
+        assert result["estimated_cost_saved"] == pytest.approx(0.002)
+        assert audio_cancelled.is_set()
+        kept = generator.get_story(result["story_id"])
+        assert kept["story"]["title"] == mock_narrative_result["title"]
+        assert kept["version"] == "partial"
+        stats = generator.get_generation_stats()["cancellation"]
+        assert stats["cancelled"] == 1
+        assert stats["artifacts_kept"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_client_disconnect_discard_policy(self, generator, mock_narrative_result, mock_quality_result):
+        """Test the discard policy stores nothing from a cancelled generation"""
+        disconnected = False
+        
+        async def slow_audio(story, deadline=None):
+            nonlocal disconnected
+            disconnected = True
+            await asyncio.sleep(10)
+        
+        async def is_disconnected():
+            return disconnected
+        
+        generator.cancellation_policy = CancellationPolicy.DISCARD
+        generator.DISCONNECT_POLL_INTERVAL = 0.005
+        with patch.object(generator, '_determine_complexity', return_value=TaskComplexity.SIMPLE):
+            with patch.object(generator, '_generate_narrative_with_fallback', return_value=mock_narrative_result):
+                with patch.object(generator.quality_checker, 'check_story_quality', return_value=mock_quality_result):
+                    with patch.object(generator, '_generate_audio_clips', side_effect=slow_audio):
+                        result = await generator.generate_story_for_client(
+                            "Test premise", is_disconnected=is_disconnected, include_image=False
+                        )
+        
+        assert result["error"]["type"] == "client_disconnected"
+        assert "story_id" not in result
+        assert generator.stories == {}
+        assert generator.get_generation_stats()["cancellation"]["artifacts_discarded"] == 1
+
+    @pytest.mark.asyncio
+    async def test_streaming_story_serves_first_chapter_early(
+        self, generator, mock_narrative_result, mock_image_result
+    ):
+        """Test chapter 1 is returned with its media while later chapters still stream"""
+        release = asyncio.Event()
+        chapters = mock_narrative_result["chapters"]
+
+        async def stream(premise, mood, characters):
+            yield {"type": "title", "title": mock_narrative_result["title"]}
+            yield {"type": "chapter", "chapter": chapters[0], "index": 0}
+            await release.wait()
+            yield {"type": "chapter", "chapter": chapters[1], "index": 1}
+            yield {"type": "complete", "story": mock_narrative_result}
+
+        async def chapter_audio(chapter, index):
+            return {"chapter_id": chapter["id"], "duration": 2.0, "cost": 0.0001}
+
+        with patch.object(generator.text_client, 'generate_story_stream', side_effect=stream):
+            with patch.object(generator, '_generate_chapter_audio', side_effect=chapter_audio):
+                with patch.object(generator, '_generate_story_image', return_value=mock_image_result):
+                    with patch.object(generator.cost_reconciler, 'record') as mock_record:
+                        first = await generator.generate_streaming_story("A cyberpunk detective story")
+
+                        assert first["success"] is True
+                        assert first["chapter"]["id"] == 1
+                        assert first["multimedia"]["audio"]["chapter_id"] == 1
+                        assert first["multimedia"]["image"] == mock_image_result
+                        assert generator.get_story(first["story_id"])["delivery"]["status"] == "generating"
+
+                        release.set()
+                        story = await generator.wait_for_story(first["story_id"])
+
+        assert story["delivery"]["status"] == "complete"
+        assert [clip["chapter_id"] for clip in story["multimedia"]["audio"]] == [1, 2]
+        assert story["quality"] is not None
+        mock_record.assert_called_once()
+        delivery = generator.get_generation_stats()["delivery"]
+        assert delivery["time_to_first_chapter"]["samples"] == 1
+        assert delivery["time_to_complete"]["samples"] == 1
+        assert delivery["in_progress"] == 0
+
+    @pytest.mark.asyncio
+    async def test_streaming_story_error_before_first_chapter(self, generator):
+        """Test a stream that fails before any chapter returns an error response"""
+        async def stream(premise, mood, characters):
+            yield {"type": "error", "error": "Streaming story generation failed", "errors": []}
+
+        with patch.object(generator.text_client, 'generate_story_stream', side_effect=stream):
+            result = await generator.generate_streaming_story("Test premise")
+
+        assert result["success"] is False
+        assert result["error"]["type"] == "narrative_generation_failed"
+        assert generator.delivery_failures == 1
+
     @pytest.mark.asyncio
     async def test_generate_audio_clips_success(self, generator, mock_narrative_result):
         """Test audio clip generation"""
@@ -406,6 +767,50 @@ class TestStoryGenerator:
             assert "Network error" in result["error"]
             assert result["provider"] == "fallback_mock"
     
+    @pytest.mark.asyncio
+    async def test_generate_audio_clips_concurrent_in_order(self, generator):
+        """Test chapters are narrated concurrently up to the limit and returned in order"""
+        story = {"chapters": [{"id": i + 1, "text": f"Chapter {i + 1} text."} for i in range(5)]}
+        running = 0
+        peak = 0
+        
+        async def chapter_audio(chapter, index, deadline=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            # Later chapters finish first
+            await asyncio.sleep(0.01 * (5 - index))
+            running -= 1
+            return {"chapter_id": chapter["id"], "duration": 1.0}
+        
+        generator.audio_concurrency = 2
+        with patch.object(generator, '_generate_chapter_audio', side_effect=chapter_audio):
+            result = await generator._generate_audio_clips(story)
+        
+        assert peak == 2
+        assert [clip["chapter_id"] for clip in result["audio_clips"]] == [1, 2, 3, 4, 5]
+    
+    @pytest.mark.asyncio
+    async def test_generate_audio_clips_keeps_partial_results(self, generator):
+        """Test failed and late chapters are dropped while finished clips are kept"""
+        story = {"chapters": [{"id": i + 1, "text": f"Chapter {i + 1} text."} for i in range(3)]}
+        
+        async def chapter_audio(chapter, index, deadline=None):
+            if index == 1:
+                raise Exception("Network error")
+            if index == 2:
+                await asyncio.sleep(5)
+            return {"chapter_id": chapter["id"], "duration": 1.0}
+        
+        generator.FINALIZE_RESERVE = 0
+        with patch.object(generator, '_generate_chapter_audio', side_effect=chapter_audio):
+            result = await generator._generate_audio_clips(story, deadline=Deadline(0.1))
+        
+        assert result["success"] is True
+        assert [clip["chapter_id"] for clip in result["audio_clips"]] == [1]
+        assert result["failed_chapters"] == [2]
+        assert result["timed_out_chapters"] == [3]
+    
     @pytest.mark.asyncio
     async def test_generate_story_image_success(self, generator, mock_narrative_result):
         """Test story image generation"""
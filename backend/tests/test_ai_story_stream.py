@@ -0,0 +1,86 @@
+"""
+Test suite for the incremental story stream parser
+"""
+
+import json
+
+from app.ai.story_stream import StoryStreamParser
+
+
+STORY = {
+    "title": "The Glass \"Orchard\"",
+    "chapters": [
+        {
+            "id": 1,
+            "text": "Mara counted the glass apples {twice} before the wind changed.",
+            "choices": [
+                {"id": "a", "text": "Climb the wall", "leads_to": 2},
+                {"id": "b", "text": "Wait for dusk", "leads_to": 3}
+            ]
+        },
+        {"id": 2, "text": "The wall hummed under her palms.", "choices": []},
+        {"id": 3, "text": "Dusk arrived with a [bracketed] sky.", "choices": []}
+    ]
+}
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestStoryStreamParser:
+    """Test incremental chapter extraction"""
+
+    def test_emits_chapters_as_they_close(self):
+        """Each chapter is emitted by the chunk containing its closing brace"""
+        text = json.dumps(STORY)
+        parser = StoryStreamParser()
+        emitted = []
+
+        for chunk in _chunks(text, 7):
+            emitted.extend(parser.feed(chunk))
+
+        assert [chapter["id"] for chapter in emitted] == [1, 2, 3]
+        assert emitted[0]["choices"][1]["leads_to"] == 3
+        assert parser.title == 'The Glass "Orchard"'
+        assert parser.complete is True
+        assert parser.result() == STORY
+
+    def test_first_chapter_before_stream_ends(self):
+        """The first chapter is available before later chapters stream"""
+        text = json.dumps(STORY)
+        cut = text.index('{"id": 2')
+        parser = StoryStreamParser()
+
+        first = parser.feed(text[:cut])
+
+        assert len(first) == 1
+        assert first[0]["id"] == 1
+        assert parser.complete is False
+
+    def test_ignores_markdown_fence_preamble(self):
+        """Text before the JSON object is skipped"""
+        text = "```json\n" + json.dumps(STORY) + "\n```"
+        parser = StoryStreamParser()
+
+        emitted = parser.feed(text)
+
+        assert len(emitted) == 3
+        assert parser.result()["title"] == STORY["title"]
+
+    def test_truncated_stream_keeps_completed_chapters(self):
+        """A stream cut mid-chapter still yields the finished chapters"""
+        text = json.dumps(STORY)
+        parser = StoryStreamParser()
+        parser.feed(text[:text.index('{"id": 3') + 10])
+
+        result = parser.result()
+
+        assert [chapter["id"] for chapter in result["chapters"]] == [1, 2]
+
+    def test_no_json_returns_none(self):
+        """Plain text produces no chapters and no result"""
+        parser = StoryStreamParser()
+
+        assert parser.feed("Once there was no JSON at all.") == []
+        assert parser.result() is None
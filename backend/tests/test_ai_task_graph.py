@@ -0,0 +1,148 @@
+"""
+Test suite for the dependency-graph stage executor
+"""
+
+import asyncio
+import pytest
+
+from app.ai.task_graph import ResourceLimits, StageStatus, TaskGraph
+
+
+def stage(value, delay=0.0, log=None, name=None):
+    """A stage returning value after delay, optionally logging start and end"""
+    async def run(results):
+        if log is not None:
+            log.append(f"start {name}")
+        await asyncio.sleep(delay)
+        if log is not None:
+            log.append(f"end {name}")
+        return value(results) if callable(value) else value
+    return run
+
+
+def failing(error):
+    async def run(results):
+        raise error
+    return run
+
+
+class TestTaskGraph:
+    """Test scheduling, failure handling and critical paths"""
+
+    def test_unknown_dependency_rejected(self):
+        """Dependencies must be added first, which keeps graphs acyclic"""
+        graph = TaskGraph()
+        graph.add("a", stage(1))
+
+        with pytest.raises(ValueError):
+            graph.add("b", stage(2), deps=("missing",))
+        with pytest.raises(ValueError):
+            graph.add("a", stage(3))
+
+    @pytest.mark.asyncio
+    async def test_stages_see_dependency_results(self):
+        """Each stage reads the results of the stages it depends on"""
+        graph = TaskGraph()
+        graph.add("a", stage(2))
+        graph.add("b", stage(lambda results: results["a"] * 10), deps=("a",))
+
+        run = await graph.run()
+
+        assert run.results == {"a": 2, "b": 20}
+        assert run.timings["b"].status == StageStatus.DONE
+
+    @pytest.mark.asyncio
+    async def test_independent_stages_run_concurrently(self):
+        """Stages start as soon as their own inputs exist"""
+        log = []
+        graph = TaskGraph()
+        graph.add("text", stage("t", 0.01, log, "text"))
+        graph.add("quality", stage("q", 0.05, log, "quality"), deps=("text",))
+        graph.add("image", stage("i", 0.01, log, "image"), deps=("text",))
+
+        await graph.run()
+
+        assert log.index("start image") < log.index("end quality")
+
+    @pytest.mark.asyncio
+    async def test_resource_limits(self):
+        """No more stages of a resource class run at once than its limit"""
+        running = 0
+        peak = 0
+
+        async def tts(results):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        graph = TaskGraph(ResourceLimits({"tts": 2}))
+        for index in range(6):
+            graph.add(f"tts_{index}", tts, resource="tts")
+
+        run = await graph.run()
+
+        assert peak == 2
+        assert max(timing.wait for timing in run.timings.values()) > 0
+
+    @pytest.mark.asyncio
+    async def test_unlimited_resource_slot(self):
+        """Resources without a limit still give an async slot (Python 3.9 included)"""
+        limits = ResourceLimits({"tts": 1})
+        async with limits.slot("cpu"):
+            pass
+
+        graph = TaskGraph(limits)
+        graph.add("package", stage("p"))
+        run = await graph.run()
+
+        assert run.results == {"package": "p"}
+
+    @pytest.mark.asyncio
+    async def test_failure_skips_dependents_unless_optional(self):
+        """Required failures skip dependents; optional failures do not"""
+        graph = TaskGraph()
+        graph.add("text", failing(RuntimeError("boom")))
+        graph.add("quality", stage("q"), deps=("text",))
+        graph.add("package", stage("p"), deps=("quality",))
+        graph.add("image", failing(RuntimeError("no image")), optional=True)
+        graph.add("gallery", stage("g"), deps=("image",))
+
+        run = await graph.run()
+
+        assert str(run.errors["text"]) == "boom"
+        assert run.timings["quality"].status == StageStatus.SKIPPED
+        assert run.timings["package"].status == StageStatus.SKIPPED
+        assert run.results["gallery"] == "g"
+
+    @pytest.mark.asyncio
+    async def test_timeout_cancels_running_stages(self):
+        """Stages still running at the timeout are cancelled and their dependents never start"""
+        graph = TaskGraph()
+        graph.add("slow", stage("s", 1.0))
+        graph.add("after", stage("a"), deps=("slow",))
+
+        run = await graph.run(timeout=0.02)
+
+        assert run.timed_out is True
+        assert run.timings["slow"].status == StageStatus.CANCELLED
+        assert run.timings["after"].status == StageStatus.CANCELLED
+        assert run.total_time < 0.5
+
+    @pytest.mark.asyncio
+    async def test_critical_path(self):
+        """The critical path follows the dependency that finished last"""
+        graph = TaskGraph()
+        graph.add("text", stage("t", 0.01))
+        graph.add("quality", stage("q", 0.01), deps=("text",))
+        graph.add("image", stage("i", 0.08), deps=("text",))
+        graph.add("audio", stage("a", 0.01), deps=("quality",))
+        graph.add("package", stage("p"), deps=("audio", "image"))
+
+        run = await graph.run()
+        report = run.report()
+
+        assert run.critical_path == ["text", "image", "package"]
+        assert [step["stage"] for step in report["critical_path"]] == ["text", "image", "package"]
+        assert report["stages"]["audio"]["status"] == "done"
@@ -0,0 +1,58 @@
+"""
+Test suite for adaptive max_tokens budgeting
+"""
+
+from app.ai.token_budget import TokenBudgeter
+
+
+class TestTokenBudgeter:
+    """Test budget sizing and recalibration"""
+
+    def test_estimate_tokens_uses_char_ratio(self):
+        """Token estimate is characters over the chars-per-token ratio"""
+        budgeter = TokenBudgeter()
+        assert budgeter.estimate_tokens("x" * 400) == 100
+        assert budgeter.estimate_tokens("") == 1
+
+    def test_budget_scales_with_words_and_chapters(self):
+        """Longer targets and more chapters get larger budgets"""
+        budgeter = TokenBudgeter(tokens_per_word=1.0, chapter_overhead=50, headroom=1.0)
+
+        assert budgeter.max_tokens_for("m", 500, chapters=3) == 650
+        assert budgeter.max_tokens_for("m", 500, chapters=3, structured=False) == 500
+        assert budgeter.max_tokens_for("m", 1000, chapters=5) == 1250
+
+    def test_budget_is_clamped(self):
+        """Budgets stay within the configured bounds"""
+        budgeter = TokenBudgeter(min_tokens=200, max_tokens=1000)
+
+        assert budgeter.max_tokens_for("m", 10) == 200
+        assert budgeter.max_tokens_for("m", 5000) == 1000
+
+    def test_record_usage_recalibrates_ratio(self):
+        """Observed usage pulls the tokens-per-word ratio toward reality"""
+        budgeter = TokenBudgeter(tokens_per_word=2.0, chapter_overhead=0, smoothing=0.5)
+        before = budgeter.max_tokens_for("m", 1000, structured=False)
+
+        budgeter.record_usage("m", {"completion_tokens": 1000}, words=1000, structured=False)
+
+        assert budgeter.tokens_per_word("m") == 1.5
+        assert budgeter.tokens_per_word("other") == 2.0
+        assert budgeter.max_tokens_for("m", 1000, structured=False) < before
+
+    def test_record_usage_calibrates_token_estimate(self):
+        """Prompt token counts recalibrate the local approximation"""
+        budgeter = TokenBudgeter(chars_per_token=4.0, smoothing=1.0)
+
+        budgeter.record_usage("m", {"prompt_tokens": 100}, words=0, prompt="x" * 300)
+
+        assert budgeter.estimate_tokens("x" * 300, "m") == 100
+        assert budgeter.get_stats()["chars_per_token"]["m"] == 3.0
+
+    def test_missing_usage_is_ignored(self):
+        """Responses without usage leave the ratios unchanged"""
+        budgeter = TokenBudgeter()
+        budgeter.record_usage("m", None, words=100)
+        budgeter.record_usage("m", {}, words=100)
+
+        assert budgeter.get_stats()["calibrations"] == 0
@@ -0,0 +1,150 @@
+"""
+Test suite for the OpenRouter stand-in server used in load tests
+"""
+
+import json
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.ai.openrouter_client import OpenRouterClient
+from app.ai.rate_limiter import RateLimiter
+from tools.openrouter_standin import StandinConfig, create_app
+
+
+def instant(**overrides) -> StandinConfig:
+    """A stand-in with no artificial latency"""
+    return StandinConfig(ttfb=0.0, tokens_per_second=0.0, seed=7, **overrides)
+
+
+def completion_request(**overrides):
+    body = {
+        "model": "google/gemini-flash-1.5",
+        "messages": [{"role": "user", "content": "- Setting/Premise: a haunted lighthouse\nReturn JSON"}],
+        "max_tokens": 3000
+    }
+    body.update(overrides)
+    return body
+
+
+class TestStandinServer:
+    """Test the stand-in's OpenRouter-compatible responses"""
+
+    def test_completion_returns_story_json(self):
+        """Non-streaming completions carry story JSON, usage and rate-limit headers"""
+        client = TestClient(create_app(instant()))
+
+        response = client.post("/api/v1/chat/completions", json=completion_request())
+
+        assert response.status_code == 200
+        assert "x-ratelimit-remaining" in response.headers
+        body = response.json()
+        story = json.loads(body["choices"][0]["message"]["content"])
+        assert story["title"] == "A Haunted Lighthouse"
+        assert len(story["chapters"]) == 4
+        assert body["usage"]["completion_tokens"] > 0
+        assert body["id"].startswith("gen-")
+
+    def test_generation_cost_lookup(self):
+        """Completed generations can be priced through /generation"""
+        client = TestClient(create_app(instant()))
+        generation_id = client.post("/api/v1/chat/completions", json=completion_request()).json()["id"]
+
+        response = client.get("/api/v1/generation", params={"id": generation_id})
+
+        assert response.json()["data"]["total_cost"] > 0
+        assert client.get("/api/v1/generation", params={"id": "gen-missing"}).status_code == 404
+
+    def test_streaming_emits_server_sent_events(self):
+        """Streaming responses end with a usage chunk and [DONE]"""
+        client = TestClient(create_app(instant()))
+
+        response = client.post("/api/v1/chat/completions", json=completion_request(stream=True))
+        lines = [line for line in response.text.split("\n") if line]
+
+        assert lines[0] == ": OPENROUTER PROCESSING"
+        assert lines[-1] == "data: [DONE]"
+        final = json.loads(lines[-2][len("data: "):])
+        assert final["usage"]["completion_tokens"] > 0
+        content = "".join(
+            json.loads(line[len("data: "):])["choices"][0]["delta"].get("content", "")
+            for line in lines[1:-2]
+        )
+        assert json.loads(content)["chapters"]
+
+    def test_rate_limit_bursts(self):
+        """A triggered burst rejects the configured number of requests with Retry-After"""
+        client = TestClient(create_app(instant(rate_limit_rate=1.0, rate_limit_burst=3, retry_after=2.5)))
+
+        statuses = [client.post("/api/v1/chat/completions", json=completion_request()).status_code for _ in range(3)]
+        limited = client.post("/api/v1/chat/completions", json=completion_request())
+
+        assert statuses == [429, 429, 429]
+        assert limited.headers["retry-after"] == "2.5"
+        assert client.get("/stats").json()["rate_limited"] == 4
+
+    def test_error_and_malformed_injection(self):
+        """Errors and malformed output are injected at the configured rates"""
+        errors = TestClient(create_app(instant(error_rate=1.0)))
+        assert errors.post("/api/v1/chat/completions", json=completion_request()).status_code in (500, 502, 503)
+
+        malformed = TestClient(create_app(instant(malformed_rate=1.0)))
+        content = malformed.post("/api/v1/chat/completions", json=completion_request()).json()["choices"][0]["message"]["content"]
+        with pytest.raises(json.JSONDecodeError):
+            json.loads(content)
+
+    def test_max_tokens_truncates(self):
+        """Output beyond max_tokens is cut off with finish_reason length"""
+        client = TestClient(create_app(instant()))
+
+        body = client.post("/api/v1/chat/completions", json=completion_request(max_tokens=100)).json()
+
+        assert body["choices"][0]["finish_reason"] == "length"
+        assert len(body["choices"][0]["message"]["content"]) == 400
+
+
+class TestClientAgainstStandin:
+    """Run the real OpenRouterClient against the stand-in"""
+
+    def make_client(self, config: StandinConfig) -> OpenRouterClient:
+        client = OpenRouterClient(
+            api_key="standin-key",
+            rate_limiter=RateLimiter(rate=1000, capacity=1000),
+            http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(config)))
+        )
+        client.base_url = "http://standin/api/v1"
+        return client
+
+    @pytest.mark.asyncio
+    async def test_generate_story(self):
+        """Stories round-trip through the real client code"""
+        client = self.make_client(instant())
+
+        story = await client.generate_story("a haunted lighthouse")
+
+        assert "error" not in story
+        assert len(story["chapters"]) == 4
+        assert story["generation_cost"] > 0
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_generate_story_repairs_malformed_output(self):
+        """Injected malformed JSON is repaired rather than regenerated"""
+        client = self.make_client(instant(malformed_rate=1.0))
+
+        story = await client.generate_story("a haunted lighthouse")
+
+        assert story.get("json_repairs")
+        assert client.json_repairer.get_stats()["repaired"] == 1
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_generate_story_stream(self):
+        """Streamed stories arrive chapter by chapter"""
+        client = self.make_client(instant())
+
+        events = [event async for event in client.generate_story_stream("a haunted lighthouse")]
+
+        assert [event["type"] for event in events].count("chapter") == 4
+        assert events[-1]["type"] == "complete"
+        await client.close()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+OpenRouter Transport Benchmark
+Compares the aiohttp (HTTP/1.1) and httpx (HTTP/2) transports
+
+Reports connection setup (cold first request vs. warm requests) and p50/p99
+latency under concurrent load. Point --base-url at a local stand-in to
+measure transport overhead without spending tokens.
+
+Usage:
+    OPENROUTER_API_KEY=... python tools/benchmark_transport.py --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai.circuit_breaker import percentile
+from app.ai.openrouter_client import OpenRouterClient, OpenRouterModel, OpenRouterTransport
+from app.ai.rate_limiter import RateLimiter
+
+
+async def timed_request(client: OpenRouterClient, model: OpenRouterModel, max_tokens: int) -> float:
+    """Send one tiny completion and return its latency in seconds"""
+    start = time.perf_counter()
+    await client._make_api_request(
+        model=model,
+        messages=[{"role": "user", "content": "Reply with the single word: ok"}],
+        max_tokens=max_tokens,
+        temperature=0.0
+    )
+    return time.perf_counter() - start
+
+
+async def benchmark_transport(transport: OpenRouterTransport, args: argparse.Namespace) -> Dict:
+    """Measure one transport on a fresh client"""
+    client = OpenRouterClient(
+        api_key=args.api_key,
+        transport=transport,
+        rate_limiter=RateLimiter(rate=10_000, capacity=10_000),
+        max_rate_limit_retries=0
+    )
+    client.base_url = args.base_url
+    model = OpenRouterModel(args.model)
+
+    try:
+        cold = await timed_request(client, model, args.max_tokens)
+        warm = [await timed_request(client, model, args.max_tokens) for _ in range(args.warm_requests)]
+
+        latencies: List[float] = []
+        errors = 0
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def run():
+            nonlocal errors
+            async with semaphore:
+                try:
+                    latencies.append(await timed_request(client, model, args.max_tokens))
+                except Exception as e:
+                    errors += 1
+                    print(f"  {transport.value} request failed: {e}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run() for _ in range(args.requests)))
+        wall_time = time.perf_counter() - start
+
+        warm_p50 = percentile(warm, 0.50)
+        return {
+            "transport": client.transport.value,
+            "cold_request": round(cold, 4),
+            "warm_p50": round(warm_p50, 4),
+            "connection_setup": round(max(0.0, cold - warm_p50), 4),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "errors": errors,
+            "p50": round(percentile(latencies, 0.50), 4),
+            "p99": round(percentile(latencies, 0.99), 4),
+            "wall_time": round(wall_time, 4),
+            "throughput": round(len(latencies) / max(wall_time, 1e-9), 2)
+        }
+    finally:
+        await client.close()
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"))
+    parser.add_argument("--api-key", default=os.getenv("OPENROUTER_API_KEY"))
+    parser.add_argument("--model", default=OpenRouterModel.LLAMA_3_1_8B.value,
+                        choices=[model.value for model in OpenRouterModel])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--warm-requests", type=int, default=5)
+    parser.add_argument("--max-tokens", type=int, default=8)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if not args.api_key:
+        print("OPENROUTER_API_KEY not set (any value works against a local stand-in)")
+        return 1
+
+    results = []
+    for transport in (OpenRouterTransport.AIOHTTP, OpenRouterTransport.HTTP2):
+        result = await benchmark_transport(transport, args)
+        if result["transport"] != transport.value:
+            print(f"Skipping {transport.value}: transport unavailable (pip install 'httpx[http2]')")
+            continue
+        results.append(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    columns = ["transport", "connection_setup", "cold_request", "warm_p50", "p50", "p99", "wall_time", "throughput", "errors"]
+    print(" ".join(f"{column:>16}" for column in columns))
+    for result in results:
+        print(" ".join(f"{result[column]!s:>16}" for column in columns))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
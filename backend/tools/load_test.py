@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Story Generation Load Test
+Drives the real OpenRouterClient against the local stand-in server
+
+Starts tools/openrouter_standin.py in a background thread (or uses
+--base-url) and reports throughput, latency percentiles and the client's own
+hedging, repair and breaker statistics.
+
+Usage:
+    python tools/load_test.py --requests 200 --concurrency 50 --ttfb 0.8 --error-rate 0.05
+    python tools/load_test.py --mode stream --malformed-rate 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn
+
+from app.ai.circuit_breaker import percentile
+from app.ai.openrouter_client import OpenRouterClient
+from app.ai.rate_limiter import RateLimiter
+from tools.openrouter_standin import StandinConfig, create_app
+
+
+def start_standin(config: StandinConfig, port: int) -> uvicorn.Server:
+    """Run the stand-in on its own event loop in a daemon thread"""
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("Stand-in server did not start")
+        time.sleep(0.05)
+
+    return server
+
+
+async def run_story(client: OpenRouterClient, index: int) -> Dict:
+    """One non-streaming story; unique premises keep caches and coalescing out of the way"""
+    start = time.perf_counter()
+    story = await client.generate_story(f"Load test premise {index}: a voyage past the harbor lights")
+    return {"latency": time.perf_counter() - start, "error": story.get("error")}
+
+
+async def run_stream(client: OpenRouterClient, index: int) -> Dict:
+    """One streamed story, also measuring time to first chapter"""
+    start = time.perf_counter()
+    first_chapter: Optional[float] = None
+    error = None
+
+    async for event in client.generate_story_stream(f"Load test premise {index}: a voyage past the harbor lights"):
+        if event["type"] == "chapter" and first_chapter is None:
+            first_chapter = time.perf_counter() - start
+        elif event["type"] == "error":
+            error = event["error"]
+
+    return {"latency": time.perf_counter() - start, "first_chapter": first_chapter, "error": error}
+
+
+def summarize(values: List[float]) -> Dict:
+    return {
+        "p50": round(percentile(values, 0.50), 4),
+        "p95": round(percentile(values, 0.95), 4),
+        "p99": round(percentile(values, 0.99), 4),
+        "max": round(max(values), 4) if values else 0.0
+    }
+
+
+async def load_test(args: argparse.Namespace, base_url: str) -> Dict:
+    client = OpenRouterClient(
+        api_key="standin-key",
+        transport=args.transport,
+        rate_limiter=RateLimiter(rate=args.client_rate, capacity=args.client_rate * 2)
+    )
+    client.base_url = base_url
+    run = run_stream if args.mode == "stream" else run_story
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def limited(index: int) -> Dict:
+        async with semaphore:
+            try:
+                return await run(client, index)
+            except Exception as e:
+                return {"latency": 0.0, "error": f"{type(e).__name__}: {e}"}
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(limited(index) for index in range(args.requests)))
+    wall_time = time.perf_counter() - start
+    await client.close()
+
+    succeeded = [result for result in results if not result["error"]]
+    report = {
+        "mode": args.mode,
+        "transport": client.transport.value,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "wall_time": round(wall_time, 3),
+        "throughput": round(len(succeeded) / max(wall_time, 1e-9), 2),
+        "latency": summarize([result["latency"] for result in succeeded])
+    }
+    if args.mode == "stream":
+        report["first_chapter"] = summarize([r["first_chapter"] for r in succeeded if r.get("first_chapter") is not None])
+
+    stats = client.get_stats()
+    report["client"] = {
+        key: stats[key] for key in ("hedged_requests", "hedge_wins", "breaker_skips", "json_repair", "rate_limiter")
+        if key in stats
+    }
+    report["client"]["breakers"] = {model: breaker["state"] for model, breaker in stats["circuit_breakers"].items()}
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=None, help="Use a running stand-in instead of starting one")
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--mode", choices=("story", "stream"), default="story")
+    parser.add_argument("--transport", choices=("aiohttp", "http2"), default="aiohttp")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--client-rate", dest="client_rate", type=float, default=1000.0,
+                        help="Client token-bucket rate per key and model")
+    parser.add_argument("--ttfb", type=float, default=0.5)
+    parser.add_argument("--tps", dest="tokens_per_second", type=float, default=200.0)
+    parser.add_argument("--error-rate", dest="error_rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", dest="rate_limit_rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", dest="malformed_rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    server = None
+    if base_url is None:
+        config = StandinConfig(
+            ttfb=args.ttfb,
+            tokens_per_second=args.tokens_per_second,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            malformed_rate=args.malformed_rate,
+            seed=args.seed
+        )
+        server = start_standin(config, args.port)
+        base_url = f"http://127.0.0.1:{args.port}/api/v1"
+
+    try:
+        report = asyncio.run(load_test(args, base_url))
+        if server is not None:
+            report["server"] = server.config.app.state.standin.get_stats()
+        print(json.dumps(report, indent=2, default=str))
+    finally:
+        if server is not None:
+            server.should_exit = True
+
+    return 0 if report["succeeded"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+OpenRouter Stand-in Server
+Local /chat/completions endpoint for load and latency testing
+
+Speaks enough of the OpenRouter API (streaming and non-streaming completions,
+usage blocks, X-RateLimit headers, /generation cost lookups) for the real
+OpenRouterClient and StoryGenerator to run against it. Latency (TTFB and
+tokens/sec), error rates, 429 bursts and malformed output are configurable.
+
+Usage:
+    python tools/openrouter_standin.py --port 8100 --ttfb 0.6 --tps 90 --error-rate 0.02
+    # then point the client at it:
+    client.base_url = "http://127.0.0.1:8100/api/v1"
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import uuid
+from dataclasses import asdict, dataclass, fields
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+WORDS = (
+    "the lantern river stranger whispered door ancient market storm hidden "
+    "map forest signal tower quietly glass memory engine shadow bridge old "
+    "promise crowd rain distant bell corridor laughed ran cold bright city "
+    "machine letter garden clock watched broken silver path night harbor"
+).split()
+
+MALFORMATIONS = ("code_fence", "smart_quotes", "trailing_commas", "truncated")
+
+
+@dataclass
+class StandinConfig:
+    """Latency and fault profile of the stand-in"""
+    ttfb: float = 0.5                  # Median seconds before the first byte
+    ttfb_sigma: float = 0.4            # Log-normal spread of TTFB (0 = constant)
+    tokens_per_second: float = 80.0    # Generation speed; 0 = instant
+    chunk_tokens: int = 8              # Tokens per streamed chunk
+    error_rate: float = 0.0            # Fraction of requests answered with a 5xx
+    rate_limit_rate: float = 0.0       # Chance a request starts a 429 burst
+    rate_limit_burst: int = 5          # Requests rejected per burst
+    retry_after: float = 1.0           # Retry-After sent with 429s
+    malformed_rate: float = 0.0        # Fraction of stories with broken JSON
+    chapters: int = 4
+    words_per_chapter: int = 150
+    cost_per_token: float = 0.0000003  # Reported by /generation
+    seed: Optional[int] = None
+
+
+class StoryStandin:
+    """Synthesizes completions and injects the configured latency and faults"""
+
+    def __init__(self, config: StandinConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.burst_remaining = 0
+        self.generations: Dict[str, float] = {}
+
+        # Server statistics
+        self.requests = 0
+        self.streamed = 0
+        self.errors_injected = 0
+        self.rate_limited = 0
+        self.malformed = 0
+        self.truncated = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completion_tokens = 0
+
+    def fault(self) -> Optional[Tuple[int, Dict, Dict]]:
+        """Pick an injected failure for this request, if any: (status, body, headers)"""
+        if self.burst_remaining == 0 and self.rng.random() < self.config.rate_limit_rate:
+            self.burst_remaining = self.config.rate_limit_burst
+
+        if self.burst_remaining > 0:
+            self.burst_remaining -= 1
+            self.rate_limited += 1
+            return (
+                429,
+                {"error": {"code": 429, "message": "Rate limit exceeded"}},
+                {"Retry-After": str(self.config.retry_after)}
+            )
+
+        if self.rng.random() < self.config.error_rate:
+            self.errors_injected += 1
+            status = self.rng.choice((500, 502, 503))
+            return status, {"error": {"code": status, "message": "Upstream provider error"}}, {}
+
+        return None
+
+    def ttfb(self) -> float:
+        """Sample a time to first byte"""
+        if self.config.ttfb <= 0:
+            return 0.0
+        if self.config.ttfb_sigma <= 0:
+            return self.config.ttfb
+        return self.rng.lognormvariate(math.log(self.config.ttfb), self.config.ttfb_sigma)
+
+    def generation_time(self, tokens: int) -> float:
+        if self.config.tokens_per_second <= 0:
+            return 0.0
+        return tokens / self.config.tokens_per_second
+
+    def story_content(self, prompt: str, max_tokens: int) -> Tuple[str, str]:
+        """
+        Build story JSON for a prompt.
+
+        Returns:
+            Tuple of (content, finish_reason); content longer than max_tokens
+            is cut off with finish_reason "length", as a real model would
+        """
+        premise = re.search(r"Premise:\s*(.+)", prompt)
+        title_words = (premise.group(1) if premise else "A Story").split()[:4]
+
+        chapters = []
+        for index in range(1, self.config.chapters + 1):
+            choices = [] if index == self.config.chapters else [
+                {"id": "a", "text": self.sentence(4), "leads_to": index + 1},
+                {"id": "b", "text": self.sentence(4), "leads_to": index + 1}
+            ]
+            chapters.append({"id": index, "text": self.paragraph(self.config.words_per_chapter), "choices": choices})
+
+        content = json.dumps({"title": " ".join(title_words).title(), "chapters": chapters}, indent=2)
+
+        if self.rng.random() < self.config.malformed_rate:
+            content = self.malform(content)
+
+        if estimate_tokens(content) > max_tokens:
+            self.truncated += 1
+            return content[:max_tokens * 4], "length"
+
+        return content, "stop"
+
+    def malform(self, content: str) -> str:
+        """Break the JSON the way models do"""
+        self.malformed += 1
+        kind = self.rng.choice(MALFORMATIONS)
+
+        if kind == "code_fence":
+            return f"Here is your story:\n```json\n{content}\n```"
+        if kind == "smart_quotes":
+            return content.replace('"title"', "“title”", 1)
+        if kind == "trailing_commas":
+            return content.replace("\n  ]", ",\n  ]", 1)
+        return content[:int(len(content) * 0.8)]
+
+    def sentence(self, words: int) -> str:
+        text = " ".join(self.rng.choice(WORDS) for _ in range(words))
+        return text[0].upper() + text[1:]
+
+    def paragraph(self, words: int) -> str:
+        sentences = []
+        while words > 0:
+            length = min(words, self.rng.randint(8, 16))
+            sentences.append(self.sentence(length) + ".")
+            words -= length
+        return " ".join(sentences)
+
+    def record_generation(self, generation_id: str, usage: Dict):
+        self.generations[generation_id] = (usage["prompt_tokens"] + usage["completion_tokens"]) * self.config.cost_per_token
+        self.completion_tokens += usage["completion_tokens"]
+
+    def get_stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "streamed": self.streamed,
+            "errors_injected": self.errors_injected,
+            "rate_limited": self.rate_limited,
+            "malformed": self.malformed,
+            "truncated": self.truncated,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "completion_tokens": self.completion_tokens,
+            "config": asdict(self.config)
+        }
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def rate_limit_headers(standin: StoryStandin) -> Dict[str, str]:
+    return {
+        "X-RateLimit-Limit": "1000",
+        "X-RateLimit-Remaining": str(max(0, 1000 - standin.in_flight)),
+        "X-RateLimit-Reset": str(int((time.time() + 60) * 1000))
+    }
+
+
+def create_app(config: Optional[StandinConfig] = None) -> FastAPI:
+    """Build the stand-in application"""
+    standin = StoryStandin(config or StandinConfig())
+    app = FastAPI(title="OpenRouter Stand-in")
+    app.state.standin = standin
+
+    @app.post("/api/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        standin.requests += 1
+
+        fault = standin.fault()
+        if fault is not None:
+            status, error, headers = fault
+            await asyncio.sleep(standin.ttfb())
+            return JSONResponse(error, status_code=status, headers=headers)
+
+        model = body.get("model", "google/gemini-flash-1.5")
+        messages: List[Dict] = body.get("messages", [])
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        content, finish_reason = standin.story_content(prompt, int(body.get("max_tokens") or 2000))
+
+        generation_id = f"gen-{uuid.uuid4().hex[:20]}"
+        usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(content)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if body.get("stream"):
+            standin.streamed += 1
+            return StreamingResponse(
+                stream_completion(standin, generation_id, model, content, finish_reason, usage),
+                media_type="text/event-stream",
+                headers=rate_limit_headers(standin)
+            )
+
+        standin.in_flight += 1
+        standin.peak_in_flight = max(standin.peak_in_flight, standin.in_flight)
+        try:
+            await asyncio.sleep(standin.ttfb() + standin.generation_time(usage["completion_tokens"]))
+        finally:
+            standin.in_flight -= 1
+
+        standin.record_generation(generation_id, usage)
+        return JSONResponse(
+            {
+                "id": generation_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason
+                }],
+                "usage": usage
+            },
+            headers=rate_limit_headers(standin)
+        )
+
+    @app.get("/api/v1/generation")
+    async def generation(id: str):
+        if id not in standin.generations:
+            return JSONResponse({"error": {"code": 404, "message": "Generation not found"}}, status_code=404)
+        return {"data": {"id": id, "total_cost": standin.generations[id]}}
+
+    @app.get("/stats")
+    async def stats():
+        return standin.get_stats()
+
+    return app
+
+
+async def stream_completion(
+    standin: StoryStandin,
+    generation_id: str,
+    model: str,
+    content: str,
+    finish_reason: str,
+    usage: Dict
+) -> AsyncIterator[bytes]:
+    """Emit the completion as OpenRouter-style server-sent events"""
+    standin.in_flight += 1
+    standin.peak_in_flight = max(standin.peak_in_flight, standin.in_flight)
+
+    def event(delta: Dict, finish: Optional[str] = None, **extra) -> bytes:
+        chunk = {
+            "id": generation_id,
+            "object": "chat.completion.chunk",
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            **extra
+        }
+        return f"data: {json.dumps(chunk)}\n\n".encode()
+
+    try:
+        yield b": OPENROUTER PROCESSING\n\n"
+        await asyncio.sleep(standin.ttfb())
+
+        chunk_chars = standin.config.chunk_tokens * 4
+        chunk_delay = standin.generation_time(standin.config.chunk_tokens)
+        for start in range(0, len(content), chunk_chars):
+            yield event({"content": content[start:start + chunk_chars]})
+            if chunk_delay:
+                await asyncio.sleep(chunk_delay)
+
+        standin.record_generation(generation_id, usage)
+        yield event({}, finish_reason, usage=usage)
+        yield b"data: [DONE]\n\n"
+    finally:
+        standin.in_flight -= 1
+
+
+def config_from_args(args: argparse.Namespace) -> StandinConfig:
+    names = {field.name for field in fields(StandinConfig)}
+    return StandinConfig(**{name: value for name, value in vars(args).items() if name in names})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--ttfb", type=float, default=0.5)
+    parser.add_argument("--ttfb-sigma", dest="ttfb_sigma", type=float, default=0.4)
+    parser.add_argument("--tps", dest="tokens_per_second", type=float, default=80.0)
+    parser.add_argument("--chunk-tokens", dest="chunk_tokens", type=int, default=8)
+    parser.add_argument("--error-rate", dest="error_rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", dest="rate_limit_rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-burst", dest="rate_limit_burst", type=int, default=5)
+    parser.add_argument("--retry-after", dest="retry_after", type=float, default=1.0)
+    parser.add_argument("--malformed-rate", dest="malformed_rate", type=float, default=0.0)
+    parser.add_argument("--chapters", type=int, default=4)
+    parser.add_argument("--words-per-chapter", dest="words_per_chapter", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()